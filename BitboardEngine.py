@@ -0,0 +1,581 @@
+"""
+Bitboard backend for GameState. The position is kept as 12 64-bit integers (one per piece type and color) plus
+occupancy masks, and move generation works on precomputed attack tables instead of walking the 2D board.
+Square index 0 is a8 and 63 is h1, i.e. square = row * 8 + col, matching the rows/cols of GameState.board.
+"""
+
+from Chess import ChessEngine
+from Chess.ChessEngine import Move, SQUARES, PIECE_CODES
+
+PIECES = ("wp", "wN", "wB", "wR", "wQ", "wK", "bp", "bN", "bB", "bR", "bQ", "bK")
+PIECE_INDEX = {piece: i for i, piece in enumerate(PIECES)}
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+WHITE, BLACK = 0, 1
+
+# Directions 0-3 are orthogonal (rook-like), 4-7 diagonal (bishop-like), same order as GameState.
+DIRECTIONS = ((-1, 0), (0, -1), (1, 0), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1))
+# Directions whose square index increases along the ray, so the nearest blocker is the lowest set bit.
+POSITIVE_DIRECTIONS = (False, False, True, True, False, False, True, True)
+
+
+def _build_step_table(steps):
+    table = []
+    for sq in range(64):
+        r, c = divmod(sq, 8)
+        mask = 0
+        for dr, dc in steps:
+            if 0 <= r + dr < 8 and 0 <= c + dc < 8:
+                mask |= 1 << ((r + dr) * 8 + c + dc)
+        table.append(mask)
+    return table
+
+
+def _build_rays():
+    rays = []
+    for dr, dc in DIRECTIONS:
+        direction_rays = []
+        for sq in range(64):
+            r, c = divmod(sq, 8)
+            mask = 0
+            r, c = r + dr, c + dc
+            while 0 <= r < 8 and 0 <= c < 8:
+                mask |= 1 << (r * 8 + c)
+                r, c = r + dr, c + dc
+            direction_rays.append(mask)
+        rays.append(direction_rays)
+    return rays
+
+
+KNIGHT_ATTACKS = _build_step_table(((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)))
+KING_ATTACKS = _build_step_table(DIRECTIONS)
+# PAWN_ATTACKS[color][sq] is the set of squares a pawn of that color standing on sq attacks.
+PAWN_ATTACKS = (_build_step_table(((-1, -1), (-1, 1))), _build_step_table(((1, -1), (1, 1))))
+RAYS = _build_rays()
+
+# BETWEEN[a][b] holds the squares strictly between a and b when they share a line, else 0.
+FULL_BOARD = 0xFFFFFFFFFFFFFFFF
+NOT_FILE_A = sum(1 << sq for sq in range(64) if sq % 8 != 0)
+NOT_FILE_H = sum(1 << sq for sq in range(64) if sq % 8 != 7)
+# Squares a pawn of each color reaches with a single push from its start row, and the rows it promotes on
+THIRD_RANKS = (0xFF << 40, 0xFF << 16)
+BACK_RANKS = (0xFF, 0xFF << 56)
+
+BETWEEN = [[0] * 64 for _ in range(64)]
+for _d in range(8):
+    for _a in range(64):
+        _ray = RAYS[_d][_a]
+        _bits = _ray
+        while _bits:
+            _lsb = _bits & -_bits
+            _b = _lsb.bit_length() - 1
+            BETWEEN[_a][_b] = _ray & ~RAYS[_d][_b] & ~_lsb
+            _bits ^= _lsb
+
+
+def _build_line_attacks(directions):
+    """
+    Per square, the blocker mask of the line through it along the two opposite directions, and a dict from every
+    subset of that mask to the attacks along the line. The last square of each ray is left out of the mask, since
+    nothing lies beyond it to block.
+    """
+    masks, tables = [], []
+    for sq in range(64):
+        mask = 0
+        for d in directions:
+            ray = RAYS[d][sq]
+            if ray:
+                end = ray.bit_length() - 1 if POSITIVE_DIRECTIONS[d] else (ray & -ray).bit_length() - 1
+                mask |= ray ^ (1 << end)
+        table = {}
+        subset = 0
+        while True:
+            table[subset] = ray_attacks(sq, subset, directions[0]) | ray_attacks(sq, subset, directions[1])
+            subset = (subset - mask) & mask
+            if subset == 0:
+                break
+        masks.append(mask)
+        tables.append(table)
+    return masks, tables
+
+
+# Generated moves are interned: Move is immutable, so every position that has the same move with the same pieces
+# shares one instance instead of allocating its own. Keyed by move_id and the codes of the two pieces involved;
+# the number of distinct keys is bounded, so the cache is never cleared.
+MOVE_CACHE = {}
+
+
+def interned_move(start, end, board):
+    """
+    The plain (not en passant, not castling) move from square start to square end on board. Pawn moves to the
+    last row are promotions.
+    """
+    start_sq = SQUARES[start]
+    end_sq = SQUARES[end]
+    moved = board[start_sq[0]][start_sq[1]]
+    key = (start << 6 | end) << 8 | PIECE_CODES[moved] << 4 | PIECE_CODES[board[end_sq[0]][end_sq[1]]]
+    move = MOVE_CACHE.get(key)
+    if move is None:
+        move = MOVE_CACHE[key] = Move(start_sq, end_sq, board,
+                                      pawn_promotion=moved[1] == 'p' and (end_sq[0] == 0 or end_sq[0] == 7))
+    return move
+
+
+def iter_squares(bb):
+    while bb:
+        lsb = bb & -bb
+        yield lsb.bit_length() - 1
+        bb ^= lsb
+
+
+def ray_attacks(sq, occupied, direction):
+    ray = RAYS[direction][sq]
+    blockers = ray & occupied
+    if not blockers:
+        return ray
+    if POSITIVE_DIRECTIONS[direction]:
+        blocker = (blockers & -blockers).bit_length() - 1
+    else:
+        blocker = blockers.bit_length() - 1
+    return ray ^ RAYS[direction][blocker]
+
+
+# Slider attacks are looked up one line at a time: rank, file, diagonal and anti-diagonal.
+RANK_MASKS, RANK_ATTACKS = _build_line_attacks((1, 3))
+FILE_MASKS, FILE_ATTACKS = _build_line_attacks((0, 2))
+DIAGONAL_MASKS, DIAGONAL_ATTACKS = _build_line_attacks((4, 7))
+ANTI_DIAGONAL_MASKS, ANTI_DIAGONAL_ATTACKS = _build_line_attacks((5, 6))
+
+
+def rook_attacks(sq, occupied):
+    return RANK_ATTACKS[sq][occupied & RANK_MASKS[sq]] | FILE_ATTACKS[sq][occupied & FILE_MASKS[sq]]
+
+
+def bishop_attacks(sq, occupied):
+    return (DIAGONAL_ATTACKS[sq][occupied & DIAGONAL_MASKS[sq]] |
+            ANTI_DIAGONAL_ATTACKS[sq][occupied & ANTI_DIAGONAL_MASKS[sq]])
+
+
+class BitboardGameState(ChessEngine.GameState):
+    def __init__(self):
+        super().__init__()
+        self.load_bitboards()
+
+    def sync_from_board(self):
+        super().sync_from_board()
+        self.load_bitboards()
+
+    def load_bitboards(self):
+        self.bitboards = [0] * 12
+        self.occupancy = [0, 0]
+        for r in range(8):
+            for c in range(8):
+                piece = self.board[r][c]
+                if piece != "--":
+                    self.toggle_piece(piece, r * 8 + c)
+
+    def toggle_piece(self, piece, sq):
+        bit = 1 << sq
+        self.bitboards[PIECE_INDEX[piece]] ^= bit
+        self.occupancy[WHITE if piece[0] == 'w' else BLACK] ^= bit
+
+    def make_move(self, move, promotion_piece="Q"):
+        super().make_move(move, promotion_piece)
+        self.move_pieces(move, self.board[move.end_row][move.end_col])
+
+    def undo_move(self):
+        if len(self.moveLog) == 0:
+            return
+        move = self.moveLog[-1]
+        placed_piece = self.board[move.end_row][move.end_col]
+        super().undo_move()
+        self.move_pieces(move, placed_piece)
+
+    def move_pieces(self, move, placed_piece):
+        """
+        Toggles the bitboards for move, which left placed_piece on its end square; the same call makes and undoes.
+        """
+        start_bit = 1 << (move.move_id >> 6)
+        end_bit = 1 << (move.move_id & 63)
+        bbs = self.bitboards
+        color = WHITE if move.piece_moved[0] == 'w' else BLACK
+        bbs[PIECE_INDEX[move.piece_moved]] ^= start_bit
+        bbs[PIECE_INDEX[placed_piece]] ^= end_bit
+        self.occupancy[color] ^= start_bit | end_bit
+        if move.piece_captured != "--":
+            captured_bit = 1 << (move.start_row * 8 + move.end_col) if move.EnPassant else end_bit
+            bbs[PIECE_INDEX[move.piece_captured]] ^= captured_bit
+            self.occupancy[1 - color] ^= captured_bit
+        if move.castle:
+            self.toggle_castle_rook(move)
+
+    def toggle_castle_rook(self, move):
+        rook = move.piece_moved[0] + 'R'
+        row = move.end_row * 8
+        if move.end_col - move.start_col == 2:
+            self.toggle_piece(rook, row + 7)
+            self.toggle_piece(rook, row + move.end_col - 1)
+        else:
+            self.toggle_piece(rook, row)
+            self.toggle_piece(rook, row + move.end_col + 1)
+
+    def attackers_to(self, sq, occupied, color):
+        """
+        Bitboard of the pieces of the given color attacking sq, given an occupancy mask.
+        """
+        base = 0 if color == WHITE else 6
+        bbs = self.bitboards
+        queens = bbs[base + QUEEN]
+        return ((PAWN_ATTACKS[1 - color][sq] & bbs[base + PAWN]) |
+                (KNIGHT_ATTACKS[sq] & bbs[base + KNIGHT]) |
+                (KING_ATTACKS[sq] & bbs[base + KING]) |
+                (rook_attacks(sq, occupied) & (bbs[base + ROOK] | queens)) |
+                (bishop_attacks(sq, occupied) & (bbs[base + BISHOP] | queens)))
+
+    def square_under_attack(self, r, c, allyColor):
+        enemy = BLACK if allyColor == 'w' else WHITE
+        return self.attackers_to(r * 8 + c, self.occupancy[WHITE] | self.occupancy[BLACK], enemy) != 0
+
+    def pinned_pieces(self, king_sq, us, occupied):
+        """
+        Maps each of our pinned pieces to the mask of squares it may still move to (the pin line).
+        """
+        base = 6 if us == WHITE else 0
+        bbs = self.bitboards
+        orthogonal = bbs[base + ROOK] | bbs[base + QUEEN]
+        diagonal = bbs[base + BISHOP] | bbs[base + QUEEN]
+        own = self.occupancy[us]
+        pins = {}
+        for d in range(8):
+            sliders = orthogonal if d < 4 else diagonal
+            if not RAYS[d][king_sq] & sliders:
+                continue
+            blockers = RAYS[d][king_sq] & occupied
+            if POSITIVE_DIRECTIONS[d]:
+                first = (blockers & -blockers).bit_length() - 1
+            else:
+                first = blockers.bit_length() - 1
+            if not (own >> first) & 1:
+                continue
+            beyond = RAYS[d][first] & occupied
+            if not beyond:
+                continue
+            if POSITIVE_DIRECTIONS[d]:
+                second = (beyond & -beyond).bit_length() - 1
+            else:
+                second = beyond.bit_length() - 1
+            if (sliders >> second) & 1:
+                pins[first] = RAYS[d][king_sq] & ~RAYS[d][second]
+        return pins
+
+    def get_valid_moves(self):
+        moves = self.generate_moves(False)
+        self.set_game_over(moves)
+        return moves
+
+    def get_capture_moves(self):
+        """
+        Legal captures and promotions only, for the quiescence search. In check every evasion is returned.
+        """
+        return self.generate_moves(True)
+
+    def get_quiet_moves(self):
+        """
+        Moves that neither capture nor promote, for staged move generation out of check. As in GameState, king steps
+        and castling are left for king_move_is_legal to test when the search tries them.
+        """
+        return self.generate_moves(False, True)
+
+    def king_move_is_legal(self, move):
+        us = WHITE if move.piece_moved[0] == 'w' else BLACK
+        start = move.move_id >> 6
+        without_king = (self.occupancy[WHITE] | self.occupancy[BLACK]) ^ (1 << start)
+        if move.castle and self.attackers_to((start + (move.move_id & 63)) // 2, without_king, 1 - us):
+            return False
+        return not self.attackers_to(move.move_id & 63, without_king, 1 - us)
+
+    def count_legal_moves(self):
+        """
+        len(get_valid_moves()) from the target masks, building only the pawn and castling moves.
+        """
+        us = WHITE if self.WhiteToMove else BLACK
+        them = 1 - us
+        base = 0 if us == WHITE else 6
+        bbs = self.bitboards
+        own = self.occupancy[us]
+        occupied = own | self.occupancy[them]
+        king_sq = bbs[base + KING].bit_length() - 1
+        checkers = self.attackers_to(king_sq, occupied, them)
+        without_king = occupied ^ (1 << king_sq)
+        count = 0
+        for sq in iter_squares(KING_ATTACKS[king_sq] & ~own):
+            if not self.attackers_to(sq, without_king, them):
+                count += 1
+        if checkers & (checkers - 1):
+            return count
+        moves = []
+        if checkers:
+            target_mask = (checkers | BETWEEN[king_sq][checkers.bit_length() - 1]) & ~own
+        else:
+            target_mask = ~own & FULL_BOARD
+            self.get_bitboard_castle_moves(king_sq >> 3, king_sq & 7, occupied, them, moves)
+        pins = self.pinned_pieces(king_sq, us, occupied)
+        for sq in iter_squares(bbs[base + KNIGHT]):
+            if sq not in pins:
+                count += (KNIGHT_ATTACKS[sq] & target_mask).bit_count()
+        for sq in iter_squares(bbs[base + BISHOP] | bbs[base + QUEEN]):
+            count += (bishop_attacks(sq, occupied) & target_mask & pins.get(sq, FULL_BOARD)).bit_count()
+        for sq in iter_squares(bbs[base + ROOK] | bbs[base + QUEEN]):
+            count += (rook_attacks(sq, occupied) & target_mask & pins.get(sq, FULL_BOARD)).bit_count()
+        self.get_bitboard_pawn_moves(us, king_sq, occupied, target_mask, pins, moves)
+        return count + len(moves)
+
+    def generate_moves(self, captures_only, quiets_only=False):
+        us = WHITE if self.WhiteToMove else BLACK
+        them = 1 - us
+        base = 0 if us == WHITE else 6
+        bbs = self.bitboards
+        own = self.occupancy[us]
+        enemy = self.occupancy[them]
+        occupied = own | enemy
+        king_sq = bbs[base + KING].bit_length() - 1
+        board = self.board
+        moves = []
+
+        checkers = self.attackers_to(king_sq, occupied, them)
+        self.inCheck = checkers != 0
+        if checkers:
+            captures_only = False
+        king_row, king_col = divmod(king_sq, 8)
+        self.checks = []
+        for sq in iter_squares(checkers):
+            r, c = divmod(sq, 8)
+            dr, dc = r - king_row, c - king_col
+            if dr == 0 or dc == 0 or abs(dr) == abs(dc):
+                dr, dc = (dr > 0) - (dr < 0), (dc > 0) - (dc < 0)
+            self.checks.append((r, c, dr, dc))
+        self.pins = []
+
+        # King moves: only the few target squares are tested, with the king removed from the occupancy so
+        # sliders see through its old square. Quiet king moves are left to king_move_is_legal.
+        king_targets = KING_ATTACKS[king_sq] & ~own
+        if captures_only:
+            king_targets &= enemy
+        elif quiets_only:
+            king_targets &= ~enemy
+        without_king = occupied ^ (1 << king_sq)
+        while king_targets:
+            bit = king_targets & -king_targets
+            king_targets ^= bit
+            to = bit.bit_length() - 1
+            if quiets_only or not self.attackers_to(to, without_king, them):
+                moves.append(interned_move(king_sq, to, board))
+
+        if checkers & (checkers - 1):
+            return moves
+
+        if checkers:
+            checker_sq = checkers.bit_length() - 1
+            target_mask = checkers | BETWEEN[king_sq][checker_sq]
+        else:
+            target_mask = ~own & FULL_BOARD
+            if not captures_only:
+                self.get_bitboard_castle_moves(king_row, king_col, occupied, them, moves, not quiets_only)
+        target_mask &= ~own
+        capture_mask = target_mask & enemy if captures_only else target_mask & ~enemy if quiets_only else target_mask
+
+        pins = self.pinned_pieces(king_sq, us, occupied)
+
+        # Each piece's target mask is collected first, then all of them are turned into interned moves in one loop.
+        # The square loops are written out rather than run through iter_squares, which costs a generator per mask.
+        sources = []
+        pieces = bbs[base + KNIGHT]
+        while pieces:
+            bit = pieces & -pieces
+            pieces ^= bit
+            sq = bit.bit_length() - 1
+            if sq not in pins:
+                sources.append((sq, KNIGHT_ATTACKS[sq] & capture_mask))
+        for slider_attacks, pieces in ((bishop_attacks, bbs[base + BISHOP] | bbs[base + QUEEN]),
+                                       (rook_attacks, bbs[base + ROOK] | bbs[base + QUEEN])):
+            while pieces:
+                bit = pieces & -pieces
+                pieces ^= bit
+                sq = bit.bit_length() - 1
+                targets = slider_attacks(sq, occupied) & capture_mask
+                if sq in pins:
+                    targets &= pins[sq]
+                sources.append((sq, targets))
+        cache = MOVE_CACHE
+        for sq, targets in sources:
+            r, c = SQUARES[sq]
+            prefix = sq << 14 | PIECE_CODES[board[r][c]] << 4
+            while targets:
+                bit = targets & -targets
+                targets ^= bit
+                to = bit.bit_length() - 1
+                end_row, end_col = SQUARES[to]
+                key = prefix | to << 8 | PIECE_CODES[board[end_row][end_col]]
+                move = cache.get(key)
+                if move is None:
+                    move = cache[key] = Move(SQUARES[sq], SQUARES[to], board)
+                moves.append(move)
+
+        self.get_bitboard_pawn_moves(us, king_sq, occupied, target_mask, pins, moves, captures_only, quiets_only)
+        return moves
+
+    def has_any_legal_move(self):
+        """
+        generate_moves cut short: tests each piece's target mask and returns at the first legal move.
+        """
+        us = WHITE if self.WhiteToMove else BLACK
+        them = 1 - us
+        base = 0 if us == WHITE else 6
+        bbs = self.bitboards
+        own = self.occupancy[us]
+        occupied = own | self.occupancy[them]
+        king_sq = bbs[base + KING].bit_length() - 1
+        checkers = self.attackers_to(king_sq, occupied, them)
+        self.inCheck = checkers != 0
+        found = self.any_legal_move(us, them, base, own, occupied, king_sq, checkers)
+        self.checkMate = not found and self.inCheck
+        self.staleMate = not found and not self.inCheck
+        return found
+
+    def any_legal_move(self, us, them, base, own, occupied, king_sq, checkers):
+        bbs = self.bitboards
+        without_king = occupied ^ (1 << king_sq)
+        for sq in iter_squares(KING_ATTACKS[king_sq] & ~own):
+            if not self.attackers_to(sq, without_king, them):
+                return True
+        if checkers & (checkers - 1):
+            return False
+        if checkers:
+            target_mask = (checkers | BETWEEN[king_sq][checkers.bit_length() - 1]) & ~own
+        else:
+            target_mask = ~own & FULL_BOARD
+        pins = self.pinned_pieces(king_sq, us, occupied)
+        for sq in iter_squares(bbs[base + KNIGHT]):
+            if sq not in pins and KNIGHT_ATTACKS[sq] & target_mask:
+                return True
+        for sq in iter_squares(bbs[base + BISHOP] | bbs[base + QUEEN]):
+            if bishop_attacks(sq, occupied) & target_mask & pins.get(sq, FULL_BOARD):
+                return True
+        for sq in iter_squares(bbs[base + ROOK] | bbs[base + QUEEN]):
+            if rook_attacks(sq, occupied) & target_mask & pins.get(sq, FULL_BOARD):
+                return True
+        moves = []
+        self.get_bitboard_pawn_moves(us, king_sq, occupied, target_mask, pins, moves)
+        return len(moves) > 0
+
+    def get_bitboard_pawn_moves(self, us, king_sq, occupied, target_mask, pins, moves, captures_only=False,
+                                quiets_only=False):
+        """
+        Unpinned pawns push and capture all at once, as shifted bitboards; only pinned pawns and en passant are
+        looked at one pawn at a time.
+        """
+        board = self.board
+        enemy = self.occupancy[1 - us]
+        pawns = self.bitboards[0 if us == WHITE else 6]
+        pinned = 0
+        for sq in pins:
+            if (pawns >> sq) & 1:
+                pinned |= 1 << sq
+        free = pawns & ~pinned
+        if us == WHITE:
+            step, left, right = -8, -9, -7
+            single = (free >> 8) & ~occupied
+            double = ((single & THIRD_RANKS[WHITE]) >> 8) & ~occupied & target_mask
+            left_captures = ((free & NOT_FILE_A) >> 9) & enemy & target_mask
+            right_captures = ((free & NOT_FILE_H) >> 7) & enemy & target_mask
+        else:
+            step, left, right = 8, 7, 9
+            single = (free << 8) & ~occupied & FULL_BOARD
+            double = ((single & THIRD_RANKS[BLACK]) << 8) & ~occupied & target_mask
+            left_captures = ((free & NOT_FILE_A) << 7) & enemy & target_mask
+            right_captures = ((free & NOT_FILE_H) << 9) & enemy & target_mask
+        single &= target_mask
+        promotion_rank = BACK_RANKS[us]
+        if captures_only:
+            single &= promotion_rank
+            double = 0
+        elif quiets_only:
+            single &= ~promotion_rank
+            left_captures = right_captures = 0
+        cache = MOVE_CACHE
+        code = PIECE_CODES["wp" if us == WHITE else "bp"] << 4
+        for targets, offset in ((single, step), (double, 2 * step), (left_captures, left), (right_captures, right)):
+            while targets:
+                bit = targets & -targets
+                targets ^= bit
+                to = bit.bit_length() - 1
+                end_row, end_col = SQUARES[to]
+                key = (to - offset) << 14 | to << 8 | code | PIECE_CODES[board[end_row][end_col]]
+                move = cache.get(key)
+                if move is None:
+                    move = cache[key] = Move(SQUARES[to - offset], SQUARES[to], board,
+                                             pawn_promotion=bit & promotion_rank != 0)
+                moves.append(move)
+
+        step = -8 if us == WHITE else 8
+        start_row = 6 if us == WHITE else 1
+        for sq in iter_squares(pinned):
+            r, c = divmod(sq, 8)
+            allowed = target_mask & pins[sq]
+            promotion = (promotion_rank >> (sq + step)) & 1 != 0
+            one = sq + step
+            if not (occupied >> one) & 1 and (promotion or not captures_only) and not (promotion and quiets_only):
+                if (allowed >> one) & 1:
+                    moves.append(interned_move(sq, one, board))
+                two = one + step
+                if r == start_row and not captures_only and not (occupied >> two) & 1 and (allowed >> two) & 1:
+                    moves.append(interned_move(sq, two, board))
+            if not quiets_only:
+                for to in iter_squares(PAWN_ATTACKS[us][sq] & enemy & allowed):
+                    moves.append(interned_move(sq, to, board))
+
+        if self.EnPassantPossible != () and not quiets_only:
+            ep_sq = self.EnPassantPossible[0] * 8 + self.EnPassantPossible[1]
+            for sq in iter_squares(PAWN_ATTACKS[1 - us][ep_sq] & pawns):
+                if self.en_passant_is_legal(us, sq, ep_sq, king_sq, occupied):
+                    moves.append(Move(SQUARES[sq], SQUARES[ep_sq], board, EnPassant=True))
+
+    def en_passant_is_legal(self, us, from_sq, ep_sq, king_sq, occupied):
+        # En passant removes two pieces from one rank, so test the resulting position directly.
+        captured_sq = ep_sq + (8 if us == WHITE else -8)
+        after = (occupied ^ (1 << from_sq) ^ (1 << captured_sq)) | (1 << ep_sq)
+        them = 1 - us
+        base = 0 if them == WHITE else 6
+        bbs = self.bitboards
+        queens = bbs[base + QUEEN]
+        if rook_attacks(king_sq, after) & (bbs[base + ROOK] | queens):
+            return False
+        if bishop_attacks(king_sq, after) & (bbs[base + BISHOP] | queens):
+            return False
+        others = ((PAWN_ATTACKS[us][king_sq] & bbs[base + PAWN] & ~(1 << captured_sq)) |
+                  (KNIGHT_ATTACKS[king_sq] & bbs[base + KNIGHT]))
+        return others == 0
+
+    def get_bitboard_castle_moves(self, r, c, occupied, them, moves, test_attacks=True):
+        if self.WhiteToMove:
+            kingside, queenside, ally = self.WhiteCastleKingside, self.WhiteCastleQueenside, 'w'
+        else:
+            kingside, queenside, ally = self.BlackCastleKingside, self.BlackCastleQueenside, 'b'
+        sq = r * 8 + c
+        if kingside and self.board[r][7] == ally + 'R':
+            if not occupied & (0b11 << (sq + 1)) and (not test_attacks or (
+                    not self.attackers_to(sq + 1, occupied, them) and not self.attackers_to(sq + 2, occupied, them))):
+                moves.append(Move((r, c), (r, c + 2), self.board, castle=True))
+        if queenside and self.board[r][0] == ally + 'R':
+            if not occupied & (0b111 << (sq - 3)) and (not test_attacks or (
+                    not self.attackers_to(sq - 1, occupied, them) and not self.attackers_to(sq - 2, occupied, them))):
+                moves.append(Move((r, c), (r, c - 2), self.board, castle=True))
+
+    def set_game_over(self, moves):
+        if len(moves) == 0:
+            if self.inCheck:
+                self.checkMate = True
+            else:
+                self.staleMate = True
+        else:
+            self.checkMate = False
+            self.staleMate = False
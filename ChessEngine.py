@@ -3,6 +3,137 @@ Class responsible for storing information of the current state of the game as we
 moves at a current state.
 """
 
+import random
+from array import array
+
+# Zobrist keys, seeded so every process (and any file keyed by position hash) sees the same values.
+_zobristRandom = random.Random(0x5EED)
+ZOBRIST_PIECES = {color + piece: [_zobristRandom.getrandbits(64) for _ in range(64)]
+                  for color in "wb" for piece in "pNBRQK"}
+ZOBRIST_CASTLE = [_zobristRandom.getrandbits(64) for _ in range(16)]
+ZOBRIST_EN_PASSANT = [_zobristRandom.getrandbits(64) for _ in range(8)]
+ZOBRIST_BLACK_TO_MOVE = _zobristRandom.getrandbits(64)
+
+UNDO_STACK_PLIES = 256  # undo records preallocated per GameState; doubled if a game ever runs longer
+SQUARES = tuple(divmod(sq, 8) for sq in range(64))  # shared (row, col) tuples, so moves allocate none
+# Undo record lookups: castle bits -> (wks, wqs, bks, bqs), and [WhiteToMove][file + 1] -> en passant square
+CASTLE_RIGHTS = tuple((bits & 1 != 0, bits & 2 != 0, bits & 4 != 0, bits & 8 != 0) for bits in range(16))
+EN_PASSANT_SQUARES = (((),) + SQUARES[40:48], ((),) + SQUARES[16:24])
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+PIECE_NAMES = ("--", "wp", "wN", "wB", "wR", "wQ", "wK", "bp", "bN", "bB", "bR", "bQ", "bK")
+PIECE_CODES = {piece: code for code, piece in enumerate(PIECE_NAMES)}
+
+KNIGHT_MOVES = ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1))
+KING_DIRECTIONS = ((-1, 0), (0, -1), (1, 0), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1))
+SLIDER_DIRECTIONS = {'R': KING_DIRECTIONS[:4], 'B': KING_DIRECTIONS[4:], 'Q': KING_DIRECTIONS}
+SLIDER_DIRECTION_INDICES = {'R': range(4), 'B': range(4, 8), 'Q': range(8)}
+
+
+def _step_targets(steps):
+    return [[(r + dr) * 8 + c + dc for dr, dc in steps if 0 <= r + dr < 8 and 0 <= c + dc < 8]
+            for r in range(8) for c in range(8)]
+
+
+def _ray_squares():
+    rays = []
+    for r in range(8):
+        for c in range(8):
+            square_rays = []
+            for dr, dc in KING_DIRECTIONS:
+                ray = []
+                end_row, end_col = r + dr, c + dc
+                while 0 <= end_row < 8 and 0 <= end_col < 8:
+                    ray.append(end_row * 8 + end_col)
+                    end_row, end_col = end_row + dr, end_col + dc
+                square_rays.append(ray)
+            rays.append(square_rays)
+    return rays
+
+
+# Per-square tables, indexed by square = row * 8 + col and holding square indices
+KNIGHT_TARGETS = _step_targets(KNIGHT_MOVES)
+KING_TARGETS = _step_targets(KING_DIRECTIONS)
+PAWN_TARGETS = {'w': _step_targets(((-1, -1), (-1, 1))), 'b': _step_targets(((1, -1), (1, 1)))}  # capture squares
+RAY_SQUARES = _ray_squares()  # RAY_SQUARES[sq][j]: squares outward from sq in direction KING_DIRECTIONS[j]
+# BETWEEN_SQUARES[a][b]: squares strictly between a and b on a shared line, else empty
+BETWEEN_SQUARES = [[[] for _ in range(64)] for _ in range(64)]
+for _a in range(64):
+    for _ray in RAY_SQUARES[_a]:
+        for _i, _b in enumerate(_ray):
+            BETWEEN_SQUARES[_a][_b] = _ray[:_i]
+
+# Evaluation tables. GameState keeps running totals of these so the search can score a leaf in O(1).
+knightScores = [[1, 1, 1, 1, 1, 1, 1, 1],
+                [1, 2, 2, 2, 2, 2, 2, 1],
+                [1, 2, 3, 3, 3, 3, 2, 1],
+                [1, 2, 3, 4, 4, 3, 2, 1],
+                [1, 2, 3, 4, 4, 3, 2, 1],
+                [1, 2, 3, 3, 3, 3, 2, 1],
+                [1, 2, 2, 2, 2, 2, 2, 1],
+                [1, 1, 1, 1, 1, 1, 1, 1]]
+
+bishopScores = [[4, 3, 2, 1, 1, 2, 3, 4],
+                [3, 4, 3, 2, 2, 3, 4, 3],
+                [2, 3, 4, 3, 3, 4, 3, 2],
+                [1, 2, 3, 4, 4, 3, 2, 1],
+                [1, 2, 3, 4, 4, 3, 2, 1],
+                [2, 3, 4, 3, 3, 4, 3, 2],
+                [3, 4, 3, 2, 2, 3, 4, 3],
+                [4, 3, 2, 1, 1, 2, 3, 4]]
+
+queenScores = [[1, 1, 1, 3, 1, 1, 1, 1],
+               [1, 2, 3, 3, 3, 3, 1, 1],
+               [1, 4, 3, 3, 3, 4, 2, 1],
+               [1, 2, 3, 3, 3, 2, 2, 1],
+               [1, 2, 3, 3, 3, 2, 2, 1],
+               [1, 4, 3, 3, 3, 4, 2, 1],
+               [1, 1, 2, 3, 3, 1, 1, 1],
+               [1, 1, 1, 3, 1, 1, 1, 1]]
+
+rookScores = [[4, 3, 4, 4, 4, 4, 3, 4],
+              [4, 4, 4, 4, 4, 4, 4, 4],
+              [1, 1, 2, 3, 3, 2, 1, 1],
+              [1, 2, 3, 4, 4, 3, 2, 1],
+              [1, 2, 3, 4, 4, 3, 2, 1],
+              [1, 1, 2, 2, 2, 2, 1, 1],
+              [4, 4, 4, 4, 4, 4, 4, 4],
+              [4, 3, 4, 4, 4, 4, 3, 4]]
+
+whitePawnScores = [[8, 8, 8, 8, 8, 8, 8, 8],
+                   [8, 8, 8, 8, 8, 8, 8, 8],
+                   [5, 6, 6, 7, 7, 6, 6, 5],
+                   [2, 3, 3, 5, 5, 3, 3, 2],
+                   [1, 2, 3, 4, 4, 3, 2, 1],
+                   [1, 1, 2, 3, 3, 2, 1, 1],
+                   [1, 1, 1, 0, 0, 1, 1, 1],
+                   [0, 0, 0, 0, 0, 0, 0, 0]]
+
+blackPawnScores = [[0, 0, 0, 0, 0, 0, 0, 0],
+                   [1, 1, 1, 0, 0, 1, 1, 1],
+                   [1, 1, 2, 3, 3, 2, 1, 1],
+                   [1, 2, 3, 4, 4, 3, 2, 1],
+                   [2, 3, 3, 5, 5, 3, 3, 2],
+                   [5, 6, 6, 7, 7, 6, 6, 5],
+                   [8, 8, 8, 8, 8, 8, 8, 8],
+                   [8, 8, 8, 8, 8, 8, 8, 8]]
+
+piecePositionScores = {"wN": knightScores, "wB": bishopScores, "wR": rookScores,
+                       "wQ": queenScores, "wp": whitePawnScores, "bp": blackPawnScores,
+                       "bN": knightScores[::-1], "bB": bishopScores[::-1],
+                       "bQ": queenScores[::-1], "bR": rookScores[::-1]}
+
+pieceScores = {"K": 0, "Q": 9, "R": 5, "B": 3, "N": 3, "p": 1}
+
+# Signed per-square lookups built from the tables above: white counts positive, black negative.
+MATERIAL = {color + piece: (1 if color == 'w' else -1) * value
+            for color in "wb" for piece, value in pieceScores.items()}
+POSITIONAL = {piece: [(1 if piece[0] == 'w' else -1) * piecePositionScores[piece][sq // 8][sq % 8]
+                      if piece in piecePositionScores else 0 for sq in range(64)]
+              for piece in MATERIAL}
+
+
 class GameState:
     def __init__(self):
         # The board is a 2D 8x8 list. Each element of the list has two characters.
@@ -29,35 +160,267 @@ class GameState:
         self.pins = []
         self.checks = []
         self.inCheck = False
+        self.attackMap = None
+        self.attackMapKey = None
         self.checkMate = False
         self.staleMate = False
         self.EnPassantPossible = ()
-        self.EnPassantPossibleLog = [self.EnPassantPossible]
         self.WhiteCastleKingside = True
         self.WhiteCastleQueenside = True
         self.BlackCastleKingside = True
         self.BlackCastleQueenside = True
-        self.CastleRightsLog = [CastleRights(self.WhiteCastleKingside, self.BlackCastleKingside,
-                                             self.WhiteCastleQueenside, self.BlackCastleQueenside)]
+        # Undo records, one per move on the board (null moves included), in typed arrays indexed by ply: the hash,
+        # castle bits | (en passant file + 1) << 4, and the material and positional totals, all from before the move
+        self.undoHashes = array('Q', bytes(8 * UNDO_STACK_PLIES))
+        self.undoFlags = array('B', bytes(UNDO_STACK_PLIES))
+        self.undoScores = array('q', bytes(16 * UNDO_STACK_PLIES))
+        self.undoCount = 0
+        # FEN move counters of the position the move log starts from
+        self.startHalfmoveClock = 0
+        self.startFullmoveNumber = 1
+        self.hash = self.compute_hash()
+        # Running evaluation totals, white minus black; the position score is material + positional * .1
+        self.material, self.positional = self.compute_score()
+        # Material other than pawns and kings per color, for deciding whether null-move pruning is safe
+        self.nonPawnMaterial = self.compute_non_pawn_material()
+        # Pieces on the board, kings included, so a tablebase probe can tell at a glance whether it applies, and the
+        # sum of the squares of everything but the kings: with one such piece left, that is the square it is on
+        self.pieceCount = self.count_pieces()
+        self.nonKingSquareSum = self.sum_non_king_squares()
+
+    def sync_from_board(self):
+        """
+        Rebuilds everything derived from the board, side to move, castling rights and en passant square after a
+        position has been set up directly, and starts a fresh move history from it.
+        """
+        for r in range(8):
+            for c in range(8):
+                if self.board[r][c] == "wK":
+                    self.WhiteKingLocation = (r, c)
+                elif self.board[r][c] == "bK":
+                    self.BlackKingLocation = (r, c)
+        self.moveLog = []
+        self.checkMate = False
+        self.staleMate = False
+        self.undoCount = 0
+        self.hash = self.compute_hash()
+        self.material, self.positional = self.compute_score()
+        self.nonPawnMaterial = self.compute_non_pawn_material()
+        self.pieceCount = self.count_pieces()
+        self.nonKingSquareSum = self.sum_non_king_squares()
+
+    def pack_position(self):
+        """
+        The position as 34 bytes, for shipping to other processes: two squares per byte as 4-bit piece codes,
+        then side to move and castling bits, then the en passant square (255 for none).
+        """
+        data = bytearray(34)
+        for sq in range(0, 64, 2):
+            data[sq // 2] = (PIECE_CODES[self.board[sq // 8][sq % 8]] << 4 |
+                             PIECE_CODES[self.board[(sq + 1) // 8][(sq + 1) % 8]])
+        data[32] = self.WhiteToMove | self.castle_bits() << 1
+        data[33] = 255 if self.EnPassantPossible == () else self.EnPassantPossible[0] * 8 + self.EnPassantPossible[1]
+        return bytes(data)
+
+    def load_packed_position(self, data):
+        for sq in range(64):
+            code = data[sq // 2] >> 4 if sq % 2 == 0 else data[sq // 2] & 0xF
+            self.board[sq // 8][sq % 8] = PIECE_NAMES[code]
+        self.WhiteToMove = bool(data[32] & 1)
+        self.WhiteCastleKingside = bool(data[32] & 2)
+        self.WhiteCastleQueenside = bool(data[32] & 4)
+        self.BlackCastleKingside = bool(data[32] & 8)
+        self.BlackCastleQueenside = bool(data[32] & 16)
+        self.EnPassantPossible = () if data[33] == 255 else divmod(data[33], 8)
+        self.sync_from_board()
+
+    def load_fen(self, fen):
+        """
+        Sets up the position of a FEN string, or of the first four fields of an EPD line, and starts a fresh move
+        history from it. Missing move counters default to 0 and 1.
+        """
+        fields = fen.split()
+        if len(fields) < 2:
+            raise ValueError(f"Incomplete FEN: {fen!r}")
+        ranks = fields[0].split("/")
+        if len(ranks) != 8:
+            raise ValueError(f"FEN board needs 8 ranks: {fields[0]!r}")
+        for r, rank in enumerate(ranks):
+            row = []
+            for ch in rank:
+                if ch.isdigit():
+                    row.extend(["--"] * int(ch))
+                elif ch in "pnbrqkPNBRQK":
+                    row.append(('w' if ch.isupper() else 'b') + ('p' if ch in "pP" else ch.upper()))
+                else:
+                    raise ValueError(f"Bad FEN piece {ch!r}")
+            if len(row) != 8:
+                raise ValueError(f"FEN rank {rank!r} is not 8 squares")
+            self.board[r][:] = row
+        self.WhiteToMove = fields[1] == 'w'
+        castling = fields[2] if len(fields) > 2 else "-"
+        self.WhiteCastleKingside = 'K' in castling
+        self.WhiteCastleQueenside = 'Q' in castling
+        self.BlackCastleKingside = 'k' in castling
+        self.BlackCastleQueenside = 'q' in castling
+        self.EnPassantPossible = ()
+        if len(fields) > 3 and fields[3] != '-':
+            self.EnPassantPossible = (Move.ranks_to_rows[fields[3][1]], Move.files_to_cols[fields[3][0]])
+        self.startHalfmoveClock = int(fields[4]) if len(fields) > 4 and fields[4].isdigit() else 0
+        self.startFullmoveNumber = int(fields[5]) if len(fields) > 5 and fields[5].isdigit() else 1
+        self.sync_from_board()
+
+    def get_fen(self):
+        rows = []
+        for row in self.board:
+            text = ""
+            empty = 0
+            for piece in row:
+                if piece == "--":
+                    empty += 1
+                    continue
+                if empty:
+                    text += str(empty)
+                    empty = 0
+                letter = 'P' if piece[1] == 'p' else piece[1]
+                text += letter if piece[0] == 'w' else letter.lower()
+            rows.append(text + (str(empty) if empty else ""))
+        castling = ("K" * self.WhiteCastleKingside + "Q" * self.WhiteCastleQueenside +
+                    "k" * self.BlackCastleKingside + "q" * self.BlackCastleQueenside) or "-"
+        enPassant = "-"
+        if self.EnPassantPossible != ():
+            r, c = self.EnPassantPossible
+            enPassant = Move.cols_to_files[c] + Move.rows_to_ranks[r]
+        return (f"{'/'.join(rows)} {'w' if self.WhiteToMove else 'b'} {castling} {enPassant} "
+                f"{self.halfmove_clock()} {self.fullmove_number()}")
+
+    def halfmove_clock(self):
+        """
+        Plies since the last capture or pawn move, for the fifty-move rule.
+        """
+        for plies, move in enumerate(reversed(self.moveLog)):
+            if move.isCapture or move.piece_moved[1] == 'p':
+                return plies
+        return self.startHalfmoveClock + len(self.moveLog)
+
+    def fullmove_number(self):
+        whiteStarted = self.WhiteToMove == (len(self.moveLog) % 2 == 0)
+        return self.startFullmoveNumber + (len(self.moveLog) + (not whiteStarted)) // 2
+
+    def castle_bits(self):
+        return (self.WhiteCastleKingside | self.WhiteCastleQueenside << 1 |
+                self.BlackCastleKingside << 2 | self.BlackCastleQueenside << 3)
+
+    def compute_hash(self):
+        """
+        Full Zobrist hash of the position. make_move/undo_move keep self.hash up to date incrementally,
+        so this is only needed after setting up a position by hand.
+        """
+        h = 0
+        for r in range(8):
+            for c in range(8):
+                piece = self.board[r][c]
+                if piece != "--":
+                    h ^= ZOBRIST_PIECES[piece][r * 8 + c]
+        h ^= ZOBRIST_CASTLE[self.castle_bits()]
+        if self.EnPassantPossible != ():
+            h ^= ZOBRIST_EN_PASSANT[self.EnPassantPossible[1]]
+        if not self.WhiteToMove:
+            h ^= ZOBRIST_BLACK_TO_MOVE
+        return h
 
-    def make_move(self, move):
-        print(f"Making move from {move.start_row, move.start_col} to {move.end_row, move.end_col}")
+    def compute_score(self):
+        material = positional = 0
+        for r in range(8):
+            for c in range(8):
+                piece = self.board[r][c]
+                if piece != "--":
+                    material += MATERIAL[piece]
+                    positional += POSITIONAL[piece][r * 8 + c]
+        return material, positional
+
+    def compute_non_pawn_material(self):
+        totals = {'w': 0, 'b': 0}
+        for row in self.board:
+            for piece in row:
+                if piece != "--" and piece[1] != 'p':
+                    totals[piece[0]] += pieceScores[piece[1]]
+        return totals
+
+    def count_pieces(self):
+        return sum(8 - row.count("--") for row in self.board)
+
+    def sum_non_king_squares(self):
+        return sum(sq for sq in range(64) if self.board[sq >> 3][sq & 7][1] not in "-K")
+
+    def push_undo(self, castle):
+        """
+        Records the state make_move and make_null_move change, besides the board, in the next undo slot.
+        castle is castle_bits(), which both callers need anyway.
+        """
+        i = self.undoCount
+        if i == len(self.undoFlags):
+            self.undoHashes.extend(self.undoHashes)
+            self.undoFlags.extend(self.undoFlags)
+            self.undoScores.extend(self.undoScores)
+        self.undoHashes[i] = self.hash
+        self.undoFlags[i] = castle | (self.EnPassantPossible[1] + 1 << 4 if self.EnPassantPossible != () else 0)
+        self.undoScores[2 * i] = self.material
+        self.undoScores[2 * i + 1] = self.positional
+        self.undoCount = i + 1
+
+    def pop_undo(self):
+        """
+        Restores the last undo record. WhiteToMove must already be back to its value at the push, as the en passant
+        rank depends on it.
+        """
+        i = self.undoCount = self.undoCount - 1
+        flags = self.undoFlags[i]
+        (self.WhiteCastleKingside, self.WhiteCastleQueenside,
+         self.BlackCastleKingside, self.BlackCastleQueenside) = CASTLE_RIGHTS[flags & 15]
+        self.EnPassantPossible = EN_PASSANT_SQUARES[self.WhiteToMove][flags >> 4]
+        self.hash = self.undoHashes[i]
+        self.material = self.undoScores[2 * i]
+        self.positional = self.undoScores[2 * i + 1]
+
+    def make_move(self, move, promotion_piece="Q"):
+        castle = self.castle_bits()
+        self.push_undo(castle)
+        h = self.hash ^ ZOBRIST_CASTLE[castle] ^ ZOBRIST_BLACK_TO_MOVE
+        if self.EnPassantPossible != ():
+            h ^= ZOBRIST_EN_PASSANT[self.EnPassantPossible[1]]
+        start = move.move_id >> 6
+        end = move.move_id & 63
+        h ^= ZOBRIST_PIECES[move.piece_moved][start]
+        positional = self.positional - POSITIONAL[move.piece_moved][start]
+        material = self.material
+        if move.piece_moved[1] != 'K':
+            self.nonKingSquareSum += end - start
+        if move.piece_captured != "--":
+            captured_sq = move.start_row * 8 + move.end_col if move.EnPassant else end
+            h ^= ZOBRIST_PIECES[move.piece_captured][captured_sq]
+            material -= MATERIAL[move.piece_captured]
+            positional -= POSITIONAL[move.piece_captured][captured_sq]
+            self.pieceCount -= 1
+            self.nonKingSquareSum -= captured_sq
+            if move.piece_captured[1] != 'p':
+                self.nonPawnMaterial[move.piece_captured[0]] -= pieceScores[move.piece_captured[1]]
         self.board[move.end_row][move.end_col] = move.piece_moved
         self.board[move.start_row][move.start_col] = "--"
         self.moveLog.append(move)
         self.WhiteToMove = not self.WhiteToMove
         if move.piece_moved == "wK":
-            self.WhiteKingLocation = (move.end_row, move.end_col)
+            self.WhiteKingLocation = SQUARES[end]
             self.WhiteCastleKingside = False
             self.WhiteCastleQueenside = False
         elif move.piece_moved == "bK":
-            self.BlackKingLocation = (move.end_row, move.end_col)
+            self.BlackKingLocation = SQUARES[end]
             self.BlackCastleKingside = False
             self.BlackCastleQueenside = False
 
         # En Passant
         if move.piece_moved[1] == 'p' and abs(move.start_row - move.end_row) == 2:
-            self.EnPassantPossible = ((move.end_row + move.start_row) // 2, move.end_col)
+            self.EnPassantPossible = SQUARES[(start + end) // 2]
         else:
             self.EnPassantPossible = ()
         if move.EnPassant:
@@ -65,60 +428,96 @@ class GameState:
 
         # Pawn promotion
         if move.pawn_promotion:
-            promoted_piece = "Q"
-            self.board[move.end_row][move.end_col] = move.piece_moved[0] + promoted_piece
+            self.board[move.end_row][move.end_col] = move.piece_moved[0] + promotion_piece
+        placed_piece = self.board[move.end_row][move.end_col]
+        h ^= ZOBRIST_PIECES[placed_piece][end]
+        positional += POSITIONAL[placed_piece][end]
+        if placed_piece != move.piece_moved:
+            material += MATERIAL[placed_piece] - MATERIAL[move.piece_moved]
+            self.nonPawnMaterial[placed_piece[0]] += pieceScores[placed_piece[1]]
 
         # Castling rights
-        self.CastleRightsLog.append(CastleRights(self.WhiteCastleKingside, self.BlackCastleKingside,
-                                                 self.WhiteCastleQueenside, self.BlackCastleQueenside))
         if move.castle:
-            print("Castling move detected!")
             if move.end_col - move.start_col == 2:
-                print(f"Kingside castling: Moving rook from (7) to ({move.end_col - 1})")
                 self.board[move.end_row][move.end_col - 1] = self.board[move.end_row][7]  # Move rook
                 self.board[move.end_row][7] = '--'
+                rook = self.board[move.end_row][move.end_col - 1]
+                h ^= ZOBRIST_PIECES[rook][move.end_row * 8 + 7] ^ ZOBRIST_PIECES[rook][end - 1]
+                positional += POSITIONAL[rook][end - 1] - POSITIONAL[rook][move.end_row * 8 + 7]
+                self.nonKingSquareSum -= 2
 
             elif move.start_col - move.end_col == 2:
-                print(f"Queenside castling: Moving rook from (0) to ({move.end_col + 1})")
                 self.board[move.end_row][move.end_col + 1] = self.board[move.end_row][0]
                 self.board[move.end_row][0] = '--'
+                rook = self.board[move.end_row][move.end_col + 1]
+                h ^= ZOBRIST_PIECES[rook][move.end_row * 8] ^ ZOBRIST_PIECES[rook][end + 1]
+                positional += POSITIONAL[rook][end + 1] - POSITIONAL[rook][move.end_row * 8]
+                self.nonKingSquareSum += 3
         self.updateCastleRights(move)
 
-        self.EnPassantPossibleLog.append(self.EnPassantPossible)
+        h ^= ZOBRIST_CASTLE[self.castle_bits()]
+        if self.EnPassantPossible != ():
+            h ^= ZOBRIST_EN_PASSANT[self.EnPassantPossible[1]]
+        self.hash = h
+        self.material = material
+        self.positional = positional
+
+    def make_null_move(self):
+        """
+        Passes the turn without moving, for null-move pruning. Null moves are not put in moveLog; take one back
+        with undo_null_move before undoing any real move.
+        """
+        self.push_undo(self.castle_bits())
+        h = self.hash ^ ZOBRIST_BLACK_TO_MOVE
+        if self.EnPassantPossible != ():
+            h ^= ZOBRIST_EN_PASSANT[self.EnPassantPossible[1]]
+        self.EnPassantPossible = ()
+        self.WhiteToMove = not self.WhiteToMove
+        self.hash = h
+
+    def undo_null_move(self):
+        self.WhiteToMove = not self.WhiteToMove
+        self.pop_undo()
+        self.checkMate = False
+        self.staleMate = False
 
     def undo_move(self):
         if len(self.moveLog) != 0:
             move = self.moveLog.pop()
+            placed_piece = self.board[move.end_row][move.end_col]
+            if placed_piece != move.piece_moved:
+                self.nonPawnMaterial[placed_piece[0]] -= pieceScores[placed_piece[1]]
+            if move.piece_moved[1] != 'K':
+                self.nonKingSquareSum -= (move.move_id & 63) - (move.move_id >> 6)
+            if move.piece_captured != "--":
+                self.pieceCount += 1
+                self.nonKingSquareSum += move.start_row * 8 + move.end_col if move.EnPassant else move.move_id & 63
+                if move.piece_captured[1] != 'p':
+                    self.nonPawnMaterial[move.piece_captured[0]] += pieceScores[move.piece_captured[1]]
             self.board[move.start_row][move.start_col] = move.piece_moved
             self.board[move.end_row][move.end_col] = move.piece_captured
             self.WhiteToMove = not self.WhiteToMove
 
             if move.piece_moved == "wK":
-                self.WhiteKingLocation = (move.start_row, move.start_col)
+                self.WhiteKingLocation = SQUARES[move.move_id >> 6]
             elif move.piece_moved == "bK":
-                self.BlackKingLocation = (move.start_row, move.start_col)
+                self.BlackKingLocation = SQUARES[move.move_id >> 6]
 
             if move.EnPassant:
                 self.board[move.end_row][move.end_col] = '--'
                 self.board[move.start_row][move.end_col] = move.piece_captured
 
-            self.EnPassantPossibleLog.pop()
-            self.EnPassantPossible = self.EnPassantPossibleLog[-1]
-
-            self.CastleRightsLog.pop()
-            castleRights = self.CastleRightsLog[-1]
-            self.WhiteCastleKingside = castleRights.wks
-            self.BlackCastleKingside = castleRights.bks
-            self.WhiteCastleQueenside = castleRights.wqs
-            self.BlackCastleQueenside = castleRights.bqs
+            self.pop_undo()
 
             if move.castle:
                 if move.end_col - move.start_col == 2:
                     self.board[move.end_row][move.end_col + 1] = self.board[move.end_row][move.end_col - 1]
                     self.board[move.end_row][move.end_col - 1] = '--'
+                    self.nonKingSquareSum += 2
                 else:
                     self.board[move.end_row][move.end_col - 2] = self.board[move.end_row][move.end_col + 1]
                     self.board[move.end_row][move.end_col + 1] = '--'
+                    self.nonKingSquareSum -= 3
 
             self.checkMate = False
             self.staleMate = False
@@ -133,27 +532,7 @@ class GameState:
             king_row = self.BlackKingLocation[0]
             king_col = self.BlackKingLocation[1]
         if self.inCheck:
-            if len(self.checks) == 1:
-                moves = self.get_all_possible_moves()
-                check = self.checks[0]
-                check_row = check[0]
-                check_col = check[1]
-                piece_checking = self.board[check_row][check_col]
-                valid_squares = []
-                if piece_checking[1] == 'N':
-                    valid_squares = [(check_row, check_col)]
-                else:
-                    for i in range(1, 8):
-                        valid_square = (king_row + check[2] * i, king_col + check[3] * i)
-                        valid_squares.append(valid_square)
-                        if valid_square[0] == check_row and valid_square[1] == check_col:
-                            break
-                for i in range(len(moves) - 1, -1, -1):
-                    if moves[i].piece_moved[1] != 'K':
-                        if not (moves[i].end_row, moves[i].end_col) in valid_squares:
-                            moves.remove(moves[i])
-            else:
-                self.get_king_moves(king_row, king_col, moves)
+            moves = self.get_evasion_moves(king_row, king_col)
         else:
             moves = self.get_all_possible_moves()
 
@@ -167,6 +546,107 @@ class GameState:
             self.staleMate = False
         return moves
 
+    def is_in_check(self):
+        r, c = self.WhiteKingLocation if self.WhiteToMove else self.BlackKingLocation
+        return self.square_under_attack(r, c, 'w' if self.WhiteToMove else 'b')
+
+    def has_any_legal_move(self):
+        """
+        Whether the side to move has a legal move, stopping at the first piece found with one. Sets inCheck,
+        checkMate and staleMate like get_valid_moves, so a leaf can be scored without building the move list.
+        Castling is never needed: a king that may castle can also step onto the square next to it.
+        """
+        self.inCheck, self.pins, self.checks = self.check_for_pins_and_checks()
+        king_row, king_col = self.WhiteKingLocation if self.WhiteToMove else self.BlackKingLocation
+        if self.inCheck:
+            found = len(self.get_evasion_moves(king_row, king_col)) > 0
+        else:
+            found = False
+            ally_color = 'w' if self.WhiteToMove else 'b'
+            moves = []
+            for r in range(8):
+                for c in range(8):
+                    piece = self.board[r][c]
+                    if piece[0] == ally_color and piece[1] != 'K':
+                        self.moveFunctions[piece[1]](r, c, moves)
+                        if moves:
+                            found = True
+                            break
+                if found:
+                    break
+            if not found:
+                # Last, as the king needs the enemy attack map
+                attacked = self.enemy_attacks()
+                found = any(self.board[sq >> 3][sq & 7][0] != ally_color and not attacked[sq]
+                            for sq in KING_TARGETS[king_row * 8 + king_col])
+        self.checkMate = not found and self.inCheck
+        self.staleMate = not found and not self.inCheck
+        return found
+
+    def get_evasion_moves(self, king_row, king_col):
+        """
+        Legal moves out of check: king steps off attacked squares, and against a single checker, captures of it and
+        interpositions on the check line. Each target square is searched backwards for the pieces that can reach
+        it, so no other move is ever generated. Pinned pieces can never resolve a check and are skipped.
+        """
+        moves = []
+        board = self.board
+        ally_color = 'w' if self.WhiteToMove else 'b'
+        enemy_color = 'b' if self.WhiteToMove else 'w'
+        king_sq = king_row * 8 + king_col
+        attacked = self.enemy_attacks()
+        for sq in KING_TARGETS[king_sq]:
+            if board[sq >> 3][sq & 7][0] != ally_color and not attacked[sq]:
+                moves.append(Move((king_row, king_col), (sq >> 3, sq & 7), board))
+        if len(self.checks) > 1:
+            return moves
+        checker_sq = self.checks[0][0] * 8 + self.checks[0][1]
+        pinned = {(pin[0], pin[1]) for pin in self.pins}
+        forward = -8 if self.WhiteToMove else 8
+        last_row = 0 if self.WhiteToMove else 7
+        for target in [checker_sq] + BETWEEN_SQUARES[king_sq][checker_sq]:
+            end = (target >> 3, target & 7)
+            promotion = end[0] == last_row
+            sources = [sq for sq in KNIGHT_TARGETS[target] if board[sq >> 3][sq & 7] == ally_color + 'N']
+            for j, ray in enumerate(RAY_SQUARES[target]):
+                for sq in ray:
+                    piece = board[sq >> 3][sq & 7]
+                    if piece == "--":
+                        continue
+                    if piece[0] == ally_color and (piece[1] == 'Q' or (piece[1] == 'R' and j <= 3) or
+                                                   (piece[1] == 'B' and j >= 4)):
+                        sources.append(sq)
+                    break
+            if target == checker_sq:
+                # Our pawns capture onto a square from where an enemy pawn on it would capture
+                sources += [sq for sq in PAWN_TARGETS[enemy_color][target] if board[sq >> 3][sq & 7] == ally_color + 'p']
+            else:
+                behind = target - forward
+                if 0 <= behind < 64 and board[behind >> 3][behind & 7] == ally_color + 'p':
+                    sources.append(behind)
+                elif 0 <= behind < 64 and board[behind >> 3][behind & 7] == "--" and \
+                        (target >> 3) == (4 if self.WhiteToMove else 3) and \
+                        board[(behind - forward) >> 3][(behind - forward) & 7] == ally_color + 'p':
+                    sources.append(behind - forward)
+            for sq in sources:
+                start = (sq >> 3, sq & 7)
+                if start not in pinned:
+                    moves.append(Move(start, end, board, pawn_promotion=promotion and board[start[0]][start[1]][1] == 'p'))
+        if self.EnPassantPossible != ():
+            ep_sq = self.EnPassantPossible[0] * 8 + self.EnPassantPossible[1]
+            captured_sq = ep_sq - forward
+            # En passant answers the check by removing the checking pawn or by landing on the check line
+            if captured_sq == checker_sq or ep_sq in BETWEEN_SQUARES[king_sq][checker_sq]:
+                for sq in PAWN_TARGETS[enemy_color][ep_sq]:
+                    if board[sq >> 3][sq & 7] == ally_color + 'p' and (sq >> 3, sq & 7) not in pinned:
+                        move = Move((sq >> 3, sq & 7), self.EnPassantPossible, board, EnPassant=True)
+                        self.make_move(move)
+                        legal = not self.square_under_attack(king_row, king_col, ally_color)
+                        self.undo_move()
+                        if legal:
+                            moves.append(move)
+        return moves
+
     def get_all_possible_moves(self):
         moves = []
         for r in range(len(self.board)):
@@ -177,6 +657,228 @@ class GameState:
                     self.moveFunctions[piece](r, c, moves)
         return moves
 
+    def get_capture_moves(self):
+        """
+        Legal captures and promotions only, for the quiescence search. In check every evasion is returned instead.
+        """
+        self.inCheck, self.pins, self.checks = self.check_for_pins_and_checks()
+        if self.inCheck:
+            return self.get_valid_moves()
+        moves = []
+        ally_color = 'w' if self.WhiteToMove else 'b'
+        enemy_color = 'b' if self.WhiteToMove else 'w'
+        pins = {(pin[0], pin[1]): (pin[2], pin[3]) for pin in self.pins}
+        for r in range(8):
+            for c in range(8):
+                piece = self.board[r][c]
+                if piece[0] != ally_color:
+                    continue
+                if piece[1] == 'p':
+                    pawn_moves = []
+                    self.get_pawn_moves(r, c, pawn_moves)
+                    for move in pawn_moves:
+                        if move.piece_captured != '--' or move.pawn_promotion:
+                            moves.append(move)
+                elif piece[1] == 'K':
+                    self.get_king_captures(r, c, enemy_color, moves)
+                elif piece[1] == 'N':
+                    if (r, c) in pins:
+                        continue
+                    for m in KNIGHT_MOVES:
+                        end_row, end_col = r + m[0], c + m[1]
+                        if 0 <= end_row < 8 and 0 <= end_col < 8 and self.board[end_row][end_col][0] == enemy_color:
+                            moves.append(Move((r, c), (end_row, end_col), self.board))
+                else:
+                    pin_direction = pins.get((r, c))
+                    for d in SLIDER_DIRECTIONS[piece[1]]:
+                        if pin_direction is not None and pin_direction != d and pin_direction != (-d[0], -d[1]):
+                            continue
+                        for i in range(1, 8):
+                            end_row, end_col = r + d[0] * i, c + d[1] * i
+                            if not (0 <= end_row < 8 and 0 <= end_col < 8):
+                                break
+                            end_piece = self.board[end_row][end_col]
+                            if end_piece != "--":
+                                if end_piece[0] == enemy_color:
+                                    moves.append(Move((r, c), (end_row, end_col), self.board))
+                                break
+        return moves
+
+    def get_quiet_moves(self):
+        """
+        Moves that neither capture nor promote, the last stage of staged move generation, generated directly
+        rather than filtered out of get_valid_moves. Only used out of check. Pins are respected, but king steps
+        and castling are not tested for attacked squares: king_move_is_legal does that for the ones the search
+        actually tries, so the enemy attack map is never built at a node that cuts off before them.
+        """
+        self.inCheck, self.pins, self.checks = self.check_for_pins_and_checks()
+        moves = []
+        board = self.board
+        ally_color = 'w' if self.WhiteToMove else 'b'
+        forward = -1 if self.WhiteToMove else 1
+        start_row = 6 if self.WhiteToMove else 1
+        last_row = 0 if self.WhiteToMove else 7
+        pins = {(pin[0], pin[1]): (pin[2], pin[3]) for pin in self.pins}
+        for r in range(8):
+            for c in range(8):
+                piece = board[r][c]
+                if piece[0] != ally_color:
+                    continue
+                kind = piece[1]
+                if kind == 'p':
+                    one = r + forward
+                    pin_direction = pins.get((r, c))
+                    if one != last_row and board[one][c] == "--" and (pin_direction is None or pin_direction[1] == 0):
+                        moves.append(Move((r, c), (one, c), board))
+                        if r == start_row and board[one + forward][c] == "--":
+                            moves.append(Move((r, c), (one + forward, c), board))
+                elif kind == 'N':
+                    if (r, c) not in pins:
+                        for sq in KNIGHT_TARGETS[r * 8 + c]:
+                            if board[sq >> 3][sq & 7] == "--":
+                                moves.append(Move((r, c), SQUARES[sq], board))
+                elif kind == 'K':
+                    for sq in KING_TARGETS[r * 8 + c]:
+                        if board[sq >> 3][sq & 7] == "--":
+                            moves.append(Move((r, c), SQUARES[sq], board))
+                    kingside, queenside = (self.WhiteCastleKingside, self.WhiteCastleQueenside) if self.WhiteToMove \
+                        else (self.BlackCastleKingside, self.BlackCastleQueenside)
+                    if kingside and board[r][7] == ally_color + 'R' and board[r][c + 1] == board[r][c + 2] == "--":
+                        moves.append(Move((r, c), (r, c + 2), board, castle=True))
+                    if queenside and board[r][0] == ally_color + 'R' and \
+                            board[r][c - 1] == board[r][c - 2] == board[r][c - 3] == "--":
+                        moves.append(Move((r, c), (r, c - 2), board, castle=True))
+                else:
+                    pin_direction = pins.get((r, c))
+                    rays = RAY_SQUARES[r * 8 + c]
+                    for j in SLIDER_DIRECTION_INDICES[kind]:
+                        d = KING_DIRECTIONS[j]
+                        if pin_direction is not None and pin_direction != d and pin_direction != (-d[0], -d[1]):
+                            continue
+                        for sq in rays[j]:
+                            if board[sq >> 3][sq & 7] != "--":
+                                break
+                            moves.append(Move((r, c), SQUARES[sq], board))
+        return moves
+
+    def king_move_is_legal(self, move):
+        """
+        Whether a king step or castle from get_quiet_moves is legal: the square the king lands on, and for castling
+        the square it passes, must not be attacked. They are tested with the king lifted off the board so it
+        cannot hide from a slider behind itself.
+        """
+        board = self.board
+        r, c = move.start_row, move.start_col
+        ally_color = move.piece_moved[0]
+        board[r][c] = "--"
+        try:
+            if move.castle:
+                step = 1 if move.end_col > c else -1
+                return not self.square_under_attack(r, c + step, ally_color) and \
+                    not self.square_under_attack(r, c + 2 * step, ally_color)
+            return not self.square_under_attack(move.end_row, move.end_col, ally_color)
+        finally:
+            board[r][c] = move.piece_moved
+
+    def count_legal_moves(self):
+        """
+        len(get_valid_moves()), for search statistics. Backends may count without building the moves.
+        """
+        return len(self.get_valid_moves())
+
+    def legal_move_from_id(self, move_id):
+        """
+        The legal move with this move_id (a hash or killer move), or None. Only this one move is checked, so it can
+        be searched before any moves are generated. Castling and en passant are left to the generators.
+        """
+        r, c = divmod(move_id >> 6, 8)
+        end_row, end_col = divmod(move_id & 63, 8)
+        piece = self.board[r][c]
+        target = self.board[end_row][end_col]
+        ally_color = 'w' if self.WhiteToMove else 'b'
+        if piece[0] != ally_color or target[0] == ally_color:
+            return None
+        dr, dc = end_row - r, end_col - c
+        if piece[1] == 'p':
+            forward = -1 if self.WhiteToMove else 1
+            if target != "--":
+                if dr != forward or abs(dc) != 1:
+                    return None
+            elif dc != 0:
+                return None
+            elif dr == 2 * forward:
+                if r != (6 if self.WhiteToMove else 1) or self.board[r + forward][c] != "--":
+                    return None
+            elif dr != forward:
+                return None
+        elif piece[1] == 'N':
+            if (dr, dc) not in KNIGHT_MOVES:
+                return None
+        elif piece[1] == 'K':
+            if max(abs(dr), abs(dc)) != 1:
+                return None
+        else:
+            d = ((dr > 0) - (dr < 0), (dc > 0) - (dc < 0))
+            if d not in SLIDER_DIRECTIONS[piece[1]] or (dr and dc and abs(dr) != abs(dc)):
+                return None
+            for i in range(1, max(abs(dr), abs(dc))):
+                if self.board[r + d[0] * i][c + d[1] * i] != "--":
+                    return None
+        move = Move((r, c), (end_row, end_col), self.board, pawn_promotion=piece[1] == 'p' and end_row in (0, 7))
+        self.make_move(move)
+        king_row, king_col = self.BlackKingLocation if self.WhiteToMove else self.WhiteKingLocation
+        legal = not self.square_under_attack(king_row, king_col, ally_color)
+        self.undo_move()
+        return move if legal else None
+
+    def get_king_captures(self, r, c, enemy_color, moves):
+        attacked = self.enemy_attacks()
+        for sq in KING_TARGETS[r * 8 + c]:
+            if self.board[sq >> 3][sq & 7][0] == enemy_color and not attacked[sq]:
+                moves.append(Move((r, c), (sq >> 3, sq & 7), self.board))
+
+    def attack_map(self, color, transparent=-1):
+        """
+        bytearray of the 64 squares, 1 where a piece of color attacks. Sliders see through the square transparent,
+        which is how the moving king is lifted off the board so it cannot hide from a check along the line.
+        """
+        attacked = bytearray(64)
+        board = self.board
+        for sq in range(64):
+            piece = board[sq >> 3][sq & 7]
+            if piece[0] != color:
+                continue
+            kind = piece[1]
+            if kind == 'p':
+                targets = PAWN_TARGETS[color][sq]
+            elif kind == 'N':
+                targets = KNIGHT_TARGETS[sq]
+            elif kind == 'K':
+                targets = KING_TARGETS[sq]
+            else:
+                rays = RAY_SQUARES[sq]
+                for j in SLIDER_DIRECTION_INDICES[kind]:
+                    for target in rays[j]:
+                        attacked[target] = 1
+                        if target != transparent and board[target >> 3][target & 7] != "--":
+                            break
+                continue
+            for target in targets:
+                attacked[target] = 1
+        return attacked
+
+    def enemy_attacks(self):
+        """
+        The opponent's attack map with the side to move's king lifted off the board, computed once per position
+        and shared by king moves, king captures and castling.
+        """
+        key = (self.hash, len(self.moveLog))
+        if self.attackMapKey != key:
+            king_row, king_col = self.WhiteKingLocation if self.WhiteToMove else self.BlackKingLocation
+            self.attackMap = self.attack_map('b' if self.WhiteToMove else 'w', king_row * 8 + king_col)
+            self.attackMapKey = key
+        return self.attackMap
+
     def get_pawn_moves(self, r, c, moves):
         piece_pinned = False
         pin_direction = ()
@@ -202,7 +904,7 @@ class GameState:
         pawn_promotion = False
 
         if self.board[r + moveAmount][c] == "--":
-            if not piece_pinned or pin_direction == (moveAmount, 0):
+            if not piece_pinned or pin_direction in ((moveAmount, 0), (-moveAmount, 0)):
                 if r + moveAmount == backRow:
                     pawn_promotion = True
                 moves.append(Move((r, c), (r + moveAmount, c), self.board, pawn_promotion=pawn_promotion))
@@ -210,7 +912,7 @@ class GameState:
                     moves.append(Move((r, c), (r + 2 * moveAmount, c), self.board))
 
         if c - 1 >= 0:
-            if not piece_pinned or pin_direction == (moveAmount, -1):
+            if not piece_pinned or pin_direction in ((moveAmount, -1), (-moveAmount, 1)):
                 if self.board[r + moveAmount][c - 1][0] == enemyColor:
                     if r + moveAmount == backRow:
                         pawn_promotion = True
@@ -231,13 +933,15 @@ class GameState:
                             square = self.board[r][i]
                             if square[0] == enemyColor and (square[1] == 'R' or square[1] == 'Q'):
                                 attackingPiece = True
+                                break
                             elif square != '--':
                                 blockingPiece = True
+                                break
                     if not attackingPiece or blockingPiece:
                         moves.append(Move((r, c), (r + moveAmount, c - 1), self.board, EnPassant=True))
 
         if c + 1 <= 7:
-            if not piece_pinned or pin_direction == (moveAmount, 1):
+            if not piece_pinned or pin_direction in ((moveAmount, 1), (-moveAmount, -1)):
                 if self.board[r + moveAmount][c + 1][0] == enemyColor:
                     if r + moveAmount == backRow:
                         pawn_promotion = True
@@ -256,12 +960,14 @@ class GameState:
                                 blockingPiece = True
                         for i in outsideRange:
                             square = self.board[r][i]
-                            if square[0] == enemyColor and (square[i] == 'R' or square[1] == 'Q'):
+                            if square[0] == enemyColor and (square[1] == 'R' or square[1] == 'Q'):
                                 attackingPiece = True
+                                break
                             elif square != '--':
                                 blockingPiece = True
+                                break
                     if not attackingPiece or blockingPiece:
-                        moves.append(Move((r, c), (r + moveAmount, c - 1), self.board, EnPassant=True))
+                        moves.append(Move((r, c), (r + moveAmount, c + 1), self.board, EnPassant=True))
 
     def get_rook_moves(self, r, c, moves):
         piece_pinned = False
@@ -343,31 +1049,15 @@ class GameState:
         self.get_bishop_moves(r, c, moves)
 
     def get_king_moves(self, r, c, moves):
-        row_moves = (-1, -1, -1, 0, 0, 1, 1, 1)
-        col_moves = (-1, 0, 1, -1, 1, -1, 0, 1)
         ally_color = "w" if self.WhiteToMove else "b"
-        for i in range(8):
-            end_row = r + row_moves[i]
-            end_col = c + col_moves[i]
-            if 0 <= end_row < 8 and 0 <= end_col < 8:
-                end_piece = self.board[end_row][end_col]
-                if end_piece[0] != ally_color:
-                    if ally_color == 'w':
-                        self.WhiteKingLocation = (end_row, end_col)
-                    else:
-                        self.BlackKingLocation = (end_row, end_col)
-                    inCheck, pins, checks = self.check_for_pins_and_checks()
-                    if not inCheck:
-                        moves.append(Move((r, c), (end_row, end_col), self.board))
-                    if ally_color == 'w':
-                        self.WhiteKingLocation = (r, c)
-                    else:
-                        self.BlackKingLocation = (r, c)
+        attacked = self.enemy_attacks()
+        for sq in KING_TARGETS[r * 8 + c]:
+            if self.board[sq >> 3][sq & 7][0] != ally_color and not attacked[sq]:
+                moves.append(Move((r, c), (sq >> 3, sq & 7), self.board))
         self.get_castle_moves(r, c, moves, ally_color)
 
     def get_castle_moves(self, r, c, moves, allyColor):
-        inCheck = self.square_under_attack(r, c, allyColor)
-        if inCheck:
+        if self.enemy_attacks()[r * 8 + c]:
             return
         if self.WhiteToMove and self.WhiteCastleKingside:
             if self.board[r][7] == 'wR':  # Ensure the rook is still on its initial square
@@ -384,58 +1074,41 @@ class GameState:
                 self.get_queenside_castle_moves(r, c, moves, allyColor)
 
     def get_kingside_castle_moves(self, r, c, moves, allyColor):
+        attacked = self.enemy_attacks()
         if self.board[r][c + 1] == '--' and self.board[r][c + 2] == '--' and \
-                not self.square_under_attack(r, c + 1, allyColor) and not self.square_under_attack(r, c + 2, allyColor):
+                not attacked[r * 8 + c + 1] and not attacked[r * 8 + c + 2]:
             moves.append(Move((r, c), (r, c + 2), self.board, castle=True))
 
     def get_queenside_castle_moves(self, r, c, moves, allyColor):
+        attacked = self.enemy_attacks()
         if self.board[r][c - 1] == '--' and self.board[r][c - 2] == '--' and self.board[r][c - 3] == '--':
-            if not self.square_under_attack(r, c - 1, allyColor) and not self.square_under_attack(r, c - 2, allyColor):
+            if not attacked[r * 8 + c - 1] and not attacked[r * 8 + c - 2]:
                 moves.append(Move((r, c), (r, c - 2), self.board, castle=True))
 
     def square_under_attack(self, r, c, allyColor):
         enemyColor = 'w' if allyColor == 'b' else 'b'
-        directions = ((-1, 0), (0, -1), (1, 0), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1))
-        for j in range(len(directions)):
-            d = directions[j]
-            for i in range(1, 8):
-                end_row = r + d[0] * i
-                end_col = c + d[1] * i
-                if 0 <= end_row < 8 and 0 <= end_col < 8:
-                    endPiece = self.board[end_row][end_col]
-                    if endPiece[0] == allyColor:
-                        break
-                    elif endPiece[0] == enemyColor:
-                        type = endPiece[1]
-                        if (0 <= i <= 3 and type == 'R') or \
-                                (4 <= j <= 7 and type == 'B') or \
-                                (i == 1 and type == 'p' and (
-                                        (enemyColor == 'w' and 6 <= j <= 7) or (enemyColor == 'b' and 4 <= j <= 5))) or \
-                                (type == 'Q') or (i == 1 and type == 'K'):
-                            return True
-                        else:
-                            break
-                else:
-                    break
-
-        pawn_directions = ((-1, -1), (-1, 1)) if enemyColor == 'w' else ((1, -1), (1, 1))
-        for d in pawn_directions:
-            end_row = r + d[0]
-            end_col = c + d[1]
-            if 0 <= end_row < 8 and 0 <= end_col < 8:  # Ensure square is on the board
-                endPiece = self.board[end_row][end_col]
-                if endPiece[0] == enemyColor and endPiece[1] == 'p':  # Enemy pawn attacking
-                    return True
-
-        knightMoves = ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1))
-        for m in knightMoves:
-            end_row = r + m[0]
-            end_col = c + m[1]
-            if 0 <= end_row < 8 and 0 <= end_col < 8:
-                endPiece = self.board[end_row][end_col]
-                if endPiece[0] == enemyColor and endPiece[1] == 'N':
-                    return True
-
+        board = self.board
+        sq = r * 8 + c
+        for j, ray in enumerate(RAY_SQUARES[sq]):
+            for target in ray:
+                endPiece = board[target >> 3][target & 7]
+                if endPiece == "--":
+                    continue
+                if endPiece[0] == enemyColor:
+                    type = endPiece[1]
+                    if type == 'Q' or (type == 'R' and j <= 3) or (type == 'B' and j >= 4):
+                        return True
+                break
+        for target in KING_TARGETS[sq]:
+            if board[target >> 3][target & 7] == enemyColor + 'K':
+                return True
+        # A square is attacked by an enemy pawn standing where one of our pawns on it could capture
+        for target in PAWN_TARGETS[allyColor][sq]:
+            if board[target >> 3][target & 7] == enemyColor + 'p':
+                return True
+        for target in KNIGHT_TARGETS[sq]:
+            if board[target >> 3][target & 7] == enemyColor + 'N':
+                return True
         return False
 
     def check_for_pins_and_checks(self):
@@ -445,55 +1118,43 @@ class GameState:
         if self.WhiteToMove:
             enemy_color = "b"
             ally_color = "w"
-            start_row = self.WhiteKingLocation[0]
-            start_col = self.WhiteKingLocation[1]
+            start_row, start_col = self.WhiteKingLocation
         else:
             enemy_color = "w"
             ally_color = "b"
-            start_row = self.BlackKingLocation[0]
-            start_col = self.BlackKingLocation[1]
-
-        directions = ((-1, 0), (0, -1), (1, 0), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1))
-        for j in range(len(directions)):
-            d = directions[j]
+            start_row, start_col = self.BlackKingLocation
+        board = self.board
+        king_sq = start_row * 8 + start_col
+        for j, ray in enumerate(RAY_SQUARES[king_sq]):
+            d = KING_DIRECTIONS[j]
             possible_pin = ()
-            for i in range(1, 8):
-                end_row = start_row + d[0] * i
-                end_col = start_col + d[1] * i
-                if 0 <= end_row < 8 and 0 <= end_col < 8:
-                    end_piece = self.board[end_row][end_col]
-                    if end_piece[0] == ally_color and end_piece[1] != 'K':
+            for target in ray:
+                end_piece = board[target >> 3][target & 7]
+                if end_piece == "--":
+                    continue
+                if end_piece[0] == ally_color and end_piece[1] != 'K':
+                    if possible_pin == ():
+                        possible_pin = (target >> 3, target & 7, d[0], d[1])
+                        continue
+                    break
+                if end_piece[0] == enemy_color:
+                    type = end_piece[1]
+                    if type == 'Q' or (type == 'R' and j <= 3) or (type == 'B' and j >= 4):
                         if possible_pin == ():
-                            possible_pin = (end_row, end_col, d[0], d[1])
+                            inCheck = True
+                            checks.append((target >> 3, target & 7, d[0], d[1]))
                         else:
-                            break
-                    elif end_piece[0] == enemy_color:
-                        type = end_piece[1]
-                        if (0 <= j <= 3 and type == 'R') or \
-                                (4 <= j <= 7 and type == 'B') or \
-                                (i == 1 and type == 'p' and ((enemy_color == 'w' and 6 <= j <= 7) or (
-                                        enemy_color == 'b' and 4 <= j <= 5))) or \
-                                (type == 'Q') or (i == 1 and type == 'K'):
-                            if possible_pin == ():
-                                inCheck = True
-                                checks.append((end_row, end_col, d[0], d[1]))
-                                break
-                            else:
-                                pins.append(possible_pin)
-                                break
-                        else:
-                            break
-                else:
-                    break
-        knight_moves = ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1))
-        for m in knight_moves:
-            end_row = start_row + m[0]
-            end_col = start_col + m[1]
-            if 0 <= end_row < 8 and 0 <= end_col < 8:
-                end_piece = self.board[end_row][end_col]
-                if end_piece[0] == enemy_color and end_piece[1] == 'N':
-                    inCheck = True
-                    checks.append((end_row, end_col, m[0], m[1]))
+                            pins.append(possible_pin)
+                break
+        # Pawns, knights and kings only attack from one step away and are never blocked
+        for target in PAWN_TARGETS[ally_color][king_sq]:
+            if board[target >> 3][target & 7] == enemy_color + 'p':
+                inCheck = True
+                checks.append((target >> 3, target & 7, (target >> 3) - start_row, (target & 7) - start_col))
+        for target in KNIGHT_TARGETS[king_sq]:
+            if board[target >> 3][target & 7] == enemy_color + 'N':
+                inCheck = True
+                checks.append((target >> 3, target & 7, (target >> 3) - start_row, (target & 7) - start_col))
         return inCheck, pins, checks
 
     def updateCastleRights(self, move):
@@ -529,16 +1190,69 @@ class GameState:
                 elif move.end_col == 7:
                     self.BlackCastleKingside = False
 
+    def parse_move(self, text):
+        """
+        Finds the legal move written as text, in SAN ("Nf3", "exd5", "O-O", "e8=Q+") or coordinates ("g1f3"),
+        or returns None. Promotions always match, the engine only promotes to a queen.
+        """
+        text = text.rstrip("+#!?").replace("0", "O")
+        moves = self.get_valid_moves()
+        if text in ("O-O", "O-O-O"):
+            return next((move for move in moves if move.castle and (move.end_col == 6) == (text == "O-O")), None)
+        if len(text) in (4, 5) and text[0] in "abcdefgh" and text[2] in "abcdefgh" and text[1].isdigit():
+            return next((move for move in moves if move.get_chess_notation() == text[:4]), None)
+        text = text.split("=")[0].replace("x", "")
+        if len(text) < 2 or text[-2] not in Move.files_to_cols or text[-1] not in Move.ranks_to_rows:
+            return None
+        piece = text[0] if text[0] in "NBRQK" else "p"
+        qualifier = text[1:-2] if piece != "p" else text[:-2]
+        end = (Move.ranks_to_rows[text[-1]], Move.files_to_cols[text[-2]])
+        for move in moves:
+            if move.piece_moved[1] != piece or (move.end_row, move.end_col) != end:
+                continue
+            square = move.get_rank_file(move.start_row, move.start_col)
+            if all(ch in square for ch in qualifier):
+                return move
+        return None
 
-class CastleRights:
-    def __init__(self, wks, bks, wqs, bqs):
-        self.wks = wks
-        self.bks = bks
-        self.wqs = wqs
-        self.bqs = bqs
+    def move_to_san(self, move):
+        """
+        The legal move in SAN, with disambiguation and check marks; the inverse of parse_move.
+        """
+        if move.castle:
+            text = "O-O" if move.end_col == 6 else "O-O-O"
+        else:
+            target = move.get_rank_file(move.end_row, move.end_col)
+            piece = move.piece_moved[1]
+            if piece == "p":
+                text = (move.cols_to_files[move.start_col] + "x" if move.isCapture else "") + target
+                if move.pawn_promotion:
+                    text += "=Q"
+            else:
+                rivals = [other for other in self.get_valid_moves() if other.piece_moved == move.piece_moved and
+                          other.move_id & 63 == move.move_id & 63 and other != move]
+                qualifier = ""
+                if rivals:
+                    if all(other.start_col != move.start_col for other in rivals):
+                        qualifier = move.cols_to_files[move.start_col]
+                    elif all(other.start_row != move.start_row for other in rivals):
+                        qualifier = move.rows_to_ranks[move.start_row]
+                    else:
+                        qualifier = move.get_rank_file(move.start_row, move.start_col)
+                text = piece + qualifier + ("x" if move.isCapture else "") + target
+        self.make_move(move)
+        replies = self.get_valid_moves()
+        if self.inCheck:
+            text += "#" if not replies else "+"
+        self.undo_move()
+        return text
 
 
 class Move:
+    # Moves are created by the thousand in the search, so no per-instance __dict__
+    __slots__ = ("start_row", "start_col", "end_row", "end_col", "piece_moved", "piece_captured", "move_id",
+                 "pawn_promotion", "castle", "isCapture", "EnPassant")
+
     ranks_to_rows = {"1": 7, "2": 6, "3": 5, "4": 4,
                      "5": 3, "6": 2, "7": 1, "8": 0}
     rows_to_ranks = {v: k for k, v in ranks_to_rows.items()}
@@ -547,26 +1261,45 @@ class Move:
     cols_to_files = {v: k for k, v in files_to_cols.items()}
 
     def __init__(self, start_sq, end_sq, board, EnPassant=False, pawn_promotion=False, castle=False):
-        self.start_row = start_sq[0]
-        self.start_col = start_sq[1]
-        self.end_row = end_sq[0]
-        self.end_col = end_sq[1]
-        self.piece_moved = board[self.start_row][self.start_col]
-        self.piece_captured = board[self.end_row][self.end_col]
-        self.move_id = self.start_row * 1000 + self.start_col * 100 + self.end_row * 10 + self.end_col
+        start_row, start_col = start_sq
+        end_row, end_col = end_sq
+        self.start_row = start_row
+        self.start_col = start_col
+        self.end_row = end_row
+        self.end_col = end_col
+        self.piece_moved = board[start_row][start_col]
+        if EnPassant:
+            self.piece_captured = 'wp' if self.piece_moved == 'bp' else 'bp'
+        else:
+            self.piece_captured = board[end_row][end_col]
+        # From square in bits 6-11, to square in bits 0-5
+        self.move_id = (start_row * 8 + start_col) << 6 | end_row * 8 + end_col
         self.pawn_promotion = pawn_promotion
         self.castle = castle
         self.isCapture = self.piece_captured != '--'
         self.EnPassant = EnPassant
-        if EnPassant:
-            self.piece_captured = 'wp' if self.piece_moved == 'bp' else 'bp'
-        print(self.move_id)
 
     def __eq__(self, other):
         if isinstance(other, Move):
             return self.move_id == other.move_id
         return False
 
+    def __hash__(self):
+        return self.move_id
+
+    @property
+    def packed(self):
+        """
+        The move as one 15-bit int: move_id plus en passant, promotion and castle flags in bits 12-14.
+        """
+        return self.move_id | (self.EnPassant | self.pawn_promotion << 1 | self.castle << 2) << 12
+
+    @classmethod
+    def from_packed(cls, packed, board):
+        start, end = (packed >> 6) & 63, packed & 63
+        return cls(divmod(start, 8), divmod(end, 8), board, EnPassant=bool(packed & 0x1000),
+                   pawn_promotion=bool(packed & 0x2000), castle=bool(packed & 0x4000))
+
     """
     Generate proper chess notation for the move.
     Includes:
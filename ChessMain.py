@@ -3,8 +3,7 @@ Main driver file responsible for handling user input and displaying the current
 """
 
 import pygame as p
-from Chess import ChessEngine, SmartMoveFinder
-from multiprocessing import Process, Queue
+from Chess import ChessEngine, SmartMoveFinder, BitboardEngine, EngineWorker
 
 BOARD_WIDTH = BOARD_HEIGHT = 512
 MOVE_LOG_PANEL_WIDTH = 200
@@ -13,8 +12,7 @@ DIMENSION = 8
 SQ_SIZE = BOARD_HEIGHT // DIMENSION
 MAX_FPS = 15
 IMAGES = {}
-
-returnQueue = Queue()
+USE_BITBOARDS = True  # Bitboard move generation; set False for the plain 2D-list GameState
 
 """
 Global dictionary of images to be called once in main.py
@@ -27,19 +25,26 @@ def load_images():
         IMAGES[piece] = p.transform.scale(p.image.load("images/" + piece + ".png"), size=(SQ_SIZE, SQ_SIZE))
 
 
+def game_state_class():
+    return BitboardEngine.BitboardGameState if USE_BITBOARDS else ChessEngine.GameState
+
+
+def new_game_state():
+    return game_state_class()()
+
+
 """
 User input and updating graphics
 """
 
 
 def main():
-    global returnQueue
     p.init()
     screen = p.display.set_mode((BOARD_WIDTH + MOVE_LOG_PANEL_WIDTH, BOARD_HEIGHT))
     clock = p.time.Clock()
     screen.fill(p.Color("white"))
     moveLogFont = p.font.SysFont("Arial", 14, True, False)
-    gs = ChessEngine.GameState()
+    gs = new_game_state()
     valid_moves = gs.get_valid_moves()
     move_made = False
     animate = False
@@ -51,7 +56,7 @@ def main():
     playerOne = True
     playerTwo = False
     AIThinking = False
-    moveFinderProcess = None
+    engine = EngineWorker.EngineWorker(game_state_class())
     moveUndone = False
 
     while running:
@@ -93,41 +98,42 @@ def main():
                     game_over = False
                     move_made = True
                     animate = False
-                    if AIThinking:
-                        moveFinderProcess.terminate()
-                        AIThinking = False
+                    engine.stop()  # also ends pondering
+                    AIThinking = False
                     moveUndone = True
 
                 if e.key == p.K_r:
-                    gs = ChessEngine.GameState()
+                    gs = new_game_state()
                     valid_moves = gs.get_valid_moves()
                     sq_selected = ()
                     player_clicks = []
                     move_made = False
                     animate = False
                     game_over = False
-                    if AIThinking:
-                        moveFinderProcess.terminate()
-                        AIThinking = False
+                    engine.stop()
+                    AIThinking = False
                     moveUndone = True
 
         if not game_over and not humanTurn and not moveUndone:
             if not AIThinking:
                 AIThinking = True
                 print("Thinking..")
-                returnQueue = Queue()
-                moveFinderProcess = Process(target=SmartMoveFinder.findBestMoveMinMax, args=(gs, valid_moves, returnQueue))
-                moveFinderProcess.start()
+                engine.start_search(gs)
 
-            if not moveFinderProcess.is_alive():
+            packedMove = engine.poll()
+            if packedMove is not None:
                 print("Done thinking")
-                AIMove = returnQueue.get()
+                AIMove = None
+                for valid_move in valid_moves:
+                    if valid_move.packed == packedMove:
+                        AIMove = valid_move
                 if AIMove is None:
                     AIMove = SmartMoveFinder.findRandomMove(valid_moves)
                 gs.make_move(AIMove)
                 move_made = True
                 animate = True
                 AIThinking = False
+                engine.start_ponder(gs)
 
         if move_made:
             if animate:
@@ -152,6 +158,8 @@ def main():
         clock.tick(MAX_FPS)
         p.display.flip()
 
+    engine.close()
+
 
 def highlight_squares(screen, gs, valid_moves, sq_selected):
     if sq_selected != ():
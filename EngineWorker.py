@@ -0,0 +1,198 @@
+"""
+Long-lived engine process. The UI keeps one EngineWorker for the whole session instead of starting a process per
+AI move, so SmartMoveFinder's transposition table and move ordering tables stay warm between moves.
+The worker holds its own copy of the game; the UI keeps it in step by sending only the moves that changed, as
+packed ints. Searches are stopped cooperatively through a shared search id rather than by killing the process.
+With more than one search thread the worker runs Lazy SMP and starts the helper processes itself, so it is not a
+daemon: close() shuts it down, and is registered to run at exit in case the UI never calls it.
+
+While the human thinks, the worker ponders: it plays the reply its last search expected and searches the position
+after it. If the human plays that move the running search simply carries on as the real one (or its finished
+result is used at once); any other move stops it and a normal search starts.
+"""
+
+import atexit
+import random
+from multiprocessing import Pipe, Process, Value
+
+from Chess import ChessEngine, SmartMoveFinder, OpeningBook, LazySMP
+
+NO_MOVE = -1
+
+
+def search(gs, searchId, activeSearch, maxDepth, timeLimit, nodeLimit, book=None, threads=1):
+    """
+    Returns the packed best move and the packed reply the search expects to it. Book moves are played without
+    searching and expect no reply. With threads above 1 the search runs as Lazy SMP.
+    """
+    if book is not None:
+        move = book.pick(gs)
+        if move is not None:
+            return move.packed, NO_MOVE
+    valid_moves = gs.get_valid_moves()
+    random.shuffle(valid_moves)
+    maxDepth = SmartMoveFinder.DEPTH if maxDepth is None else maxDepth
+    timeLimit = SmartMoveFinder.SEARCH_TIME_LIMIT if timeLimit is None else timeLimit
+    nodeLimit = SmartMoveFinder.SEARCH_NODE_LIMIT if nodeLimit is None else nodeLimit
+
+    def shouldStop():
+        return activeSearch.value != searchId
+
+    if threads > 1:
+        move = LazySMP.findBestMoveLazySMP(gs, valid_moves, threads, maxDepth, timeLimit, nodeLimit,
+                                           shouldStop=shouldStop)
+    else:
+        move = SmartMoveFinder.findBestMoveIterative(gs, valid_moves, maxDepth, timeLimit, nodeLimit,
+                                                     shouldStop=shouldStop)
+    if move is None:
+        return NO_MOVE, NO_MOVE
+    pv = SmartMoveFinder.searchPV
+    return move.packed, pv[1].packed if len(pv) > 1 and pv[0] == move else NO_MOVE
+
+
+def workerLoop(conn, activeSearch, stateClass, useBook, threads):
+    gs = stateClass()
+    book = OpeningBook.open_default_book() if useBook else None
+    while True:
+        try:
+            command = conn.recv()
+        except EOFError:
+            break  # the UI went away without saying quit
+        kind = command[0]
+        if kind == "quit":
+            break
+        elif kind == "undo":
+            for _ in range(command[1]):
+                gs.undo_move()
+        elif kind == "moves":
+            for packed in command[1]:
+                gs.make_move(ChessEngine.Move.from_packed(packed, gs.board))
+        elif kind == "go":
+            searchId, maxDepth, timeLimit, nodeLimit = command[1:]
+            if activeSearch.value != searchId:
+                continue  # stopped before it started
+            conn.send(("bestmove", searchId) +
+                      search(gs, searchId, activeSearch, maxDepth, timeLimit, nodeLimit, book, threads))
+        elif kind == "ponder":
+            # Searched on top of the synced game, which is left as it was; a ponder hit sends the move as usual
+            searchId, predicted, maxDepth, timeLimit, nodeLimit = command[1:]
+            if activeSearch.value != searchId:
+                continue
+            gs.make_move(ChessEngine.Move.from_packed(predicted, gs.board))
+            result = search(gs, searchId, activeSearch, maxDepth, timeLimit, nodeLimit, book, threads)
+            gs.undo_move()
+            conn.send(("bestmove", searchId) + result)
+    if book is not None:
+        book.close()
+    LazySMP.releaseSharedTable()  # child processes exit without running atexit handlers
+    conn.close()
+
+
+class EngineWorker:
+    def __init__(self, stateClass=ChessEngine.GameState, maxDepth=None, timeLimit=None, nodeLimit=None, ponder=True,
+                 useBook=True, threads=None):
+        self.threads = SmartMoveFinder.SEARCH_THREADS if threads is None else threads
+        self.maxDepth = maxDepth
+        self.timeLimit = timeLimit
+        self.nodeLimit = nodeLimit
+        self.conn, childConn = Pipe()
+        # Id of the search the worker should be running; anything else makes a running search stop
+        self.activeSearch = Value('i', 0, lock=False)
+        self.searchCount = 0
+        self.synced = []  # packed moves the worker has played from the initial position
+        self.ponder = ponder
+        self.lastBestMove = NO_MOVE  # the last result poll returned, and the reply its search expected
+        self.expectedReply = NO_MOVE
+        self.ponderMove = NO_MOVE  # the reply being pondered on, while the ponder search is outstanding
+        self.ponderResult = None
+        self.readyResult = None
+        self.process = Process(target=workerLoop,
+                               args=(childConn, self.activeSearch, stateClass, useBook, self.threads))
+        self.process.start()
+        childConn.close()
+        atexit.register(self.close)
+
+    def sync(self, gs):
+        """
+        Brings the worker's game in line with gs by undoing back to the common prefix and replaying the rest.
+        """
+        history = [move.packed for move in gs.moveLog]
+        common = 0
+        while common < len(history) and common < len(self.synced) and history[common] == self.synced[common]:
+            common += 1
+        if common < len(self.synced):
+            self.conn.send(("undo", len(self.synced) - common))
+        if common < len(history):
+            self.conn.send(("moves", history[common:]))
+        self.synced = history
+
+    def start_search(self, gs):
+        if self.ponderMove != NO_MOVE:
+            history = [move.packed for move in gs.moveLog]
+            if history[:-1] == self.synced and history[-1] == self.ponderMove:
+                # Ponder hit: the ponder search becomes this search
+                self.conn.send(("moves", [self.ponderMove]))
+                self.synced = history
+                self.ponderMove = NO_MOVE
+                self.readyResult = self.ponderResult
+                return
+            self.stop()
+        self.sync(gs)
+        self.searchCount += 1
+        self.activeSearch.value = self.searchCount
+        self.conn.send(("go", self.searchCount, self.maxDepth, self.timeLimit, self.nodeLimit))
+
+    def start_ponder(self, gs):
+        """
+        Called once the engine's move has been played in gs: searches the reply the engine expects while the
+        human is thinking. Does nothing if pondering is off or the engine has no expectation for this position.
+        """
+        if not self.ponder or self.expectedReply == NO_MOVE or not gs.moveLog or \
+                gs.moveLog[-1].packed != self.lastBestMove:
+            return
+        self.sync(gs)
+        self.searchCount += 1
+        self.activeSearch.value = self.searchCount
+        self.ponderMove = self.expectedReply
+        self.ponderResult = None
+        self.expectedReply = NO_MOVE
+        self.conn.send(("ponder", self.searchCount, self.ponderMove, self.maxDepth, self.timeLimit, self.nodeLimit))
+
+    def stop(self):
+        self.activeSearch.value = 0
+        self.ponderMove = NO_MOVE
+        self.readyResult = None
+
+    def poll(self):
+        """
+        Returns the packed best move once the current search has finished (NO_MOVE if it had none), else None.
+        Results of stopped or superseded searches are dropped; a finished ponder search is held until its hit.
+        """
+        while self.conn.poll():
+            kind, searchId, packed, expected = self.conn.recv()
+            if searchId == self.searchCount and self.activeSearch.value == searchId:
+                if self.ponderMove != NO_MOVE:
+                    self.ponderResult = (packed, expected)
+                else:
+                    self.readyResult = (packed, expected)
+        if self.readyResult is None:
+            return None
+        self.lastBestMove, self.expectedReply = self.readyResult
+        self.readyResult = None
+        self.activeSearch.value = 0
+        return self.lastBestMove
+
+    def close(self):
+        atexit.unregister(self.close)
+        if self.conn.closed:
+            return
+        self.stop()
+        try:
+            self.conn.send(("quit",))
+        except (BrokenPipeError, OSError):
+            pass
+        self.conn.close()
+        self.process.join(timeout=2)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
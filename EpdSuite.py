@@ -0,0 +1,138 @@
+"""
+EPD test-suite runner: searches every position of an EPD file, spread over a process pool, and checks the move
+found against the bm (best move) and am (avoid move) operations. A position is solved when the final move is one
+of its bm moves and none of its am moves. Time to solution is when the search first settled on a correct move
+and kept it to the end.
+
+    python -m Chess.EpdSuite tactics.epd --depth 5 --movetime 2 --processes 4 --json tactics.json
+"""
+
+import argparse
+import json
+import platform
+import re
+import shlex
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from Chess import SmartMoveFinder, Perft
+from Chess.MoveOrdering import merge_reports
+
+OPERATION = re.compile(r'\s*([A-Za-z][A-Za-z0-9_]*)((?:\s+(?:"[^"]*"|[^;\s]+))*)\s*;')
+
+
+def parseEpd(line):
+    """
+    One EPD record -> {"fen": ..., "id": ..., "bm": [...], "am": [...], ...}, or None for blank and comment lines.
+    Operations other than id keep their operands as a list of strings.
+    """
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    fields = line.split(None, 4)
+    if len(fields) < 4:
+        raise ValueError(f"EPD record needs four position fields: {line!r}")
+    entry = {"fen": " ".join(fields[:4]), "bm": [], "am": []}
+    for match in OPERATION.finditer(fields[4] if len(fields) > 4 else ""):
+        opcode, operands = match.group(1), shlex.split(match.group(2))
+        entry[opcode] = " ".join(operands) if opcode == "id" else operands
+    # EPD may carry the move counters as operations
+    if "hmvc" in entry and "fmvn" in entry:
+        entry["fen"] += f" {entry['hmvc'][0]} {entry['fmvn'][0]}"
+    return entry
+
+
+def readEpd(path):
+    with open(path) as f:
+        entries = [entry for entry in map(parseEpd, f) if entry is not None]
+    for number, entry in enumerate(entries, 1):
+        entry.setdefault("id", f"{path}:{number}")
+    return entries
+
+
+def solvePosition(entry, depth, timeLimit, nodeLimit, backend):
+    """
+    Worker side: searches one suite position from an empty transposition table and returns a JSON-ready result.
+    """
+    gs = Perft.gameStateFromFen(entry["fen"], backend)
+    bestMoves = {gs.parse_move(text) for text in entry["bm"]} - {None}
+    avoidMoves = {gs.parse_move(text) for text in entry["am"]} - {None}
+
+    def correct(move):
+        return move is not None and (not bestMoves or move in bestMoves) and move not in avoidMoves
+
+    solvedAt = {}
+
+    def onIteration(iteration, score, nodes, seconds, move):
+        if not correct(move):
+            solvedAt.clear()
+        elif not solvedAt:
+            solvedAt.update(depth=iteration, seconds=seconds, nodes=nodes)
+
+    SmartMoveFinder.transpositionTable.clear()
+    start = time.perf_counter()
+    move = SmartMoveFinder.findBestMoveIterative(gs, gs.get_valid_moves(), depth, timeLimit, nodeLimit,
+                                                 onIteration=onIteration)
+    seconds = time.perf_counter() - start
+    nodes = SmartMoveFinder.searchNodes
+    solved = correct(move) and (bool(bestMoves) or bool(avoidMoves))
+    return {"id": entry["id"], "fen": entry["fen"], "bm": entry["bm"], "am": entry["am"],
+            "move": gs.move_to_san(move) if move is not None else None, "solved": solved,
+            "solvedDepth": solvedAt.get("depth") if solved else None,
+            "solvedSeconds": round(solvedAt["seconds"], 4) if solved and solvedAt else None,
+            "solvedNodes": solvedAt.get("nodes") if solved else None,
+            "nodes": nodes, "seconds": round(seconds, 4), "nps": int(nodes / seconds) if seconds > 0 else 0,
+            "ordering": SmartMoveFinder.moveOrderer.report()}
+
+
+def runSuite(entries, depth=SmartMoveFinder.DEPTH, timeLimit=None, nodeLimit=None, processes=4,
+             backend="bitboard"):
+    """
+    Solves every entry and returns a JSON-ready report, results in suite order.
+    """
+    start = time.perf_counter()
+    count = len(entries)
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        results = list(pool.map(solvePosition, entries, [depth] * count, [timeLimit] * count, [nodeLimit] * count,
+                                [backend] * count))
+    wallSeconds = time.perf_counter() - start
+    solved = [result for result in results if result["solved"]]
+    timed = [result["solvedSeconds"] for result in solved if result["solvedSeconds"] is not None]
+    totalNodes = sum(result["nodes"] for result in results)
+    return {"backend": backend, "depth": depth, "timeLimit": timeLimit, "nodeLimit": nodeLimit,
+            "processes": processes, "python": platform.python_version(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "positions": results,
+            "total": count, "solved": len(solved), "solveRate": round(len(solved) / count, 4) if count else 0.0,
+            "averageSolveSeconds": round(sum(timed) / len(timed), 4) if timed else None,
+            "totalNodes": totalNodes, "wallSeconds": round(wallSeconds, 4),
+            "nps": int(totalNodes / wallSeconds) if wallSeconds > 0 else 0,
+            "ordering": merge_reports([result["ordering"] for result in results])}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EPD test-suite runner")
+    parser.add_argument("suite", help="EPD file with bm and/or am operations")
+    parser.add_argument("--depth", type=int, default=SmartMoveFinder.DEPTH)
+    parser.add_argument("--movetime", type=float, help="seconds per position")
+    parser.add_argument("--nodes", type=int, help="nodes per position")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--backend", choices=sorted(Perft.BACKENDS), default="bitboard")
+    parser.add_argument("--json", metavar="PATH", help="write the report to this file")
+    args = parser.parse_args()
+
+    report = runSuite(readEpd(args.suite), args.depth, args.movetime, args.nodes, args.processes, args.backend)
+    for result in report["positions"]:
+        expected = " ".join(result["bm"]) or "not " + " ".join(result["am"])
+        status = f"ok at depth {result['solvedDepth']}" if result["solved"] else "FAIL"
+        print(f"{result['id']:<24} {result['move'] or '-':<8} expected {expected:<16} {result['nodes']:>9} nodes  "
+              f"{result['seconds']:>7}s  {status}")
+    print(f"solved {report['solved']}/{report['total']} ({report['solveRate']:.1%}), "
+          f"{report['totalNodes']} nodes in {report['wallSeconds']}s, {report['nps']} nps, "
+          f"first-move cutoffs {report['ordering']['firstMoveCutoffRate']:.1%}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Lazy SMP: several processes search the same position at once and share nothing but the transposition table,
+which lives in a multiprocessing.shared_memory block. Helpers search a depth deeper on every other process and
+start from differently shuffled root moves, so they wander into different subtrees and fill the table with
+entries the main search then picks up as cutoffs and hash moves. Only the main search's move is played.
+
+    python -m Chess.LazySMP --workers 4 --depth 4 --json smp.json
+"""
+
+import argparse
+import atexit
+import json
+import platform
+import random
+import time
+from multiprocessing import Process, Queue, Value, shared_memory, resource_tracker
+
+from Chess import TranspositionTable as tt
+from Chess import SmartMoveFinder, Perft
+
+BENCHMARK_POSITIONS = [position["fen"] for position in Perft.POSITIONS]
+
+sharedMemory = None  # the block backing this process's transposition table, once installed
+
+
+def installSharedTable(name=None, size_mb=None):
+    """
+    Points SmartMoveFinder at a transposition table in shared memory. Without a name a new block is created
+    (once per process); with a name the block another process created is attached.
+    """
+    global sharedMemory
+    if sharedMemory is not None and (name is None or sharedMemory.name == name):
+        return sharedMemory.name
+    if sharedMemory is not None:
+        releaseSharedTable()
+    if name is None:
+        words = (size_mb or SmartMoveFinder.TT_SIZE_MB) * 1024 * 1024 // 8
+        buckets = 1 << ((words // tt.BUCKET_WORDS).bit_length() - 1)
+        sharedMemory = shared_memory.SharedMemory(create=True, size=buckets * tt.BUCKET_WORDS * 8)
+        atexit.register(releaseSharedTable)
+    else:
+        sharedMemory = shared_memory.SharedMemory(name=name)
+        # Only the creator may unlink the block; stop this process's tracker from doing it at exit
+        resource_tracker.unregister(sharedMemory._name, "shared_memory")
+    table = tt.TranspositionTable(policy=SmartMoveFinder.TT_POLICY, table=sharedMemory.buf.cast('Q'))
+    if name is None:
+        table.clear()
+    SmartMoveFinder.transpositionTable = table
+    return sharedMemory.name
+
+
+def releaseSharedTable():
+    global sharedMemory
+    if sharedMemory is None:
+        return
+    owner = SmartMoveFinder.transpositionTable.table
+    SmartMoveFinder.transpositionTable = tt.TranspositionTable(SmartMoveFinder.TT_SIZE_MB, SmartMoveFinder.TT_POLICY)
+    owner.release()  # the block cannot be closed while a view of it is alive
+    sharedMemory.close()
+    try:
+        sharedMemory.unlink()
+    except FileNotFoundError:
+        pass  # attached blocks were already unlinked by their creator
+    sharedMemory = None
+
+
+def helperSearch(index, stateClass, position, tableName, maxDepth, stopFlag, results):
+    installSharedTable(tableName)
+    gs = stateClass()
+    gs.load_packed_position(position)
+    valid_moves = gs.get_valid_moves()
+    random.Random(index).shuffle(valid_moves)
+    nodes = 0
+    try:
+        SmartMoveFinder.findBestMoveIterative(gs, valid_moves, maxDepth + index % 2,
+                                              shouldStop=lambda: stopFlag.value != 0)
+        nodes = SmartMoveFinder.searchNodes
+    finally:
+        results.put(nodes)
+
+
+def findBestMoveLazySMP(gs, valid_moves, workers=2, maxDepth=None, timeLimit=None, nodeLimit=None, report=None,
+                        shouldStop=None):
+    """
+    Searches with workers processes in total: this one plus workers - 1 helpers sharing its transposition table.
+    The budget and shouldStop apply to the main search; helpers are stopped as soon as it returns. If report is a
+    dict it is filled with the node counts of every process. The calling process must not be daemonic, since
+    daemonic processes cannot start the helpers.
+    """
+    maxDepth = SmartMoveFinder.DEPTH if maxDepth is None else maxDepth
+    tableName = installSharedTable()
+    stopFlag = Value('b', 0, lock=False)
+    results = Queue()
+    position = gs.pack_position()
+    helpers = [Process(target=helperSearch,
+                       args=(index, type(gs), position, tableName, maxDepth, stopFlag, results), daemon=True)
+               for index in range(1, workers)]
+    for helper in helpers:
+        helper.start()
+    try:
+        move = SmartMoveFinder.findBestMoveIterative(gs, valid_moves, maxDepth, timeLimit, nodeLimit,
+                                                      shouldStop=shouldStop)
+        mainNodes = SmartMoveFinder.searchNodes
+    finally:
+        stopFlag.value = 1
+        helperNodes = [results.get() for _ in helpers]
+        for helper in helpers:
+            helper.join()
+    if report is not None:
+        report["mainNodes"] = mainNodes
+        report["helperNodes"] = helperNodes
+        report["nodes"] = mainNodes + sum(helperNodes)
+    return move
+
+
+def timeToDepth(fen, workers, depth, backend):
+    gs = Perft.gameStateFromFen(fen, backend)
+    SmartMoveFinder.transpositionTable.clear()
+    report = {}
+    start = time.perf_counter()
+    move = findBestMoveLazySMP(gs, gs.get_valid_moves(), workers, depth, report=report)
+    seconds = time.perf_counter() - start
+    return {"seconds": round(seconds, 4), "nodes": report["nodes"], "mainNodes": report["mainNodes"],
+            "move": move.get_chess_notation() if move else None}
+
+
+def benchmarkSpeedup(workers=4, depth=4, positions=BENCHMARK_POSITIONS, backend="bitboard"):
+    """
+    Time to reach depth on each position with one process and with workers processes, from an empty table each
+    time. Speedup is the ratio of total wall times; returns a JSON-ready report.
+    """
+    installSharedTable()
+    results = []
+    for fen in positions:
+        single = timeToDepth(fen, 1, depth, backend)
+        parallel = timeToDepth(fen, workers, depth, backend)
+        results.append({"fen": fen, "single": single, "parallel": parallel,
+                        "speedup": round(single["seconds"] / parallel["seconds"], 3)
+                        if parallel["seconds"] > 0 else 0.0})
+    singleSeconds = sum(result["single"]["seconds"] for result in results)
+    parallelSeconds = sum(result["parallel"]["seconds"] for result in results)
+    return {"workers": workers, "depth": depth, "backend": backend, "python": platform.python_version(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "positions": results,
+            "singleSeconds": round(singleSeconds, 4), "parallelSeconds": round(parallelSeconds, 4),
+            "speedup": round(singleSeconds / parallelSeconds, 3) if parallelSeconds > 0 else 0.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lazy SMP speedup benchmark")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--backend", choices=sorted(Perft.BACKENDS), default="bitboard")
+    parser.add_argument("--json", metavar="PATH", help="write the report to this file")
+    args = parser.parse_args()
+
+    report = benchmarkSpeedup(args.workers, args.depth, backend=args.backend)
+    for result in report["positions"]:
+        print(f"{result['fen']:<80} 1: {result['single']['seconds']:>8}s  "
+              f"{args.workers}: {result['parallel']['seconds']:>8}s  x{result['speedup']}")
+    print(f"total 1: {report['singleSeconds']}s  {args.workers}: {report['parallelSeconds']}s  "
+          f"speedup x{report['speedup']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Move ordering for the alpha-beta search: hash move first, then captures by MVV-LVA (most valuable victim, least
+valuable attacker), then killer moves of the current ply, then the remaining quiet moves by history score.
+StagedMoves produces the same order lazily, generating each group only once the previous one failed to cut off.
+"""
+
+MAX_PLY = 128  # deepest ply the search keeps killers and PV lines for; SmartMoveFinder uses this one too
+KILLER_SLOTS = 2
+
+# Ordering bands, kept far apart so a history score can never lift a quiet move above a capture
+HASH_MOVE_SCORE = 1 << 30
+CAPTURE_SCORE = 1 << 24
+KILLER_SCORE = 1 << 20
+
+ORDERING_VALUES = {"p": 1, "N": 3, "B": 3, "R": 5, "Q": 9, "K": 20}
+PIECES = [color + piece for color in "wb" for piece in "pNBRQK"]
+
+
+def mvv_lva(move):
+    return ORDERING_VALUES[move.piece_captured[1]] * 32 - ORDERING_VALUES[move.piece_moved[1]]
+
+
+def is_quiet(move):
+    return move.piece_captured == '--' and not move.pawn_promotion
+
+
+def is_losing_capture(move):
+    # Without exchange evaluation, a capture of a cheaper piece counts as losing
+    return not move.pawn_promotion and ORDERING_VALUES[move.piece_captured[1]] < ORDERING_VALUES[move.piece_moved[1]]
+
+
+class StagedMoves:
+    """
+    Iterates the legal moves of gs in stages: the hash move, winning captures, killers, losing captures, then
+    quiet moves. The hash move and killers are checked one by one with GameState.legal_move_from_id, so a cutoff
+    on them costs no generation at all, and quiet moves are only generated if everything before them failed.
+    Quiet king moves are checked for attacked squares only as they are tried. In check all evasions are
+    generated at once and ordered as usual.
+    """
+
+    def __init__(self, gs, orderer, ply, hashMoveId=-1):
+        self.gs = gs
+        self.orderer = orderer
+        self.ply = ply
+        self.hashMoveId = hashMoveId
+        self.generated = 0  # distinct legal moves materialised so far
+        self.quietsGenerated = False
+        self.inCheck = False
+
+    def __iter__(self):
+        gs = self.gs
+        tried = set()
+        if self.hashMoveId >= 0:
+            move = gs.legal_move_from_id(self.hashMoveId)
+            if move is not None:
+                self.generated += 1
+                tried.add(move.move_id)
+                yield move
+        captures = gs.get_capture_moves()
+        self.inCheck = gs.inCheck
+        if self.inCheck:
+            self.quietsGenerated = True
+            self.generated += len([move for move in captures if move.move_id not in tried])
+            for move in self.orderer.orderMoves(captures, self.ply):
+                if move.move_id not in tried:
+                    yield move
+            return
+        captures = [move for move in captures if move.move_id not in tried]
+        self.generated += len(captures)
+        captures.sort(key=lambda move: 0 if move.pawn_promotion else mvv_lva(move), reverse=True)
+        losing = []
+        for move in captures:
+            if is_losing_capture(move):
+                losing.append(move)
+            else:
+                tried.add(move.move_id)
+                yield move
+        if self.ply < MAX_PLY:
+            for killer in list(self.orderer.killers[self.ply]):
+                if killer < 0 or killer in tried:
+                    continue
+                move = gs.legal_move_from_id(killer)
+                if move is not None and is_quiet(move):
+                    self.generated += 1
+                    tried.add(move.move_id)
+                    yield move
+        for move in losing:
+            tried.add(move.move_id)
+            yield move
+        quiets = [move for move in gs.get_quiet_moves() if move.move_id not in tried]
+        self.quietsGenerated = True
+        self.generated += len(quiets)
+        history = self.orderer.history
+        quiets.sort(key=lambda move: history[move.piece_moved][move.end_row * 8 + move.end_col], reverse=True)
+        for move in quiets:
+            if move.piece_moved[1] != 'K' or gs.king_move_is_legal(move):
+                yield move
+
+
+class MoveOrderer:
+    def __init__(self):
+        self.killers = [[-1] * KILLER_SLOTS for _ in range(MAX_PLY)]
+        self.history = {piece: [0] * 64 for piece in PIECES}
+        self.cutoffs = 0
+        self.firstMoveCutoffs = 0
+        self.cutoffMoveIndexTotal = 0
+        # Count the legal moves staging never produced at nodes that cut off early. This costs a move count per such
+        # node, so only benchmarks switch it on
+        self.countUngenerated = False
+        self.stagedNodes = 0
+        self.generatedMoves = 0
+        self.quietStagesSkipped = 0
+        self.ungeneratedMoves = 0
+
+    def newSearch(self):
+        # Killers are position specific; history is aged so old searches fade out
+        for slots in self.killers:
+            for i in range(KILLER_SLOTS):
+                slots[i] = -1
+        for scores in self.history.values():
+            for sq in range(64):
+                scores[sq] //= 2
+        self.cutoffs = 0
+        self.firstMoveCutoffs = 0
+        self.cutoffMoveIndexTotal = 0
+        self.stagedNodes = 0
+        self.generatedMoves = 0
+        self.quietStagesSkipped = 0
+        self.ungeneratedMoves = 0
+
+    def recordStagedNode(self, staged):
+        """
+        Called with the node's StagedMoves once the search is done with it, with gs back at the node.
+        """
+        self.stagedNodes += 1
+        self.generatedMoves += staged.generated
+        if not staged.quietsGenerated:
+            self.quietStagesSkipped += 1
+        if self.countUngenerated and not staged.quietsGenerated:
+            # Once the quiet stage has run every legal move has been produced
+            self.ungeneratedMoves += staged.gs.count_legal_moves() - staged.generated
+
+    def scoreMove(self, move, ply, hashMoveId):
+        if move.move_id == hashMoveId:
+            return HASH_MOVE_SCORE
+        if move.piece_captured != '--':
+            return CAPTURE_SCORE + mvv_lva(move)
+        if move.pawn_promotion:
+            return CAPTURE_SCORE
+        if ply < MAX_PLY and move.move_id in self.killers[ply]:
+            return KILLER_SCORE
+        return self.history[move.piece_moved][move.end_row * 8 + move.end_col]
+
+    def orderMoves(self, moves, ply, hashMoveId=-1):
+        return sorted(moves, key=lambda move: self.scoreMove(move, ply, hashMoveId), reverse=True)
+
+    def recordCutoff(self, move, ply, depth, moveIndex):
+        self.cutoffs += 1
+        self.cutoffMoveIndexTotal += moveIndex
+        if moveIndex == 0:
+            self.firstMoveCutoffs += 1
+        if not is_quiet(move):
+            return
+        if ply < MAX_PLY:
+            slots = self.killers[ply]
+            if slots[0] != move.move_id:
+                slots[1] = slots[0]
+                slots[0] = move.move_id
+        self.history[move.piece_moved][move.end_row * 8 + move.end_col] += depth * depth
+
+    def report(self):
+        """
+        Cutoff statistics since the last newSearch. A first-move cutoff rate near 1 means the search is close to
+        the minimal alpha-beta tree, i.e. an effective branching factor near the square root of the full one.
+        """
+        return {"cutoffs": self.cutoffs,
+                "firstMoveCutoffs": self.firstMoveCutoffs,
+                "firstMoveCutoffRate": self.firstMoveCutoffs / self.cutoffs if self.cutoffs else 0.0,
+                "averageCutoffMoveIndex": self.cutoffMoveIndexTotal / self.cutoffs if self.cutoffs else 0.0,
+                "stagedNodes": self.stagedNodes,
+                "generatedMovesPerNode": self.generatedMoves / self.stagedNodes if self.stagedNodes else 0.0,
+                "quietStagesSkipped": self.quietStagesSkipped,
+                "ungeneratedMovesPerNode": self.ungeneratedMoves / self.stagedNodes
+                if self.countUngenerated and self.stagedNodes else None}
+
+
+def merge_reports(reports):
+    """
+    MoveOrderer.report() results of several searches combined into one, averages weighted by what they average over.
+    """
+    cutoffs = sum(report["cutoffs"] for report in reports)
+    firstMoveCutoffs = sum(report["firstMoveCutoffs"] for report in reports)
+    stagedNodes = sum(report["stagedNodes"] for report in reports)
+    ungenerated = [report["ungeneratedMovesPerNode"] for report in reports]
+    return {"cutoffs": cutoffs,
+            "firstMoveCutoffs": firstMoveCutoffs,
+            "firstMoveCutoffRate": firstMoveCutoffs / cutoffs if cutoffs else 0.0,
+            "averageCutoffMoveIndex": sum(report["averageCutoffMoveIndex"] * report["cutoffs"]
+                                          for report in reports) / cutoffs if cutoffs else 0.0,
+            "stagedNodes": stagedNodes,
+            "generatedMovesPerNode": sum(report["generatedMovesPerNode"] * report["stagedNodes"]
+                                         for report in reports) / stagedNodes if stagedNodes else 0.0,
+            "quietStagesSkipped": sum(report["quietStagesSkipped"] for report in reports),
+            "ungeneratedMovesPerNode": sum(perNode * report["stagedNodes"] for perNode, report in
+                                           zip(ungenerated, reports)) / stagedNodes
+            if stagedNodes and None not in ungenerated else None}
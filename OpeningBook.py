@@ -0,0 +1,187 @@
+"""
+Opening book: a binary file of fixed 12-byte records (position hash, packed move, weight) sorted by hash.
+The book is memory-mapped and searched in place, so opening it parses nothing and every process using it
+shares the same pages of the OS file cache. Books are built from PGN or plain move lists, one game per line.
+
+    python -m Chess.OpeningBook --build openings.txt --plies 16 --out book.bin
+    python -m Chess.OpeningBook --probe "1. e4 e5 2. Nf3"
+"""
+
+import argparse
+import mmap
+import os
+import random
+import re
+import struct
+import tempfile
+
+from Chess import ChessEngine
+
+RECORD = struct.Struct("<QHH")  # GameState.hash, Move.packed, weight
+MAX_WEIGHT = 0xFFFF
+DEFAULT_PLIES = 16
+DEFAULT_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "openings.txt")
+DEFAULT_BOOK = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+
+MOVE_NUMBER = re.compile(r"^\d+\.+")
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+
+
+def read_games(text):
+    """
+    Yields the move tokens of each game in PGN text. Tag pairs, comments, variations, NAGs and move numbers are
+    dropped. A game ends at a result, a tag pair, a blank line or a new "1." move number.
+    """
+    text = re.sub(r"\{[^}]*\}|;[^\n]*", " ", text)
+    while re.search(r"\([^()]*\)", text):
+        text = re.sub(r"\([^()]*\)", " ", text)
+    game = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith("["):
+            if game:
+                yield game
+                game = []
+            continue
+        if not line:
+            if game:
+                yield game
+                game = []
+            continue
+        for token in line.split():
+            if game and token.startswith("1.") and not token.startswith("1.."):
+                yield game  # move lists have no results between games
+                game = []
+            token = MOVE_NUMBER.sub("", token)
+            if not token or token.startswith("$"):
+                continue
+            if token in RESULTS:
+                yield game
+                game = []
+                continue
+            game.append(token)
+    if game:
+        yield game
+
+
+def build_book(sources, path=DEFAULT_BOOK, plies=DEFAULT_PLIES):
+    """
+    Plays the first plies moves of every game in the source files and writes one record per (position, move),
+    weighted by how often it was played. Returns the number of records written.
+    """
+    weights = {}
+    gs = ChessEngine.GameState()
+    for source in sources:
+        with open(source) as f:
+            games = list(read_games(f.read()))
+        for game in games:
+            for token in game[:plies]:
+                move = gs.parse_move(token)
+                if move is None:
+                    break  # an illegal or unreadable move ends the line
+                entry = (gs.hash, move.packed)
+                weights[entry] = weights.get(entry, 0) + 1
+                gs.make_move(move)
+            while gs.moveLog:
+                gs.undo_move()
+    records = sorted(weights.items())
+    # Written aside and renamed, so a process mapping the book never sees it half written. The temporary name is
+    # unique to this call, so processes building the same book at once do not write into each other's file.
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for (key, packed), weight in records:
+                f.write(RECORD.pack(key, packed, min(weight, MAX_WEIGHT)))
+        os.chmod(tmp, 0o644)  # mkstemp creates the file readable by its owner only
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    return len(records)
+
+
+class OpeningBook:
+    def __init__(self, path=DEFAULT_BOOK):
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self.count = size // RECORD.size
+
+    def __len__(self):
+        return self.count
+
+    def key_at(self, i):
+        return RECORD.unpack_from(self.data, i * RECORD.size)[0]
+
+    def entries(self, key):
+        """
+        Returns [(packed move, weight), ...] stored for the position hash key.
+        """
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.key_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        entries = []
+        while lo < self.count:
+            entryKey, packed, weight = RECORD.unpack_from(self.data, lo * RECORD.size)
+            if entryKey != key:
+                break
+            entries.append((packed, weight))
+            lo += 1
+        return entries
+
+    def pick(self, gs, rng=random):
+        """
+        A legal book move for gs chosen with probability proportional to its weight, or None when out of book.
+        """
+        moves = {move.packed: move for move in gs.get_valid_moves()}
+        candidates = [(moves[packed], weight) for packed, weight in self.entries(gs.hash) if packed in moves]
+        if not candidates:
+            return None
+        return rng.choices([move for move, weight in candidates], [weight for move, weight in candidates])[0]
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+
+
+def open_default_book():
+    """
+    The book next to this module, built from DEFAULT_SOURCE the first time it is needed. None if neither exists.
+    """
+    if not os.path.exists(DEFAULT_BOOK):
+        if not os.path.exists(DEFAULT_SOURCE):
+            return None
+        build_book([DEFAULT_SOURCE], DEFAULT_BOOK)
+    return OpeningBook(DEFAULT_BOOK)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Opening book builder")
+    parser.add_argument("--build", nargs="+", metavar="PGN", help="build a book from these PGN or move list files")
+    parser.add_argument("--plies", type=int, default=DEFAULT_PLIES)
+    parser.add_argument("--out", default=DEFAULT_BOOK)
+    parser.add_argument("--probe", metavar="MOVES", help="list the book moves after these moves")
+    args = parser.parse_args()
+
+    if args.build:
+        print(f"{build_book(args.build, args.out, args.plies)} records written to {args.out}")
+    if args.probe is not None:
+        book = OpeningBook(args.out)
+        gs = ChessEngine.GameState()
+        for token in next(read_games(args.probe), []):
+            move = gs.parse_move(token)
+            if move is None:
+                raise SystemExit(f"Illegal move: {token}")
+            gs.make_move(move)
+        for packed, weight in book.entries(gs.hash):
+            print(f"{ChessEngine.Move.from_packed(packed, gs.board).get_chess_notation()} {weight}")
+        book.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Perft (performance test) for the move generator: counts the leaf nodes of the legal move tree to a fixed depth
+and compares them with published reference counts, reporting nodes per second along the way.
+The reference depths stop before the first promotion in each tree, because the engine only promotes to a queen
+and the published counts include under-promotions.
+
+    python -m Chess.Perft --depth 4 --backend bitboard --processes 4 --json perft.json
+    python -m Chess.Perft --divide 3 --fen "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+    python -m Chess.Perft --fuzz 500 --seed 1
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from Chess import ChessEngine, BitboardEngine
+
+BACKENDS = {"list": ChessEngine.GameState, "bitboard": BitboardEngine.BitboardGameState}
+
+START_FEN = ChessEngine.START_FEN
+
+POSITIONS = [
+    {"name": "startpos", "fen": START_FEN,
+     "nodes": [20, 400, 8902, 197281, 4865609]},
+    {"name": "kiwipete", "fen": "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     "nodes": [48, 2039, 97862]},
+    {"name": "position3", "fen": "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     "nodes": [14, 191, 2812, 43238, 674624]},
+    {"name": "position4", "fen": "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     "nodes": [6]},
+    {"name": "position4-mirrored", "fen": "r2q1rk1/pP1p2pp/Q4n2/bbp1p3/Np6/1B3NBn/pPPP1PPP/R3K2R b KQ - 0 1",
+     "nodes": [6]},
+    {"name": "position6", "fen": "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     "nodes": [46, 2079, 89890]},
+]
+
+
+def gameStateFromFen(fen, backend="bitboard"):
+    gs = BACKENDS[backend]()
+    gs.load_fen(fen)
+    return gs
+
+
+def perft(gs, depth):
+    moves = gs.get_valid_moves()
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        gs.make_move(move)
+        nodes += perft(gs, depth - 1)
+        gs.undo_move()
+    return nodes
+
+
+def divide(gs, depth):
+    """
+    Node count below each root move, for bisecting a move generator bug against another engine.
+    """
+    counts = {}
+    for move in gs.get_valid_moves():
+        gs.make_move(move)
+        counts[move.get_chess_notation()] = perft(gs, depth - 1) if depth > 1 else 1
+        gs.undo_move()
+    return counts
+
+
+def crossCheck(games=100, plies=120, seed=0, positions=POSITIONS):
+    """
+    Plays random games from the suite positions on both backends side by side and compares their legal moves at
+    every position reached. Returns the positions where they differ, as dicts with the FEN and the moves only one
+    backend generated.
+    """
+    rng = random.Random(seed)
+    mismatches = []
+    for game in range(games):
+        fen = positions[game % len(positions)]["fen"]
+        states = [gameStateFromFen(fen, "list"), gameStateFromFen(fen, "bitboard")]
+        for _ in range(plies):
+            listMoves, bitboardMoves = ({move.packed: move for move in gs.get_valid_moves()} for gs in states)
+            if listMoves.keys() != bitboardMoves.keys():
+                mismatches.append({
+                    "fen": states[1].get_fen(),
+                    "listOnly": sorted(listMoves[packed].get_chess_notation()
+                                       for packed in listMoves.keys() - bitboardMoves.keys()),
+                    "bitboardOnly": sorted(bitboardMoves[packed].get_chess_notation()
+                                           for packed in bitboardMoves.keys() - listMoves.keys())})
+                break
+            if not listMoves:
+                break
+            packed = rng.choice(sorted(listMoves))
+            states[0].make_move(listMoves[packed])
+            states[1].make_move(bitboardMoves[packed])
+    return mismatches
+
+
+def runPosition(position, depth, backend):
+    depth = min(depth, len(position["nodes"])) if position.get("nodes") else depth
+    gs = gameStateFromFen(position["fen"], backend)
+    start = time.perf_counter()
+    nodes = perft(gs, depth)
+    seconds = time.perf_counter() - start
+    expected = position["nodes"][depth - 1] if position.get("nodes") else None
+    return {"name": position["name"], "fen": position["fen"], "depth": depth, "nodes": nodes,
+            "expected": expected, "passed": expected is None or nodes == expected,
+            "seconds": round(seconds, 4), "nps": int(nodes / seconds) if seconds > 0 else 0}
+
+
+def runSuite(depth, backend="bitboard", processes=1, positions=POSITIONS):
+    """
+    Runs every position to depth (capped at its deepest reference count) and returns a JSON-ready report.
+    With processes > 1 the positions are spread over a process pool; nps is then per position, and the
+    suite-level figure is total nodes over wall time.
+    """
+    start = time.perf_counter()
+    if processes > 1:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = list(pool.map(runPosition, positions, [depth] * len(positions),
+                                    [backend] * len(positions)))
+    else:
+        results = [runPosition(position, depth, backend) for position in positions]
+    wallSeconds = time.perf_counter() - start
+    totalNodes = sum(result["nodes"] for result in results)
+    return {"backend": backend, "depth": depth, "processes": processes,
+            "python": platform.python_version(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "positions": results, "totalNodes": totalNodes, "wallSeconds": round(wallSeconds, 4),
+            "nps": int(totalNodes / wallSeconds) if wallSeconds > 0 else 0,
+            "passed": all(result["passed"] for result in results)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move generator perft suite")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="bitboard")
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--fen", help="run this position instead of the built-in suite")
+    parser.add_argument("--divide", type=int, metavar="DEPTH", help="print per-move counts for --fen (or startpos)")
+    parser.add_argument("--fuzz", type=int, metavar="GAMES",
+                        help="compare the two backends' moves along this many random games instead")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for --fuzz")
+    parser.add_argument("--json", metavar="PATH", help="write the report to this file")
+    args = parser.parse_args()
+
+    if args.divide:
+        counts = divide(gameStateFromFen(args.fen or START_FEN, args.backend), args.divide)
+        for notation in sorted(counts):
+            print(f"{notation}: {counts[notation]}")
+        print(f"\nMoves: {len(counts)}\nNodes: {sum(counts.values())}")
+        return
+    if args.fuzz:
+        positions = [{"name": "custom", "fen": args.fen}] if args.fen else POSITIONS
+        mismatches = crossCheck(args.fuzz, seed=args.seed, positions=positions)
+        for mismatch in mismatches:
+            print(f"{mismatch['fen']}  list only: {' '.join(mismatch['listOnly']) or '-'}  "
+                  f"bitboard only: {' '.join(mismatch['bitboardOnly']) or '-'}")
+        print(f"{args.fuzz} games, {len(mismatches)} mismatches")
+        sys.exit(0 if not mismatches else 1)
+
+    positions = [{"name": "custom", "fen": args.fen, "nodes": None}] if args.fen else POSITIONS
+    report = runSuite(args.depth, args.backend, args.processes, positions)
+    for result in report["positions"]:
+        status = "ok" if result["passed"] else f"FAIL (expected {result['expected']})"
+        print(f"{result['name']:<20} depth {result['depth']}  {result['nodes']:>10} nodes  "
+              f"{result['nps']:>8} nps  {status}")
+    print(f"total {report['totalNodes']} nodes in {report['wallSeconds']}s, {report['nps']} nps")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    sys.exit(0 if report["passed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Multi-PV analysis: every legal root move is searched on its own in a process pool, giving a score and principal
+variation for each instead of only the best move. Workers are sent the 34-byte packed position and a packed move,
+not a pickled GameState. Moves are handed out one at a time as workers free up. Only the best multiPV moves are
+scored exactly: once that many exact scores are in, later moves are searched against the multiPV-th best of them.
+A move that fails low under that window returns an upper bound, which is enough to rank it below the others, and
+is marked as such.
+
+    python -m Chess.RootAnalysis --depth 4 --processes 4 --multipv 3 --fen "..."
+"""
+
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from Chess import ChessEngine, SmartMoveFinder, Perft
+
+
+def searchRootMove(stateClass, position, packedMove, depth, alpha, beta):
+    """
+    Worker side: scores one root move to depth from the root side's point of view, within (alpha, beta).
+    Returns (packedMove, score, exact, packed PV starting with the move, nodes); exact is False when the score
+    fell outside the window and is only a bound.
+    """
+    gs = stateClass()
+    gs.load_packed_position(position)
+    move = ChessEngine.Move.from_packed(packedMove, gs.board)
+    turnMultiplier = 1 if gs.WhiteToMove else -1
+    SmartMoveFinder.rootPly = 0
+    SmartMoveFinder.rootDepth = depth + 1  # nothing below the root move is treated as the root
+    SmartMoveFinder.searchNodes = 0
+    SmartMoveFinder.moveOrderer.newSearch()
+    gs.make_move(move)
+    score = 0
+    # Shallower passes first, so the last one has hash moves and history to order by
+    for iteration in range(1, depth + 1):
+        low, high = (alpha, beta) if iteration == depth else (-SmartMoveFinder.CHECKMATE, SmartMoveFinder.CHECKMATE)
+        score = -SmartMoveFinder.findMoveNegaMaxAlphaBeta(gs, None, iteration - 1, -high, -low, -turnMultiplier,
+                                                            ply=1)
+    pv = [move.packed] + [reply.packed for reply in SmartMoveFinder.principalVariation(gs, depth - 1)]
+    return packedMove, score, alpha < score < beta, pv, SmartMoveFinder.searchNodes
+
+
+def unpackLine(gs, packedLine):
+    line = []
+    for packed in packedLine:
+        move = ChessEngine.Move.from_packed(packed, gs.board)
+        gs.make_move(move)
+        line.append(move)
+    for _ in line:
+        gs.undo_move()
+    return line
+
+
+def analyzeRootMoves(gs, depth=SmartMoveFinder.DEPTH, processes=4, multiPV=1, report=None):
+    """
+    Returns [(move, score, exact, pv), ...] for every legal move of gs, best first, scores from the side to move's
+    point of view. At least the first multiPV scores are exact; a move whose exact is False has an upper bound for
+    its score. If report is a dict it is filled with node and timing figures.
+    """
+    start = time.perf_counter()
+    position = gs.pack_position()
+    pending = [move.packed for move in gs.get_valid_moves()]
+    results = {}
+    nodes = 0
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        running = set()
+        while pending or running:
+            while pending and len(running) < processes:
+                alpha = -SmartMoveFinder.CHECKMATE
+                exactScores = sorted((score for score, exact, pv in results.values() if exact), reverse=True)
+                if len(exactScores) >= multiPV:
+                    alpha = exactScores[multiPV - 1]
+                running.add(pool.submit(searchRootMove, type(gs), position, pending.pop(0), depth,
+                                        alpha, SmartMoveFinder.CHECKMATE))
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                packedMove, score, exact, pv, moveNodes = future.result()
+                results[packedMove] = (score, exact, pv)
+                nodes += moveNodes
+    seconds = time.perf_counter() - start
+    if report is not None:
+        report.update({"nodes": nodes, "seconds": round(seconds, 4),
+                       "nps": int(nodes / seconds) if seconds > 0 else 0})
+    # An exact score ranks above an upper bound equal to it
+    ranked = sorted(results.values(), key=lambda result: result[:2], reverse=True)
+    analysis = []
+    for score, exact, pv in ranked:
+        line = unpackLine(gs, pv)
+        analysis.append((line[0], score, exact, line))
+    return analysis
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-PV root move analysis")
+    parser.add_argument("--fen", default=Perft.START_FEN)
+    parser.add_argument("--depth", type=int, default=SmartMoveFinder.DEPTH)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--multipv", type=int, default=1, help="only rank this many moves exactly")
+    parser.add_argument("--backend", choices=sorted(Perft.BACKENDS), default="bitboard")
+    args = parser.parse_args()
+
+    report = {}
+    analysis = analyzeRootMoves(Perft.gameStateFromFen(args.fen, args.backend), args.depth, args.processes,
+                                args.multipv, report)
+    for rank, (move, score, exact, pv) in enumerate(analysis, 1):
+        print(f"{rank:>3}. {move.get_chess_notation():<6} {score:>8.1f}{'' if exact else '?'}  "
+              f"{' '.join(reply.get_chess_notation() for reply in pv)}")
+    print(f"{report['nodes']} nodes in {report['seconds']}s, {report['nps']} nps")
+
+
+if __name__ == "__main__":
+    main()
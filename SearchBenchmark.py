@@ -0,0 +1,98 @@
+"""
+Selective search benchmark: searches a set of positions to a fixed depth with every selective feature on, then
+again with each feature switched off in turn. A feature's node savings are the nodes it removes from the search
+with the others still on, as a fraction of the nodes searched without it. Positions whose best move changes
+are listed too, since a feature that saves nodes by missing moves is no bargain.
+
+    python -m Chess.SearchBenchmark --depth 5 --processes 4 --json selective.json
+    python -m Chess.SearchBenchmark --epd tactics.epd --depth 4
+"""
+
+import argparse
+import json
+import platform
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from Chess import SmartMoveFinder, Perft, EpdSuite
+from Chess.MoveOrdering import merge_reports
+
+FEATURES = ("USE_NULL_MOVE", "USE_LMR", "USE_FUTILITY", "USE_PVS", "USE_ASPIRATION")
+
+
+def searchPosition(fen, depth, disabled, backend):
+    """
+    Worker side: one fixed-depth search from an empty table with the features in disabled switched off.
+    Returns the move, nodes, time, searchStats and the move ordering report.
+    """
+    for feature in FEATURES:
+        setattr(SmartMoveFinder, feature, feature not in disabled)
+    SmartMoveFinder.moveOrderer.countUngenerated = True
+    gs = Perft.gameStateFromFen(fen, backend)
+    SmartMoveFinder.transpositionTable.clear()
+    start = time.perf_counter()
+    move = SmartMoveFinder.findBestMoveIterative(gs, gs.get_valid_moves(), depth)
+    seconds = time.perf_counter() - start
+    return {"move": move.get_chess_notation() if move is not None else None, "nodes": SmartMoveFinder.searchNodes,
+            "seconds": round(seconds, 4), "stats": dict(SmartMoveFinder.searchStats),
+            "ordering": SmartMoveFinder.moveOrderer.report()}
+
+
+def runConfiguration(pool, fens, depth, disabled, backend):
+    count = len(fens)
+    results = list(pool.map(searchPosition, fens, [depth] * count, [disabled] * count, [backend] * count))
+    return {"disabled": list(disabled), "nodes": sum(result["nodes"] for result in results),
+            "seconds": round(sum(result["seconds"] for result in results), 4),
+            "ordering": merge_reports([result["ordering"] for result in results]), "positions": results}
+
+
+def benchmarkSelectiveSearch(fens, depth=4, processes=4, backend="bitboard"):
+    """
+    Returns a JSON-ready report with the all-on baseline, one run per disabled feature and each feature's savings.
+    """
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        baseline = runConfiguration(pool, fens, depth, (), backend)
+        runs = {feature: runConfiguration(pool, fens, depth, (feature,), backend) for feature in FEATURES}
+    savings = {}
+    for feature, run in runs.items():
+        savings[feature] = {
+            "nodesWithout": run["nodes"], "nodesWith": baseline["nodes"],
+            "nodeSavings": round(1 - baseline["nodes"] / run["nodes"], 4) if run["nodes"] else 0.0,
+            "timeSavings": round(1 - baseline["seconds"] / run["seconds"], 4) if run["seconds"] else 0.0,
+            "changedMoves": [fen for fen, on, off in zip(fens, baseline["positions"], run["positions"])
+                             if on["move"] != off["move"]]}
+    totals = {}
+    for result in baseline["positions"]:
+        for key, value in result["stats"].items():
+            totals[key] = totals.get(key, 0) + value
+    return {"depth": depth, "backend": backend, "processes": processes, "python": platform.python_version(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "fens": fens, "baseline": baseline,
+            "stats": totals, "ordering": baseline["ordering"], "savings": savings, "runs": runs}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Node savings of each selective search feature")
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--epd", help="take the positions from this EPD file instead of the perft suite")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--backend", choices=sorted(Perft.BACKENDS), default="bitboard")
+    parser.add_argument("--json", metavar="PATH", help="write the report to this file")
+    args = parser.parse_args()
+
+    fens = [entry["fen"] for entry in EpdSuite.readEpd(args.epd)] if args.epd else \
+        [position["fen"] for position in Perft.POSITIONS]
+    report = benchmarkSelectiveSearch(fens, args.depth, args.processes, args.backend)
+    print(f"all features: {report['baseline']['nodes']} nodes in {report['baseline']['seconds']}s")
+    for feature, saving in report["savings"].items():
+        print(f"{feature:<14} {saving['nodesWithout']:>10} nodes without it  saves {saving['nodeSavings']:>7.1%} "
+              f"nodes, {saving['timeSavings']:>7.1%} time  {len(saving['changedMoves'])} moves changed")
+    print(" ".join(f"{key} {value}" for key, value in report["stats"].items()))
+    print(" ".join(f"{key} {value:.3g}" if isinstance(value, float) else f"{key} {value}"
+                   for key, value in report["ordering"].items()))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
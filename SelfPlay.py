@@ -0,0 +1,307 @@
+"""
+Self-play matches between two engine configurations, to tell whether a change made the engine stronger or faster.
+A configuration is a search budget (depth, movetime in seconds, nodes) plus any SmartMoveFinder settings to
+override, written as in "depth=3,nodes=20000,USE_QUIESCENCE=False". Games run in a process pool. Each opening is
+drawn from the opening book (random legal moves when there is none) and played twice with colors reversed.
+Every engine keeps its own transposition table and move ordering state.
+Finished games are appended to a PGN file as they come in. After each one the JSON summary is rewritten with
+the score, an Elo estimate with a 95% error margin, games per second and nodes per second for each side.
+
+    python -m Chess.SelfPlay --games 200 --processes 4 --a "depth=3" --b "depth=2" --pgn match.pgn --json match.json
+"""
+
+import argparse
+import ast
+import json
+import math
+import platform
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from Chess import TranspositionTable as tt
+from Chess import SmartMoveFinder, OpeningBook, Perft, Tablebase
+from Chess.MoveOrdering import MoveOrderer
+
+DEFAULT_CONFIG = {"depth": SmartMoveFinder.DEPTH, "movetime": None, "nodes": 5000}
+OPENING_PLIES = 8
+MAX_PLIES = 300  # longer games are adjudicated drawn
+FIFTY_MOVE_PLIES = 100
+ELO_Z = 1.96  # 95% confidence
+# SmartMoveFinder settings a configuration may not override: the budget ones have keys of their own, and every
+# game already runs single-threaded in its own process of the pool
+BUDGET_SETTINGS = {"DEPTH": "depth", "SEARCH_TIME_LIMIT": "movetime", "SEARCH_NODE_LIMIT": "nodes"}
+UNSUPPORTED_SETTINGS = {"SEARCH_THREADS"}
+
+
+def parseConfig(text):
+    """
+    "depth=3,nodes=20000,USE_QUIESCENCE=False" -> a config dict. Lower-case keys set the search budget,
+    upper-case keys name SmartMoveFinder settings.
+    """
+    config = dict(DEFAULT_CONFIG)
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        key, _, value = item.partition("=")
+        key = key.strip()
+        try:
+            value = ast.literal_eval(value.strip())
+        except (ValueError, SyntaxError):
+            value = value.strip()
+        if key.isupper():
+            if not hasattr(SmartMoveFinder, key):
+                raise ValueError(f"SmartMoveFinder has no setting {key}")
+            if key in BUDGET_SETTINGS:
+                raise ValueError(f"Set {key} with the search limit {BUDGET_SETTINGS[key]}")
+            if key in UNSUPPORTED_SETTINGS:
+                raise ValueError(f"{key} cannot be set per engine in a match")
+        elif key not in DEFAULT_CONFIG:
+            raise ValueError(f"Unknown search limit {key}")
+        config[key] = value
+    return config
+
+
+def configName(config):
+    return ",".join(f"{key}={value}" for key, value in config.items() if value is not None)
+
+
+class Player:
+    """
+    One configuration's search state. move() swaps its settings and tables into SmartMoveFinder for the length of
+    one search. Settings SmartMoveFinder only reads at import take effect here instead: TT_SIZE_MB and TT_POLICY
+    size the player's own table, and USE_TABLEBASES decides whether it gets tablebases.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.settings = {key: value for key, value in config.items() if key.isupper()}
+        self.transpositionTable = tt.TranspositionTable(self.settings.get("TT_SIZE_MB", SmartMoveFinder.TT_SIZE_MB),
+                                                        self.settings.get("TT_POLICY", SmartMoveFinder.TT_POLICY))
+        self.moveOrderer = MoveOrderer()
+        self.tablebases = SmartMoveFinder.tablebases
+        self.ownTablebases = False
+        useTablebases = self.settings.get("USE_TABLEBASES", SmartMoveFinder.USE_TABLEBASES)
+        if useTablebases != SmartMoveFinder.USE_TABLEBASES:
+            self.tablebases = Tablebase.Tablebases() if useTablebases else None
+            self.ownTablebases = useTablebases
+        self.nodes = 0
+        self.seconds = 0.0
+
+    def move(self, gs, valid_moves):
+        saved = {key: getattr(SmartMoveFinder, key) for key in self.settings}
+        savedTable, savedOrderer = SmartMoveFinder.transpositionTable, SmartMoveFinder.moveOrderer
+        savedTablebases = SmartMoveFinder.tablebases
+        for key, value in self.settings.items():
+            setattr(SmartMoveFinder, key, value)
+        SmartMoveFinder.transpositionTable, SmartMoveFinder.moveOrderer = self.transpositionTable, self.moveOrderer
+        SmartMoveFinder.tablebases = self.tablebases
+        start = time.perf_counter()
+        try:
+            move = SmartMoveFinder.findBestMoveIterative(gs, valid_moves, self.config["depth"],
+                                                         self.config["movetime"], self.config["nodes"])
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.nodes += SmartMoveFinder.searchNodes
+            SmartMoveFinder.transpositionTable, SmartMoveFinder.moveOrderer = savedTable, savedOrderer
+            SmartMoveFinder.tablebases = savedTablebases
+            for key, value in saved.items():
+                setattr(SmartMoveFinder, key, value)
+        return move
+
+    def close(self):
+        if self.ownTablebases:
+            self.tablebases.close()
+
+
+def insufficientMaterial(board):
+    pieces = [square[1] for row in board for square in row if square != "--" and square[1] != "K"]
+    return not pieces or (len(pieces) == 1 and pieces[0] in "BN")
+
+
+def playGame(index, configs, seed, backend="bitboard", openingPlies=OPENING_PLIES, maxPlies=MAX_PLIES):
+    """
+    Worker side: plays game index of a match. configs[0] has white in even games; both games of a pair open with
+    the same moves, picked with random.Random(seed). Returns a JSON-ready record of the game.
+    """
+    swap = index % 2 == 1
+    players = [Player(configs[0]), Player(configs[1])]
+    white, black = (players[1], players[0]) if swap else (players[0], players[1])
+    gs = Perft.BACKENDS[backend]()
+    rng = random.Random(seed)
+    book = OpeningBook.open_default_book()
+    moves = []
+    seen = {gs.hash: 1}
+    result, termination = "1/2-1/2", "max plies"
+    while len(moves) < maxPlies:
+        valid_moves = gs.get_valid_moves()
+        if not valid_moves:
+            if gs.inCheck:
+                result, termination = ("0-1" if gs.WhiteToMove else "1-0"), "checkmate"
+            else:
+                termination = "stalemate"
+            break
+        if gs.halfmove_clock() >= FIFTY_MOVE_PLIES:
+            termination = "fifty moves"
+            break
+        if insufficientMaterial(gs.board):
+            termination = "insufficient material"
+            break
+        if len(moves) < openingPlies:
+            move = book.pick(gs, rng) if book is not None else None
+            if move is None:
+                move = rng.choice(valid_moves)
+        else:
+            move = (white if gs.WhiteToMove else black).move(gs, valid_moves)
+        moves.append(gs.move_to_san(move))
+        gs.make_move(move)
+        seen[gs.hash] = seen.get(gs.hash, 0) + 1
+        if seen[gs.hash] >= 3:
+            termination = "repetition"
+            break
+    if book is not None:
+        book.close()
+    for player in players:
+        player.close()
+    a, b = players
+    return {"index": index, "white": 1 if swap else 0, "result": result, "termination": termination,
+            "moves": moves, "nodes": [a.nodes, b.nodes], "seconds": [round(a.seconds, 4), round(b.seconds, 4)]}
+
+
+def pgnGame(game, names, event):
+    white, black = names[game["white"]], names[1 - game["white"]]
+    lines = [f'[Event "{event}"]', '[Site "?"]', f'[Round "{game["index"] + 1}"]',
+             f'[White "{white}"]', f'[Black "{black}"]', f'[Result "{game["result"]}"]',
+             f'[Termination "{game["termination"]}"]', ""]
+    tokens = []
+    for ply, text in enumerate(game["moves"]):
+        tokens.append(f"{ply // 2 + 1}. {text}" if ply % 2 == 0 else text)
+    tokens.append(game["result"])
+    line = ""
+    for token in tokens:
+        if line and len(line) + len(token) + 1 > 80:
+            lines.append(line)
+            line = token
+        else:
+            line = f"{line} {token}" if line else token
+    lines.append(line)
+    return "\n".join(lines) + "\n\n"
+
+
+def eloFromScore(score):
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+def eloEstimate(wins, draws, losses):
+    """
+    (elo, margin): the Elo difference implied by the score, and half the width of its 95% confidence interval,
+    from the per-game variance of the results.
+    """
+    games = wins + draws + losses
+    if games == 0:
+        return 0.0, 0.0
+    score = (wins + draws / 2) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    error = ELO_Z * math.sqrt(variance / games)
+    margin = (eloFromScore(score + error) - eloFromScore(score - error)) / 2
+    return eloFromScore(score), margin
+
+
+def summarize(configs, games, seconds, backend):
+    """
+    The match so far from the first configuration's point of view, as a JSON-ready dict.
+    """
+    wins = draws = losses = 0
+    terminations = {}
+    nodes = [0, 0]
+    searchSeconds = [0.0, 0.0]
+    for game in games:
+        if game["result"] == "1/2-1/2":
+            draws += 1
+        elif (game["result"] == "1-0") == (game["white"] == 0):
+            wins += 1
+        else:
+            losses += 1
+        terminations[game["termination"]] = terminations.get(game["termination"], 0) + 1
+        for side in (0, 1):
+            nodes[side] += game["nodes"][side]
+            searchSeconds[side] += game["seconds"][side]
+    elo, margin = eloEstimate(wins, draws, losses)
+    count = len(games)
+    return {"engines": [configName(config) for config in configs], "backend": backend,
+            "python": platform.python_version(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "games": count, "wins": wins, "draws": draws, "losses": losses,
+            "score": round((wins + draws / 2) / count, 4) if count else 0.0,
+            "elo": round(elo, 1), "eloMargin": round(margin, 1), "terminations": terminations,
+            "seconds": round(seconds, 2), "gamesPerSecond": round(count / seconds, 4) if seconds > 0 else 0.0,
+            "averagePlies": round(sum(len(game["moves"]) for game in games) / count, 1) if count else 0.0,
+            "nps": [int(nodes[side] / searchSeconds[side]) if searchSeconds[side] > 0 else 0 for side in (0, 1)],
+            "nodes": nodes}
+
+
+def runMatch(configs, games, processes=4, pgnPath=None, jsonPath=None, seed=0, backend="bitboard",
+             openingPlies=OPENING_PLIES, maxPlies=MAX_PLIES, progress=None):
+    """
+    Plays games games between configs[0] and configs[1] and returns the final summary. progress(summary) is
+    called after every game.
+    """
+    names = [configName(config) for config in configs]
+    event = f"{names[0]} vs {names[1]}"
+    finished = []
+    start = time.perf_counter()
+    pgn = open(pgnPath, "w") if pgnPath else None
+    summary = summarize(configs, finished, 0.0, backend)
+    book = OpeningBook.open_default_book()  # built here once rather than by every worker
+    if book is not None:
+        book.close()
+    try:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = [pool.submit(playGame, index, configs, seed * 1000003 + index // 2, backend, openingPlies,
+                                   maxPlies) for index in range(games)]
+            for future in as_completed(futures):
+                game = future.result()
+                finished.append(game)
+                if pgn is not None:
+                    pgn.write(pgnGame(game, names, event))
+                    pgn.flush()
+                summary = summarize(configs, finished, time.perf_counter() - start, backend)
+                if jsonPath:
+                    with open(jsonPath, "w") as f:
+                        json.dump(summary, f, indent=2)
+                if progress is not None:
+                    progress(summary)
+    finally:
+        if pgn is not None:
+            pgn.close()
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Self-play match between two engine configurations")
+    parser.add_argument("--a", default="", help='first engine, e.g. "depth=3,nodes=20000"')
+    parser.add_argument("--b", default="", help='second engine, e.g. "depth=3,USE_QUIESCENCE=False"')
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--opening-plies", type=int, default=OPENING_PLIES)
+    parser.add_argument("--max-plies", type=int, default=MAX_PLIES)
+    parser.add_argument("--backend", choices=sorted(Perft.BACKENDS), default="bitboard")
+    parser.add_argument("--pgn", default="selfplay.pgn")
+    parser.add_argument("--json", default="selfplay.json")
+    args = parser.parse_args()
+
+    configs = [parseConfig(args.a), parseConfig(args.b)]
+
+    def progress(summary):
+        print(f"\r{summary['games']}/{args.games}  +{summary['wins']} ={summary['draws']} -{summary['losses']}  "
+              f"elo {summary['elo']:+.1f} +/- {summary['eloMargin']:.1f}  "
+              f"{summary['gamesPerSecond']} games/s", end="", flush=True)
+
+    summary = runMatch(configs, args.games, args.processes, args.pgn, args.json, args.seed, args.backend,
+                       args.opening_plies, args.max_plies, progress)
+    print()
+    print(f"{summary['engines'][0]} vs {summary['engines'][1]}: score {summary['score']}, "
+          f"elo {summary['elo']:+.1f} +/- {summary['eloMargin']:.1f}, nps {summary['nps'][0]} / {summary['nps'][1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,70 +1,70 @@
 import random
+import time
+from Chess import TranspositionTable as tt
+from Chess import Tablebase
+from Chess.MoveOrdering import MoveOrderer, StagedMoves, MAX_PLY
+from Chess.ChessEngine import pieceScores, piecePositionScores
 
 nextMove = None
 
-knightScores = [[1, 1, 1, 1, 1, 1, 1, 1],
-                [1, 2, 2, 2, 2, 2, 2, 1],
-                [1, 2, 3, 3, 3, 3, 2, 1],
-                [1, 2, 3, 4, 4, 3, 2, 1],
-                [1, 2, 3, 4, 4, 3, 2, 1],
-                [1, 2, 3, 3, 3, 3, 2, 1],
-                [1, 2, 2, 2, 2, 2, 2, 1],
-                [1, 1, 1, 1, 1, 1, 1, 1]]
-
-bishopScores = [[4, 3, 2, 1, 1, 2, 3, 4],
-                [3, 4, 3, 2, 2, 3, 4, 3],
-                [2, 3, 4, 3, 3, 4, 3, 2],
-                [1, 2, 3, 4, 4, 3, 2, 1],
-                [1, 2, 3, 4, 4, 3, 2, 1],
-                [2, 3, 4, 3, 3, 4, 3, 2],
-                [3, 4, 3, 2, 2, 3, 4, 3],
-                [4, 3, 2, 1, 1, 2, 3, 4]]
-
-queenScores = [[1, 1, 1, 3, 1, 1, 1, 1],
-               [1, 2, 3, 3, 3, 3, 1, 1],
-               [1, 4, 3, 3, 3, 4, 2, 1],
-               [1, 2, 3, 3, 3, 2, 2, 1],
-               [1, 2, 3, 3, 3, 2, 2, 1],
-               [1, 4, 3, 3, 3, 4, 2, 1],
-               [1, 1, 2, 3, 3, 1, 1, 1],
-               [1, 1, 1, 3, 1, 1, 1, 1]]
-
-rookScores = [[4, 3, 4, 4, 4, 4, 3, 4],
-              [4, 4, 4, 4, 4, 4, 4, 4],
-              [1, 1, 2, 3, 3, 2, 1, 1],
-              [1, 2, 3, 4, 4, 3, 2, 1],
-              [1, 2, 3, 4, 4, 3, 2, 1],
-              [1, 1, 2, 2, 2, 2, 1, 1],
-              [4, 4, 4, 4, 4, 4, 4, 4],
-              [4, 3, 4, 4, 4, 4, 3, 4]]
-
-whitePawnScores = [[8, 8, 8, 8, 8, 8, 8, 8],
-                   [8, 8, 8, 8, 8, 8, 8, 8],
-                   [5, 6, 6, 7, 7, 6, 6, 5],
-                   [2, 3, 3, 5, 5, 3, 3, 2],
-                   [1, 2, 3, 4, 4, 3, 2, 1],
-                   [1, 1, 2, 3, 3, 2, 1, 1],
-                   [1, 1, 1, 0, 0, 1, 1, 1],
-                   [0, 0, 0, 0, 0, 0, 0, 0]]
-
-blackPawnScores = [[0, 0, 0, 0, 0, 0, 0, 0],
-                   [1, 1, 1, 0, 0, 1, 1, 1],
-                   [1, 1, 2, 3, 3, 2, 1, 1],
-                   [1, 2, 3, 4, 4, 3, 2, 1],
-                   [2, 3, 3, 5, 5, 3, 3, 2],
-                   [5, 6, 6, 7, 7, 6, 6, 5],
-                   [8, 8, 8, 8, 8, 8, 8, 8],
-                   [8, 8, 8, 8, 8, 8, 8, 8]]
-
-piecePositionScores = {"wN": knightScores, "wB": bishopScores, "wR": rookScores,
-                       "wQ": queenScores, "wp": whitePawnScores, "bp": blackPawnScores,
-                       "bN": knightScores[::-1], "bB": bishopScores[::-1],
-                       "bQ": queenScores[::-1], "bR": rookScores[::-1]}
-
-pieceScores = {"K": 0, "Q": 9, "R": 5, "B": 3, "N": 3, "p": 1}
 CHECKMATE = 1000
 STALEMATE = 0
-DEPTH = 3
+DEPTH = 3  # default maximum depth for iterative deepening
+SEARCH_TIME_LIMIT = None  # seconds per move, None for no limit
+SEARCH_NODE_LIMIT = None  # nodes per move, None for no limit
+TIME_CHECK_INTERVAL = 128  # nodes between clock reads
+USE_QUIESCENCE = True
+MAX_QUIESCENCE_DEPTH = 8
+DELTA_MARGIN = 2  # a capture that cannot lift the score to within this of alpha is not searched
+DEBUG_EVALUATION = False  # cross-check the incremental score against a full board scan at every leaf
+TT_SIZE_MB = 16
+TT_POLICY = tt.TWO_TIER
+USE_TABLEBASES = True  # probe Tablebase files, when they have been built, below the root
+SEARCH_THREADS = 1  # processes per search; above 1 the search runs as Lazy SMP over a shared table
+USE_NULL_MOVE = True
+NULL_MOVE_REDUCTION = 2  # the null move is searched this many plies shallower than a real move
+NULL_MOVE_MIN_DEPTH = 3
+NULL_MOVE_VERIFY_MATERIAL = 5  # with this little non-pawn material, a null-move cutoff is checked by a real search
+USE_LMR = True
+LMR_MIN_DEPTH = 3
+LMR_FULL_DEPTH_MOVES = 3  # moves searched at full depth before quiet moves get reduced
+LMR_DEEP_MOVES = 8  # from this move on the reduction is two plies
+USE_FUTILITY = True
+FUTILITY_MARGIN = 2  # at depth 1, a quiet move is skipped when the static score plus this cannot reach alpha
+USE_PVS = True
+USE_ASPIRATION = True
+ASPIRATION_MIN_DEPTH = 3  # shallower iterations use the full window
+ASPIRATION_WINDOW = .5  # half width of the first window around the previous score
+ASPIRATION_GROWTH = 4  # the failing side of the window widens by this factor per re-search
+# Mates score CHECKMATE and tablebase wins TABLEBASE_WIN, each minus the plies to mate from the root, so shorter
+# mates score higher; the two ranges do not overlap
+MATE_IN_MAX_PLY = CHECKMATE - MAX_PLY
+TABLEBASE_WIN = CHECKMATE - 2 * MAX_PLY
+MATE_THRESHOLD = CHECKMATE // 2  # scores beyond this are mates or tablebase wins and are never pruned against
+SCORE_EPSILON = 0.01  # width of a null window
+
+transpositionTable = tt.TranspositionTable(TT_SIZE_MB, TT_POLICY)
+moveOrderer = MoveOrderer()
+tablebases = Tablebase.Tablebases() if USE_TABLEBASES else None
+
+# State of the running search, set up by findBestMoveIterative
+rootDepth = DEPTH
+rootPly = 0
+searchNodes = 0
+searchDeadline = None
+searchNodeBudget = float('inf')
+searchShouldStop = None
+# What the selective search did during the last search, reset by findBestMoveIterative
+searchStats = {"nullMoveSearches": 0, "nullMoveCutoffs": 0, "nullMoveVerifications": 0,
+               "nullMoveVerificationFailures": 0, "lmrReductions": 0, "lmrResearches": 0, "futilityPrunes": 0,
+               "pvsResearches": 0, "aspirationResearches": 0}
+# Triangular PV table: pvTable[ply] is the best line found from the node at that ply
+pvTable = [[] for _ in range(MAX_PLY + 1)]
+searchPV = []  # principal variation of the last completed iteration, starting with the move returned
+
+
+class SearchTimeout(Exception):
+    pass
 
 
 def findRandomMove(valid_moves):
@@ -87,13 +87,12 @@ def findBestMove(gs, valid_moves):
             opponentMaxScore = -CHECKMATE
             for opponentMove in opponentMoves:
                 gs.make_move(opponentMove)
-                gs.get_valid_moves()
-                if gs.checkMate:
+                if gs.has_any_legal_move():
+                    score = -turnMultiplier * gs.material
+                elif gs.inCheck:
                     score = CHECKMATE
-                elif gs.staleMate:
-                    score = STALEMATE
                 else:
-                    score = -turnMultiplier * scoreMaterial(gs.board)
+                    score = STALEMATE
                 if score > opponentMaxScore:
                     opponentMaxScore = score
                 gs.undo_move()
@@ -104,12 +103,136 @@ def findBestMove(gs, valid_moves):
     return bestPlayerMove
 
 
-def findBestMoveMinMax(gs, valid_moves, returnQueue):
-    global nextMove
-    nextMove = None
-    random.shuffle(valid_moves)
-    findMoveNegaMaxAlphaBeta(gs, valid_moves, DEPTH, -CHECKMATE, CHECKMATE, 1 if gs.WhiteToMove else -1)
-    returnQueue.put(nextMove)
+def findBestMoveMinMax(gs, valid_moves, returnQueue, maxDepth=None, timeLimit=None, nodeLimit=None, threads=None):
+    random.shuffle(valid_moves)  # only breaks ties between equally ordered moves
+    maxDepth = DEPTH if maxDepth is None else maxDepth
+    timeLimit = SEARCH_TIME_LIMIT if timeLimit is None else timeLimit
+    nodeLimit = SEARCH_NODE_LIMIT if nodeLimit is None else nodeLimit
+    threads = SEARCH_THREADS if threads is None else threads
+    if threads > 1:
+        from Chess import LazySMP  # imported here, it imports this module
+        returnQueue.put(LazySMP.findBestMoveLazySMP(gs, valid_moves, threads, maxDepth, timeLimit, nodeLimit))
+    else:
+        returnQueue.put(findBestMoveIterative(gs, valid_moves, maxDepth, timeLimit, nodeLimit))
+
+
+"""
+Iterative deepening driver. Searches depth 1, 2, ... up to maxDepth and stops early when the wall-clock or node
+budget runs out, returning the best move of the last completed iteration; searchPV holds its principal variation.
+Each iteration searches the previous principal variation first. From ASPIRATION_MIN_DEPTH on it starts with a
+window around the previous score, widening whichever side fails until the score lands inside.
+onIteration(depth, score, nodes, seconds, move) is called after every completed iteration, and shouldStop() is
+polled alongside the clock so another thread or process can end the search cooperatively.
+"""
+
+
+def findBestMoveIterative(gs, valid_moves, maxDepth=DEPTH, timeLimit=None, nodeLimit=None, onIteration=None,
+                          shouldStop=None):
+    global nextMove, rootDepth, rootPly, searchNodes, searchDeadline, searchNodeBudget, searchShouldStop, searchPV
+    startTime = time.perf_counter()
+    searchShouldStop = shouldStop
+    searchDeadline = None if timeLimit is None else startTime + timeLimit
+    searchNodeBudget = float('inf') if nodeLimit is None else nodeLimit
+    searchNodes = 0
+    searchStats.update(dict.fromkeys(searchStats, 0))
+    rootPly = len(gs.moveLog)
+    moveOrderer.newSearch()
+    turnMultiplier = 1 if gs.WhiteToMove else -1
+    rootMoves = list(valid_moves)
+    bestMove = None
+    searchPV = []
+    score = 0
+    for depth in range(1, maxDepth + 1):
+        rootDepth = depth
+        window = ASPIRATION_WINDOW
+        alpha, beta = -CHECKMATE, CHECKMATE
+        if USE_ASPIRATION and depth >= ASPIRATION_MIN_DEPTH and abs(score) < MATE_THRESHOLD:
+            alpha, beta = score - window, score + window
+        try:
+            while True:
+                nextMove = None
+                score = findMoveNegaMaxAlphaBeta(gs, rootMoves, depth, alpha, beta, turnMultiplier)
+                if score <= alpha and alpha > -CHECKMATE:
+                    window *= ASPIRATION_GROWTH
+                    alpha = max(score - window, -CHECKMATE)
+                elif score >= beta and beta < CHECKMATE:
+                    window *= ASPIRATION_GROWTH
+                    beta = min(score + window, CHECKMATE)
+                    if nextMove is not None:
+                        # The move that failed high goes first in the re-search
+                        rootMoves.remove(nextMove)
+                        rootMoves.insert(0, nextMove)
+                else:
+                    break
+                searchStats["aspirationResearches"] += 1
+        except SearchTimeout:
+            # The search unwound without undoing its moves
+            while len(gs.moveLog) > rootPly:
+                gs.undo_move()
+            if bestMove is None:
+                bestMove = nextMove
+            break
+        if nextMove is None:
+            break
+        bestMove = nextMove
+        rootMoves.remove(bestMove)
+        rootMoves.insert(0, bestMove)
+        searchPV = extendedPV(gs, bestMove, depth)
+        if onIteration is not None:
+            onIteration(depth, score, searchNodes, time.perf_counter() - startTime, bestMove)
+        if abs(score) >= MATE_IN_MAX_PLY:
+            break
+    searchDeadline = None
+    searchNodeBudget = float('inf')
+    searchShouldStop = None
+    if bestMove is None and len(rootMoves) > 0:
+        bestMove = rootMoves[0]
+    return bestMove
+
+
+def extendedPV(gs, bestMove, depth):
+    """
+    The root line of the PV table, continued through the transposition table where a cutoff cut it short.
+    """
+    line = list(pvTable[0]) if pvTable[0] and pvTable[0][0] == bestMove else [bestMove]
+    for move in line:
+        gs.make_move(move)
+    tail = principalVariation(gs, depth - len(line))
+    for _ in line:
+        gs.undo_move()
+    return line + tail
+
+
+def checkSearchBudget():
+    if searchNodes >= searchNodeBudget:
+        raise SearchTimeout()
+    if searchNodes % TIME_CHECK_INTERVAL == 0:
+        if searchDeadline is not None and time.perf_counter() >= searchDeadline:
+            raise SearchTimeout()
+        if searchShouldStop is not None and searchShouldStop():
+            raise SearchTimeout()
+
+
+def principalVariation(gs, maxLength=MAX_QUIESCENCE_DEPTH + DEPTH):
+    """
+    Follows hash moves through the transposition table from gs, checking each is legal, and returns them as a list.
+    Stops at a missing entry, an illegal move or a repeated position; gs is left unchanged.
+    """
+    pv = []
+    seen = set()
+    while len(pv) < maxLength and gs.hash not in seen:
+        seen.add(gs.hash)
+        entry = transpositionTable.probe(gs.hash)
+        if entry is None or entry[3] < 0:
+            break
+        move = next((move for move in gs.get_valid_moves() if move.move_id == entry[3]), None)
+        if move is None:
+            break
+        gs.make_move(move)
+        pv.append(move)
+    for _ in pv:
+        gs.undo_move()
+    return pv
 
 
 def findMoveMinMax(gs, valid_moves, depth, WhiteToMove):
@@ -144,14 +267,23 @@ def findMoveMinMax(gs, valid_moves, depth, WhiteToMove):
 
 
 def scoreBoard(gs):
-    if gs.checkMate:
-        if gs.WhiteToMove:
-            return -CHECKMATE
-        else:
-            return CHECKMATE
-    elif gs.staleMate:
+    if not gs.has_any_legal_move():
+        if gs.inCheck:
+            return -CHECKMATE if gs.WhiteToMove else CHECKMATE
         return STALEMATE
+    return evaluatePosition(gs)
 
+
+def evaluatePosition(gs):
+    score = gs.material + gs.positional * .1
+    if DEBUG_EVALUATION:
+        fullScore = fullEvaluation(gs)
+        if abs(score - fullScore) > 1e-6:
+            raise AssertionError(f"Incremental evaluation {score} differs from full recompute {fullScore}")
+    return score
+
+
+def fullEvaluation(gs):
     score = 0
     for row in range(len(gs.board)):
         for col in range(len(gs.board[row])):
@@ -184,28 +316,232 @@ def findMoveNegaMax(gs, valid_moves, depth, turnMultiplier):
     return maxScore
 
 
-def findMoveNegaMaxAlphaBeta(gs, valid_moves, depth, alpha, beta, turnMultiplier, promotion_piece="Q"):
-    global nextMove
+"""
+Alpha-beta search with three selective features below the root, each switched by its USE_ setting:
+- Null-move pruning: if passing the turn still fails high at reduced depth, the node is cut. Never in check,
+  twice in a row, or with only pawns left; with little other material the cutoff must be confirmed by a real
+  reduced-depth search, since zugzwang makes passing better than any move.
+- Late-move reductions: quiet moves late in the ordering are searched a ply or two shallower with a null window
+  and re-searched at full depth if they beat alpha anyway.
+- Futility pruning: at depth 1, quiet moves that do not give check are skipped when the static score plus
+  FUTILITY_MARGIN cannot reach alpha.
+searchStats counts how often each one fired. ply is the distance from the root, null moves included, since they
+are not in moveLog; it indexes the killer and PV tables.
+"""
+
+
+def findMoveNegaMaxAlphaBeta(gs, valid_moves, depth, alpha, beta, turnMultiplier, promotion_piece="Q",
+                             allowNull=True, ply=0):
+    global nextMove, searchNodes
+    searchNodes += 1
+    checkSearchBudget()
+    pvTable[ply] = []
+    if tablebases and gs.pieceCount == Tablebase.PIECES and depth != rootDepth:
+        result = tablebases.probe(gs)
+        if result is not None:
+            return tablebaseScore(result, ply)
+    alphaOrig = alpha
+    entry = transpositionTable.probe(gs.hash)
+    hashMoveId = -1
+    if entry is not None:
+        ttDepth, ttScore, ttBound, hashMoveId = entry
+        ttScore = scoreFromTable(ttScore, ply)
+        # Never cut at the root, it has to set nextMove
+        if ttDepth >= depth and depth != rootDepth:
+            if ttBound == tt.EXACT:
+                return ttScore
+            elif ttBound == tt.LOWER:
+                alpha = max(alpha, ttScore)
+            else:
+                beta = min(beta, ttScore)
+            if alpha >= beta:
+                return ttScore
     if depth == 0:
-        return turnMultiplier * scoreBoard(gs)
+        if USE_QUIESCENCE:
+            return quiescenceSearch(gs, alpha, beta, turnMultiplier, 0, ply)
+        return mateFromRoot(turnMultiplier * scoreBoard(gs), ply)
+    isRoot = depth == rootDepth
+    inCheck = not isRoot and gs.is_in_check()
+    if USE_NULL_MOVE and allowNull and not isRoot and not inCheck and depth >= NULL_MOVE_MIN_DEPTH and \
+            abs(beta) < MATE_THRESHOLD:
+        material = gs.nonPawnMaterial['w' if gs.WhiteToMove else 'b']
+        if material > 0:
+            searchStats["nullMoveSearches"] += 1
+            gs.make_null_move()
+            try:
+                score = -findMoveNegaMaxAlphaBeta(gs, None, depth - 1 - NULL_MOVE_REDUCTION, -beta,
+                                                  -beta + SCORE_EPSILON, -turnMultiplier, allowNull=False, ply=ply + 1)
+            finally:
+                gs.undo_null_move()
+            if score >= beta:
+                if material <= NULL_MOVE_VERIFY_MATERIAL:
+                    searchStats["nullMoveVerifications"] += 1
+                    score = findMoveNegaMaxAlphaBeta(gs, None, depth - NULL_MOVE_REDUCTION, beta - SCORE_EPSILON,
+                                                     beta, turnMultiplier, allowNull=False, ply=ply)
+                    if score < beta:
+                        searchStats["nullMoveVerificationFailures"] += 1
+                if score >= beta:
+                    searchStats["nullMoveCutoffs"] += 1
+                    return beta
+            pvTable[ply] = []  # a verification search ran at this same node
+    futile = False
+    if USE_FUTILITY and depth == 1 and not isRoot and not inCheck and abs(alpha) < MATE_THRESHOLD:
+        futilityScore = turnMultiplier * evaluatePosition(gs) + FUTILITY_MARGIN
+        futile = futilityScore <= alpha
+    if hashMoveId < 0 and ply < len(searchPV) and len(gs.moveLog) - rootPly == ply and \
+            all(gs.moveLog[rootPly + i] == searchPV[i] for i in range(ply)):
+        hashMoveId = searchPV[ply].move_id  # still on the previous iteration's PV
+    # The root gets its moves from the caller; every other node generates them lazily in stages
+    staged = None
+    if valid_moves is None:
+        staged = StagedMoves(gs, moveOrderer, ply, hashMoveId)
+        valid_moves = staged
+    elif len(valid_moves) == 0:
+        return mateFromRoot(turnMultiplier * scoreBoard(gs), ply)
+    else:
+        valid_moves = moveOrderer.orderMoves(valid_moves, ply, hashMoveId)
     maxScore = -CHECKMATE
-    for move in valid_moves:
+    bestMove = None
+    pruned = False
+    for moveIndex, move in enumerate(valid_moves):
         gs.make_move(move, promotion_piece)
-        nextMoves = gs.get_valid_moves()
-        score = -findMoveNegaMaxAlphaBeta(gs, nextMoves, depth - 1, -beta, -alpha, -turnMultiplier)
-        if score > maxScore:
-            maxScore = score
-            if depth == DEPTH:
+        quiet = not move.isCapture and not move.pawn_promotion
+        reduction = 0
+        if quiet and not inCheck and (futile or (USE_LMR and not isRoot and depth >= LMR_MIN_DEPTH and
+                                                 moveIndex >= LMR_FULL_DEPTH_MOVES)):
+            if gs.is_in_check():
+                pass  # checks are neither pruned nor reduced
+            elif futile:
+                gs.undo_move()
+                searchStats["futilityPrunes"] += 1
+                pruned = True
+                maxScore = max(maxScore, futilityScore)
+                continue
+            else:
+                reduction = min(1 if moveIndex < LMR_DEEP_MOVES else 2, depth - 1)
+        # Scouts use a null window above alpha; only a move that lands inside the window is searched in full
+        searched = False
+        if reduction:
+            searchStats["lmrReductions"] += 1
+            score = -findMoveNegaMaxAlphaBeta(gs, None, depth - 1 - reduction, -alpha - SCORE_EPSILON, -alpha,
+                                              -turnMultiplier, ply=ply + 1)
+            searched = score <= alpha
+            if not searched:
+                searchStats["lmrResearches"] += 1
+        if not searched and USE_PVS and bestMove is not None and beta - alpha > 2 * SCORE_EPSILON:
+            score = -findMoveNegaMaxAlphaBeta(gs, None, depth - 1, -alpha - SCORE_EPSILON, -alpha, -turnMultiplier,
+                                              ply=ply + 1)
+            searched = score <= alpha or score >= beta
+            if not searched:
+                searchStats["pvsResearches"] += 1
+        if not searched:
+            score = -findMoveNegaMaxAlphaBeta(gs, None, depth - 1, -beta, -alpha, -turnMultiplier, ply=ply + 1)
+        if alpha < score < beta and ply < MAX_PLY:
+            pvTable[ply] = [move] + pvTable[ply + 1]
+        if score > maxScore or bestMove is None:
+            maxScore = max(maxScore, score)
+            bestMove = move
+            if depth == rootDepth:
                 nextMove = move
-                print(move, score)
         gs.undo_move()
         if maxScore > alpha:
             alpha = maxScore
         if alpha >= beta:
+            moveOrderer.recordCutoff(move, ply, depth, moveIndex)
             break
+    if staged is not None:
+        moveOrderer.recordStagedNode(staged)
+        if bestMove is None and not pruned:
+            return -CHECKMATE + ply if staged.inCheck else STALEMATE
+    if maxScore <= alphaOrig:
+        bound = tt.UPPER
+    elif maxScore >= beta:
+        bound = tt.LOWER
+    else:
+        bound = tt.EXACT
+    transpositionTable.store(gs.hash, depth, scoreToTable(maxScore, ply), bound, bestMove.move_id if bestMove else -1)
     return maxScore
 
 
+def mateFromRoot(score, ply):
+    """
+    scoreBoard's mate score, which does not know the ply, as a mate that many plies from the root.
+    """
+    return score + ply if score == -CHECKMATE else score
+
+
+def scoreToTable(score, ply):
+    """
+    Mate and tablebase scores count plies from the root, but a table entry can be reached at any ply, so they are
+    stored counting from the node itself. scoreFromTable converts them back on a probe.
+    """
+    if score >= MATE_THRESHOLD:
+        return score + ply
+    if score <= -MATE_THRESHOLD:
+        return score - ply
+    return score
+
+
+def scoreFromTable(score, ply):
+    if score >= MATE_THRESHOLD:
+        return score - ply
+    if score <= -MATE_THRESHOLD:
+        return score + ply
+    return score
+
+
+def tablebaseScore(result, ply):
+    wdl, dtm = result
+    if wdl == Tablebase.WIN:
+        return TABLEBASE_WIN - ply - dtm
+    if wdl == Tablebase.LOSS:
+        return -TABLEBASE_WIN + ply + dtm
+    return STALEMATE
+
+
+"""
+Quiescence search: at the horizon keep searching captures and promotions until the position is quiet, so a leaf is
+never scored in the middle of an exchange. The side to move may stand pat on the static score, and captures that
+cannot bring the score back up to alpha even with DELTA_MARGIN to spare are skipped (delta pruning). In check there
+is no stand pat and every evasion is searched. A position without captures is checked for stalemate before the
+stand pat, with has_any_legal_move rather than a full move list.
+"""
+
+
+def quiescenceSearch(gs, alpha, beta, turnMultiplier, qDepth, ply):
+    global searchNodes
+    searchNodes += 1
+    checkSearchBudget()
+    moves = gs.get_capture_moves()
+    inCheck = gs.inCheck
+    if inCheck:
+        if len(moves) == 0:
+            return -CHECKMATE + ply
+        standPat = bestScore = -CHECKMATE
+    elif len(moves) == 0 and not gs.has_any_legal_move():
+        return STALEMATE  # standing pat would score a stalemate as the static evaluation
+    else:
+        standPat = bestScore = turnMultiplier * evaluatePosition(gs)
+        if standPat >= beta or qDepth >= MAX_QUIESCENCE_DEPTH:
+            return standPat
+        if standPat > alpha:
+            alpha = standPat
+    for move in moveOrderer.orderMoves(moves, ply):
+        if not inCheck and not move.pawn_promotion and \
+                standPat + pieceScores[move.piece_captured[1]] + DELTA_MARGIN <= alpha:
+            continue
+        gs.make_move(move)
+        score = -quiescenceSearch(gs, -beta, -alpha, -turnMultiplier, qDepth + 1, ply + 1)
+        gs.undo_move()
+        if score > bestScore:
+            bestScore = score
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    break
+    return bestScore
+
+
 def scoreMaterial(board):
     score = 0
     for row in board:
@@ -0,0 +1,293 @@
+"""
+Endgame tablebases for king and one piece against a lone king (KQK, KRK, KBK, KNK, KPK), generated by retrograde
+analysis. Every position gets an exact result and a distance to mate in plies. Results are stored on disk as two
+byte arrays per table, WDL and DTM, indexed by side to move and the three squares.
+Probing a position is one index computation and two byte reads from a memory-mapped file; the extra piece is found
+from GameState's running piece count and square sum rather than by looking at the board.
+Tables always have white as the strong side; positions with the extra piece on black are probed mirrored.
+
+    python -m Chess.Tablebase --build KQK KRK KPK
+"""
+
+import argparse
+import mmap
+import os
+import time
+
+from Chess.BitboardEngine import KING_ATTACKS, KNIGHT_ATTACKS, PAWN_ATTACKS, WHITE, \
+    iter_squares, rook_attacks, bishop_attacks
+
+TABLEBASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tablebases")
+TABLES = ("KQK", "KRK", "KBK", "KNK", "KPK")
+DEPENDENCIES = {"KPK": ("KQK",)}  # pawns promote to a queen
+PIECES = 3  # both kings and the extra piece
+
+# WDL values, from the side to move's point of view
+ILLEGAL, DRAW, WIN, LOSS = 0, 1, 2, 3
+
+SIZE = 2 * 64 * 64 * 64
+
+
+def index(stm, wk, bk, x):
+    # stm 0 is white to move; squares as in BitboardEngine, 0 = a8
+    return ((stm * 64 + wk) * 64 + bk) * 64 + x
+
+
+def piece_attacks(piece, sq, occupied):
+    if piece == "Q":
+        return rook_attacks(sq, occupied) | bishop_attacks(sq, occupied)
+    if piece == "R":
+        return rook_attacks(sq, occupied)
+    if piece == "B":
+        return bishop_attacks(sq, occupied)
+    if piece == "N":
+        return KNIGHT_ATTACKS[sq]
+    return PAWN_ATTACKS[WHITE][sq]
+
+
+def is_legal(piece, stm, wk, bk, x):
+    if wk == bk or wk == x or bk == x or KING_ATTACKS[wk] >> bk & 1:
+        return False
+    if piece == "P" and not 8 <= x < 56:
+        return False
+    # With white to move, black must not be in check
+    return stm == 1 or not piece_attacks(piece, x, 1 << wk | 1 << bk) >> bk & 1
+
+
+def successors(piece, stm, wk, bk, x):
+    """
+    Yields (index, None) for moves staying in the table, and (None, piece) for moves leaving it: a promotion
+    ("Q") or the capture of the piece ("").
+    """
+    if stm == 0:
+        for to in iter_squares(KING_ATTACKS[wk] & ~KING_ATTACKS[bk] & ~(1 << x | 1 << bk)):
+            yield index(1, to, bk, x), None
+        occupied = 1 << wk | 1 << bk
+        if piece == "P":
+            if not occupied >> (x - 8) & 1:
+                if x - 8 < 8:
+                    yield None, "Q"
+                else:
+                    yield index(1, wk, bk, x - 8), None
+                    if x >= 48 and not occupied >> (x - 16) & 1:
+                        yield index(1, wk, bk, x - 16), None
+        else:
+            for to in iter_squares(piece_attacks(piece, x, occupied) & ~occupied):
+                yield index(1, wk, bk, to), None
+    else:
+        # The black king may not step next to the white king or onto a square the piece covers once it has moved
+        attacked = KING_ATTACKS[wk] | piece_attacks(piece, x, 1 << wk)
+        for to in iter_squares(KING_ATTACKS[bk] & ~attacked):
+            if to == x:
+                yield None, ""
+            else:
+                yield index(0, wk, to, x), None
+
+
+def predecessors(piece, stm, wk, bk, x):
+    """
+    Indices of the positions that reach this one in one move, found by unmaking moves.
+    """
+    if stm == 1:
+        occupied = 1 << wk | 1 << bk | 1 << x
+        for frm in iter_squares(KING_ATTACKS[wk] & ~KING_ATTACKS[bk] & ~occupied):
+            if is_legal(piece, 0, frm, bk, x):
+                yield index(0, frm, bk, x)
+        if piece == "P":
+            if x + 8 < 56 and not occupied >> (x + 8) & 1 and is_legal(piece, 0, wk, bk, x + 8):
+                yield index(0, wk, bk, x + 8)
+                if 32 <= x < 40 and not occupied >> (x + 16) & 1 and is_legal(piece, 0, wk, bk, x + 16):
+                    yield index(0, wk, bk, x + 16)
+        elif piece != "N":
+            # Sliders move both ways along the same open lines
+            for frm in iter_squares(piece_attacks(piece, x, occupied) & ~occupied):
+                if is_legal(piece, 0, wk, bk, frm):
+                    yield index(0, wk, bk, frm)
+        else:
+            for frm in iter_squares(KNIGHT_ATTACKS[x] & ~occupied):
+                if is_legal(piece, 0, wk, bk, frm):
+                    yield index(0, wk, bk, frm)
+    else:
+        occupied = 1 << wk | 1 << bk | 1 << x
+        for frm in iter_squares(KING_ATTACKS[bk] & ~KING_ATTACKS[wk] & ~occupied):
+            yield index(1, wk, frm, x)
+
+
+def generate(name, dependencies=None):
+    """
+    Retrograde analysis of one table. Positions with no moves are seeded as mates or stalemates, then results are
+    propagated backwards one ply at a time: a position with a move into a lost position is won, and a position
+    all of whose moves lead to won positions is lost. Whatever is left unresolved is a draw.
+    Returns (wdl, dtm) bytearrays.
+    """
+    piece = name[1]
+    wdl = bytearray(SIZE)
+    dtm = bytearray(SIZE)
+    remaining = bytearray(SIZE)  # moves of each position not yet known to lose
+    settled = bytearray(SIZE)
+    frontier = {}  # ply -> positions whose result becomes final at that distance
+    legal = []
+    for stm in (0, 1):
+        for wk in range(64):
+            for bk in range(64):
+                for x in range(64):
+                    if not is_legal(piece, stm, wk, bk, x):
+                        continue
+                    i = index(stm, wk, bk, x)
+                    legal.append(i)
+                    count = 0
+                    drawn = promotes = False
+                    for child, leaving in successors(piece, stm, wk, bk, x):
+                        if child is not None:
+                            count += 1
+                        elif leaving == "":
+                            drawn = True  # capturing the last piece
+                        else:
+                            childWdl, childDtm = dependencies["KQK"].lookup(1, wk, bk, x - 8)
+                            if childWdl == LOSS:
+                                frontier.setdefault(childDtm + 1, []).append((i, WIN))
+                                promotes = True
+                            elif childWdl == DRAW:
+                                drawn = True
+                    if count == 0 and not drawn and not promotes:
+                        inCheck = stm == 1 and piece_attacks(piece, x, 1 << wk | 1 << bk) >> bk & 1
+                        if inCheck:
+                            frontier.setdefault(0, []).append((i, LOSS))
+                        else:
+                            wdl[i] = DRAW
+                    # A draw or a winning promotion keeps the count above zero, so the position is never lost
+                    remaining[i] = count + drawn + promotes
+    ply = 0
+    while ply <= max(frontier, default=-1):
+        for i, result in frontier.pop(ply, ()):
+            if settled[i]:
+                continue  # reached sooner by another line
+            settled[i] = 1
+            wdl[i] = result
+            dtm[i] = ply
+            x = i & 63
+            bk = i >> 6 & 63
+            wk = i >> 12 & 63
+            stm = i >> 18
+            for parent in predecessors(piece, stm, wk, bk, x):
+                if wdl[parent] != ILLEGAL:
+                    continue
+                if result == LOSS:
+                    wdl[parent] = WIN
+                    dtm[parent] = ply + 1
+                    frontier.setdefault(ply + 1, []).append((parent, WIN))
+                else:
+                    remaining[parent] -= 1
+                    if remaining[parent] == 0:
+                        wdl[parent] = LOSS
+                        dtm[parent] = ply + 1
+                        frontier.setdefault(ply + 1, []).append((parent, LOSS))
+        ply += 1
+    for i in legal:
+        if wdl[i] == ILLEGAL:
+            wdl[i] = DRAW
+    return wdl, dtm
+
+
+class Table:
+    def __init__(self, name, directory=TABLEBASE_DIR):
+        self.name = name
+        self.files = []
+        self.wdl = self.map(os.path.join(directory, name + ".wdl"))
+        self.dtm = self.map(os.path.join(directory, name + ".dtm"))
+
+    def map(self, path):
+        f = open(path, "rb")
+        self.files.append(f)
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def lookup(self, stm, wk, bk, x):
+        i = index(stm, wk, bk, x)
+        return self.wdl[i], self.dtm[i]
+
+    def close(self):
+        self.wdl.close()
+        self.dtm.close()
+        for f in self.files:
+            f.close()
+
+
+def build(names, directory=TABLEBASE_DIR):
+    os.makedirs(directory, exist_ok=True)
+    for name in names:
+        dependencies = {}
+        for dependency in DEPENDENCIES.get(name, ()):
+            if not os.path.exists(os.path.join(directory, dependency + ".wdl")):
+                build([dependency], directory)
+            dependencies[dependency] = Table(dependency, directory)
+        start = time.perf_counter()
+        wdl, dtm = generate(name, dependencies)
+        for table in dependencies.values():
+            table.close()
+        with open(os.path.join(directory, name + ".wdl"), "wb") as f:
+            f.write(wdl)
+        with open(os.path.join(directory, name + ".dtm"), "wb") as f:
+            f.write(dtm)
+        wins = sum(1 for i in range(SIZE // 2) if wdl[i] == WIN)
+        print(f"{name}: {wins} white-to-move wins, longest mate {max(dtm)} plies, "
+              f"{time.perf_counter() - start:.1f}s")
+
+
+class Tablebases:
+    """
+    Every table found in directory. probe(gs) answers for the side to move of gs or returns None.
+    """
+
+    def __init__(self, directory=TABLEBASE_DIR):
+        self.tables = {}
+        for name in TABLES:
+            if os.path.exists(os.path.join(directory, name + ".wdl")):
+                self.tables[name[1]] = Table(name, directory)
+        self.probes = 0
+        self.hits = 0
+
+    def __bool__(self):
+        return bool(self.tables)
+
+    def probe(self, gs):
+        """
+        (wdl, dtm) for the side to move, or None when the position is not covered.
+        """
+        # With a lone king on one side en passant is never possible, so the square can be ignored
+        if gs.pieceCount != PIECES:
+            return None
+        self.probes += 1
+        x = gs.nonKingSquareSum
+        square = gs.board[x >> 3][x & 7]
+        strong, piece = square[0], square[1].upper()
+        table = self.tables.get(piece)
+        if table is None:
+            return None
+        wk = gs.WhiteKingLocation[0] * 8 + gs.WhiteKingLocation[1]
+        bk = gs.BlackKingLocation[0] * 8 + gs.BlackKingLocation[1]
+        stm = 0 if gs.WhiteToMove else 1
+        if strong == "b":
+            # Mirror top to bottom and swap colors
+            wk, bk, x, stm = bk ^ 56, wk ^ 56, x ^ 56, 1 - stm
+        result = table.lookup(stm, wk, bk, x)
+        if result[0] == ILLEGAL:
+            return None
+        self.hits += 1
+        return result
+
+    def close(self):
+        for table in self.tables.values():
+            table.close()
+        self.tables = {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Endgame tablebase generator")
+    parser.add_argument("--build", nargs="+", choices=TABLES, default=TABLES)
+    parser.add_argument("--dir", default=TABLEBASE_DIR)
+    args = parser.parse_args()
+    build(args.build, args.dir)
+
+
+if __name__ == "__main__":
+    main()
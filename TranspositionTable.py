@@ -0,0 +1,115 @@
+"""
+Fixed-size transposition table keyed by GameState.hash.
+Entries live in one preallocated array of unsigned 64-bit words instead of a dict of objects, so the memory
+budget is exact and a table with millions of entries costs 16 bytes per entry.
+"""
+
+from array import array
+
+EXACT = 0
+LOWER = 1  # fail-high: the real score is at least the stored score
+UPPER = 2  # fail-low: the real score is at most the stored score
+
+# Replacement policies
+TWO_TIER = "two-tier"  # slot 0 of each bucket is depth-preferred, slot 1 is always-replace
+DEPTH_PREFERRED = "depth-preferred"
+ALWAYS_REPLACE = "always-replace"
+
+SCORE_SCALE = 100  # scores are floats with 0.01 resolution, stored as fixed point
+SCORE_OFFSET = 1 << 31
+WORDS_PER_ENTRY = 2
+ENTRIES_PER_BUCKET = 2
+BUCKET_WORDS = WORDS_PER_ENTRY * ENTRIES_PER_BUCKET
+
+"""
+Entry layout: word 0 is key ^ data, word 1 is data, so a torn or foreign entry fails the key check.
+data bits  0-15: move_id + 1 (0 means no move)
+data bits 16-23: depth
+data bits 24-25: bound
+data bits 32-63: score * SCORE_SCALE + SCORE_OFFSET
+"""
+
+
+def pack_entry(depth, score, bound, move_id):
+    return ((move_id + 1) | depth << 16 | bound << 24 |
+            (int(round(score * SCORE_SCALE)) + SCORE_OFFSET) << 32)
+
+
+def unpack_entry(data):
+    return ((data >> 16) & 0xFF, ((data >> 32) - SCORE_OFFSET) / SCORE_SCALE,
+            (data >> 24) & 0x3, (data & 0xFFFF) - 1)
+
+
+class TranspositionTable:
+    def __init__(self, size_mb=16, policy=TWO_TIER, table=None):
+        if policy not in (TWO_TIER, DEPTH_PREFERRED, ALWAYS_REPLACE):
+            raise ValueError(f"Unknown replacement policy: {policy}")
+        self.policy = policy
+        if table is None:
+            words = max(BUCKET_WORDS, size_mb * 1024 * 1024 // 8)
+            buckets = 1 << ((words // BUCKET_WORDS).bit_length() - 1)  # power of two for masking
+            table = array('Q', bytes(buckets * BUCKET_WORDS * 8))
+        self.table = table
+        self.bucket_mask = len(table) // BUCKET_WORDS - 1
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    def __len__(self):
+        return len(self.table) // WORDS_PER_ENTRY
+
+    def clear(self):
+        self.table[:] = array('Q', bytes(len(self.table) * 8))
+        self.probes = self.hits = self.stores = 0
+
+    def probe(self, key):
+        """
+        Returns (depth, score, bound, move_id) for key, or None. move_id is -1 when no move was stored.
+        """
+        self.probes += 1
+        table = self.table
+        i = (key & self.bucket_mask) * BUCKET_WORDS
+        for slot in (i, i + WORDS_PER_ENTRY):
+            data = table[slot + 1]
+            if data and table[slot] ^ data == key:
+                self.hits += 1
+                return unpack_entry(data)
+        return None
+
+    def holds(self, slot, key):
+        data = self.table[slot + 1]
+        return data != 0 and self.table[slot] ^ data == key
+
+    def store(self, key, depth, score, bound, move_id=-1):
+        table = self.table
+        first = (key & self.bucket_mask) * BUCKET_WORDS
+        second = first + WORDS_PER_ENTRY
+        data = pack_entry(depth, score, bound, move_id)
+        if move_id < 0:
+            # Keep the best move of an earlier search of the same position
+            for slot in (first, second):
+                if self.holds(slot, key):
+                    data = (data & ~0xFFFF) | (table[slot + 1] & 0xFFFF)
+                    break
+        if self.policy == ALWAYS_REPLACE:
+            slot = second if self.holds(second, key) else first
+        else:
+            old = table[first + 1]
+            if not old or self.holds(first, key) or depth >= (old >> 16) & 0xFF:
+                slot = first
+            elif self.policy == DEPTH_PREFERRED:
+                return
+            else:
+                slot = second
+        self.stores += 1
+        table[slot] = key ^ data
+        table[slot + 1] = data
+
+    def usage(self):
+        """
+        Fraction of entries in use, sampled from the first thousand buckets.
+        """
+        sample = min(len(self.table), 1000 * BUCKET_WORDS)
+        used = sum(1 for slot in range(1, sample, WORDS_PER_ENTRY) if self.table[slot])
+        return used / (sample // WORDS_PER_ENTRY)
+
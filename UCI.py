@@ -0,0 +1,163 @@
+"""
+Headless UCI (Universal Chess Interface) front end, so the engine can run under tournament managers and analysis
+tools without pygame:
+
+    python -m Chess.UCI
+
+Supports uci, isready, ucinewgame, position [startpos | fen ...] [moves ...], go [depth | movetime | nodes |
+infinite | wtime/btime/winc/binc/movestogo], stop and quit. The search runs on a worker thread and polls a stop
+flag, so commands keep being answered while it thinks. An info line with depth, score, nodes, nps, time and PV is
+printed after every completed iteration.
+"""
+
+import sys
+import threading
+
+from Chess import SmartMoveFinder, Perft
+
+ENGINE_NAME = "Chess"
+MAX_DEPTH = 64
+MOVES_TO_GO = 30  # assumed moves left in the game when the GUI only gives a clock
+
+
+def uci_move(move):
+    return move.get_chess_notation() + ("q" if move.pawn_promotion else "")
+
+
+def uci_score(score):
+    """
+    "mate N" for a mate or tablebase win, N in moves and negative when the side to move is the one mated;
+    "cp N" for any other score.
+    """
+    if abs(score) >= SmartMoveFinder.MATE_IN_MAX_PLY:
+        plies = SmartMoveFinder.CHECKMATE - abs(score)
+    elif abs(score) >= SmartMoveFinder.MATE_THRESHOLD:
+        plies = SmartMoveFinder.TABLEBASE_WIN - abs(score)
+    else:
+        return f"cp {int(round(score * 100))}"
+    moves = (int(round(plies)) + 1) // 2
+    return f"mate {moves if score > 0 else -moves}"
+
+
+class UCIEngine:
+    def __init__(self, output=sys.stdout, backend="bitboard"):
+        self.output = output
+        self.backend = backend
+        self.outputLock = threading.Lock()
+        self.stopEvent = threading.Event()
+        self.thread = None
+        self.gs = Perft.BACKENDS[backend]()
+
+    def send(self, line):
+        with self.outputLock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    def handle(self, line):
+        """
+        Processes one line of input; returns False on quit.
+        """
+        tokens = line.split()
+        if not tokens:
+            return True
+        command = tokens[0]
+        if command == "uci":
+            self.send(f"id name {ENGINE_NAME}")
+            self.send("id author the Chess authors")
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "ucinewgame":
+            self.stop()
+            SmartMoveFinder.transpositionTable.clear()
+            self.gs = Perft.BACKENDS[self.backend]()
+        elif command == "position":
+            self.stop()
+            self.set_position(tokens[1:])
+        elif command == "go":
+            self.stop()
+            self.go(tokens[1:])
+        elif command == "stop":
+            self.stop()
+        elif command == "quit":
+            self.stop()
+            return False
+        return True
+
+    def set_position(self, tokens):
+        if "moves" in tokens:
+            split = tokens.index("moves")
+            tokens, moves = tokens[:split], tokens[split + 1:]
+        else:
+            moves = []
+        self.gs = Perft.BACKENDS[self.backend]()
+        if tokens and tokens[0] == "fen":
+            try:
+                self.gs.load_fen(" ".join(tokens[1:]))
+            except (ValueError, KeyError, IndexError):
+                self.send(f"info string bad fen {' '.join(tokens[1:])}")
+                self.gs = Perft.BACKENDS[self.backend]()
+                return
+        for text in moves:
+            move = self.gs.parse_move(text)
+            if move is None:
+                self.send(f"info string illegal move {text}")
+                break
+            self.gs.make_move(move)
+
+    def go(self, tokens):
+        options = {}
+        for i, token in enumerate(tokens):
+            if token == "infinite":
+                options[token] = True
+            elif i + 1 < len(tokens) and tokens[i + 1].lstrip("-").isdigit():
+                options[token] = int(tokens[i + 1])
+        maxDepth = options.get("depth", MAX_DEPTH)
+        nodeLimit = options.get("nodes")
+        timeLimit = None
+        if "movetime" in options:
+            timeLimit = options["movetime"] / 1000
+        elif "wtime" in options or "btime" in options:
+            clock = options.get("wtime" if self.gs.WhiteToMove else "btime", 0)
+            increment = options.get("winc" if self.gs.WhiteToMove else "binc", 0)
+            timeLimit = max(clock / options.get("movestogo", MOVES_TO_GO) + increment * 0.8, 10) / 1000
+        self.stopEvent.clear()
+        self.thread = threading.Thread(target=self.search,
+                                       args=(maxDepth, timeLimit, nodeLimit, options.get("infinite", False)),
+                                       daemon=True)
+        self.thread.start()
+
+    def search(self, maxDepth, timeLimit, nodeLimit, infinite):
+        gs = self.gs
+        valid_moves = gs.get_valid_moves()
+        move = SmartMoveFinder.findBestMoveIterative(gs, valid_moves, maxDepth, timeLimit, nodeLimit,
+                                                     onIteration=self.info, shouldStop=self.stopEvent.is_set)
+        ordering = SmartMoveFinder.moveOrderer.report()
+        self.send(f"info string cutoffs {ordering['cutoffs']} firstmove {ordering['firstMoveCutoffRate']:.3f} "
+                  f"cutoffindex {ordering['averageCutoffMoveIndex']:.2f}")
+        if infinite:
+            self.stopEvent.wait()  # UCI: an infinite search reports only once it is stopped
+        self.send(f"bestmove {uci_move(move) if move is not None else '0000'}")
+
+    def info(self, depth, score, nodes, seconds, move):
+        pv = SmartMoveFinder.searchPV
+        nps = int(nodes / seconds) if seconds > 0 else 0
+        self.send(f"info depth {depth} score {uci_score(score)} nodes {nodes} nps {nps} "
+                  f"time {int(seconds * 1000)} pv {' '.join(uci_move(m) for m in pv)}")
+
+    def stop(self):
+        if self.thread is not None:
+            self.stopEvent.set()
+            self.thread.join()
+            self.thread = None
+
+
+def main():
+    engine = UCIEngine()
+    for line in sys.stdin:
+        if not engine.handle(line):
+            break
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+import time
+
+from Chess import ChessEngine, EngineWorker
+
+
+def waitForMove(engine, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        packed = engine.poll()
+        if packed is not None:
+            return packed
+        assert engine.process.is_alive(), "engine worker died during the search"
+        time.sleep(0.01)
+    raise AssertionError("engine worker did not answer")
+
+
+def test_lazy_smp_search_through_worker():
+    gs = ChessEngine.GameState()
+    engine = EngineWorker.EngineWorker(ChessEngine.GameState, maxDepth=2, ponder=False, useBook=False, threads=2)
+    try:
+        assert not engine.process.daemon
+        engine.start_search(gs)
+        packed = waitForMove(engine)
+        assert packed in {move.packed for move in gs.get_valid_moves()}
+    finally:
+        engine.close()
+    assert not engine.process.is_alive()
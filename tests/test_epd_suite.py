@@ -0,0 +1,33 @@
+import pytest
+
+from Chess import EpdSuite
+
+
+def test_operations():
+    entry = EpdSuite.parseEpd('r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - '
+                              'bm Qxf7# Qxf7; am Qh4; id "scholar\'s mate; WAC";')
+    assert entry["fen"] == "r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq -"
+    assert entry["bm"] == ["Qxf7#", "Qxf7"]
+    assert entry["am"] == ["Qh4"]
+    assert entry["id"] == "scholar's mate; WAC"
+
+
+def test_move_counters_fold_into_the_fen():
+    entry = EpdSuite.parseEpd("4k3/8/8/8/8/8/8/4K2R w K - hmvc 12; fmvn 40; bm Rh8+;")
+    assert entry["fen"] == "4k3/8/8/8/8/8/8/4K2R w K - 12 40"
+    assert entry["bm"] == ["Rh8+"]
+
+
+def test_blank_and_comment_lines():
+    assert EpdSuite.parseEpd("   \n") is None
+    assert EpdSuite.parseEpd("# a comment") is None
+    assert EpdSuite.parseEpd("4k3/8/8/8/8/8/8/4K3 w - -") == {"fen": "4k3/8/8/8/8/8/8/4K3 w - -", "bm": [], "am": []}
+    with pytest.raises(ValueError):
+        EpdSuite.parseEpd("4k3/8/8/8/8/8/8/4K3 w")
+
+
+def test_read_epd_numbers_unnamed_entries(tmp_path):
+    path = tmp_path / "suite.epd"
+    path.write_text('# suite\n4k3/8/8/8/8/8/8/4K2R w K - bm Rh8+; id "named";\n\n4k3/8/8/8/8/8/8/4K2R b K - am Kd7;\n')
+    entries = EpdSuite.readEpd(str(path))
+    assert [entry["id"] for entry in entries] == ["named", f"{path}:2"]
@@ -0,0 +1,36 @@
+import random
+
+import pytest
+
+from Chess import Perft, SmartMoveFinder
+
+
+@pytest.mark.parametrize("backend", sorted(Perft.BACKENDS))
+def test_search_with_evaluation_cross_check(monkeypatch, backend):
+    # Every leaf compares the incremental score with a full board scan and raises on any drift
+    monkeypatch.setattr(SmartMoveFinder, "DEBUG_EVALUATION", True)
+    for position in Perft.POSITIONS:
+        gs = Perft.gameStateFromFen(position["fen"], backend)
+        SmartMoveFinder.transpositionTable.clear()
+        assert SmartMoveFinder.findBestMoveIterative(gs, gs.get_valid_moves(), 3) is not None
+
+
+def test_cross_check_catches_drift(monkeypatch):
+    monkeypatch.setattr(SmartMoveFinder, "DEBUG_EVALUATION", True)
+    gs = Perft.gameStateFromFen(Perft.START_FEN, "list")
+    gs.material += 1
+    with pytest.raises(AssertionError):
+        SmartMoveFinder.evaluatePosition(gs)
+
+
+def test_incremental_score_matches_full_evaluation():
+    rng = random.Random(11)
+    for backend in Perft.BACKENDS:
+        for position in Perft.POSITIONS:
+            gs = Perft.gameStateFromFen(position["fen"], backend)
+            for _ in range(80):
+                valid_moves = gs.get_valid_moves()
+                if not valid_moves:
+                    break
+                gs.make_move(rng.choice(valid_moves), rng.choice("QRBN"))
+                assert SmartMoveFinder.evaluatePosition(gs) == pytest.approx(SmartMoveFinder.fullEvaluation(gs))
@@ -0,0 +1,42 @@
+import pytest
+
+from Chess import Perft
+
+
+@pytest.mark.parametrize("backend", sorted(Perft.BACKENDS))
+@pytest.mark.parametrize("fen", [position["fen"] for position in Perft.POSITIONS] + [
+    "rnbqkbnr/ppp1pppp/8/8/3pP3/8/PPPP1PPP/RNBQKBNR b Kq e3 0 3",
+    "4k3/8/8/8/8/8/8/4K2R w K - 37 81",
+])
+def test_fen_round_trip(fen, backend):
+    gs = Perft.gameStateFromFen(fen, backend)
+    assert gs.get_fen() == fen
+    hash = gs.hash
+    gs.load_fen(gs.get_fen())
+    assert gs.hash == hash
+
+
+def test_fen_follows_play():
+    gs = Perft.gameStateFromFen(Perft.START_FEN, "list")
+    for text in ("e2e4", "g8f6", "e4e5", "d7d5"):
+        gs.make_move(gs.parse_move(text))
+    # En passant square after the double step, move counters after four plies
+    assert gs.get_fen() == "rnbqkb1r/ppp1pppp/5n2/3pP3/8/8/PPPP1PPP/RNBQKBNR w KQkq d6 0 3"
+    gs.make_move(gs.parse_move("e1e2"))
+    gs.make_move(gs.parse_move("f6g8"))
+    assert gs.get_fen() == "rnbqkbnr/ppp1pppp/8/3pP3/8/8/PPPPKPPP/RNBQ1BNR w kq - 2 4"
+    gs.load_fen(gs.get_fen())
+    assert gs.get_fen() == "rnbqkbnr/ppp1pppp/8/3pP3/8/8/PPPPKPPP/RNBQ1BNR w kq - 2 4"
+
+
+def test_epd_fields_default_the_counters():
+    gs = Perft.gameStateFromFen(Perft.START_FEN, "list")
+    gs.load_fen("4k3/8/8/8/8/8/8/4K3 b - -")
+    assert gs.get_fen() == "4k3/8/8/8/8/8/8/4K3 b - - 0 1"
+
+
+@pytest.mark.parametrize("fen", ["8/8/8 w - - 0 1", "rnbqkbnr/ppppxppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+                                 "rnbqkbnr/pppppppp/9/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1", "8/8/8/8/8/8/8/8"])
+def test_bad_fen_is_rejected(fen):
+    with pytest.raises(ValueError):
+        Perft.gameStateFromFen(fen, "list")
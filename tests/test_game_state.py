@@ -0,0 +1,75 @@
+import random
+
+from Chess import ChessEngine, Perft
+
+
+def test_piece_count_and_square_sum_follow_make_and_undo():
+    rng = random.Random(5)
+    for backend in Perft.BACKENDS:
+        for game in range(30):
+            gs = Perft.gameStateFromFen(Perft.POSITIONS[game % len(Perft.POSITIONS)]["fen"], backend)
+            played = 0
+            for _ in range(200):
+                valid_moves = gs.get_valid_moves()
+                if not valid_moves:
+                    break
+                gs.make_move(rng.choice(valid_moves))
+                played += 1
+                assert (gs.pieceCount, gs.nonKingSquareSum) == (gs.count_pieces(), gs.sum_non_king_squares())
+            for _ in range(played):
+                gs.undo_move()
+                assert (gs.pieceCount, gs.nonKingSquareSum) == (gs.count_pieces(), gs.sum_non_king_squares())
+
+
+def test_square_sum_locates_the_lone_piece():
+    gs = Perft.gameStateFromFen("8/8/3k4/8/8/2K5/6r1/8 w - - 0 1", "list")
+    assert gs.pieceCount == 3
+    assert gs.board[gs.nonKingSquareSum >> 3][gs.nonKingSquareSum & 7] == "bR"
+
+
+def snapshot(gs):
+    state = ([row[:] for row in gs.board], gs.WhiteToMove, gs.castle_bits(), gs.EnPassantPossible, gs.hash,
+             gs.material, gs.positional, dict(gs.nonPawnMaterial), gs.pieceCount, gs.nonKingSquareSum,
+             gs.WhiteKingLocation, gs.BlackKingLocation, len(gs.moveLog), gs.undoCount)
+    if hasattr(gs, "bitboards"):
+        state += (list(gs.bitboards), list(gs.occupancy))
+    return state
+
+
+def test_undo_stack_restores_every_field(monkeypatch):
+    monkeypatch.setattr(ChessEngine, "UNDO_STACK_PLIES", 4)  # so the stack has to grow several times
+    rng = random.Random(7)
+    for backend in Perft.BACKENDS:
+        for game in range(12):
+            gs = Perft.gameStateFromFen(Perft.POSITIONS[game % len(Perft.POSITIONS)]["fen"], backend)
+            assert len(gs.undoFlags) == 4
+            history = []  # (null move?, snapshot before it)
+            for _ in range(400):
+                valid_moves = gs.get_valid_moves()
+                if history and (not valid_moves or rng.random() < 0.3):
+                    null, before = history.pop()
+                    if null:
+                        gs.undo_null_move()
+                    else:
+                        gs.undo_move()
+                    assert snapshot(gs) == before
+                    continue
+                if not valid_moves:
+                    break
+                before = snapshot(gs)
+                null = not gs.inCheck and rng.random() < 0.15
+                if null:
+                    gs.make_null_move()
+                else:
+                    gs.make_move(rng.choice(valid_moves))
+                history.append((null, before))
+                assert gs.hash == gs.compute_hash()
+                assert (gs.material, gs.positional) == gs.compute_score()
+            while history:
+                null, before = history.pop()
+                if null:
+                    gs.undo_null_move()
+                else:
+                    gs.undo_move()
+                assert snapshot(gs) == before
+            assert len(gs.undoFlags) > 4
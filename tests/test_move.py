@@ -0,0 +1,41 @@
+import pytest
+
+from Chess import ChessEngine, Perft
+
+FIELDS = ("start_row", "start_col", "end_row", "end_col", "piece_moved", "piece_captured", "move_id",
+          "pawn_promotion", "castle", "isCapture", "EnPassant")
+
+
+def checkRoundTrip(move, board, seen):
+    copy = ChessEngine.Move.from_packed(move.packed, board)
+    assert [getattr(copy, name) for name in FIELDS] == [getattr(move, name) for name in FIELDS]
+    assert copy == move and hash(copy) == hash(move) == move.move_id
+    assert move.packed < 1 << 15
+    seen.update(name for name in ("castle", "EnPassant", "pawn_promotion") if getattr(move, name))
+
+
+@pytest.mark.parametrize("backend", sorted(Perft.BACKENDS))
+def test_packed_moves_rebuild_every_field(backend):
+    # Between them the perft positions have castles, en passant and promotions with and without capture
+    seen = set()
+    for position in Perft.POSITIONS:
+        gs = Perft.gameStateFromFen(position["fen"], backend)
+        for move in gs.get_valid_moves():
+            checkRoundTrip(move, gs.board, seen)
+            gs.make_move(move)
+            for reply in gs.get_valid_moves():
+                checkRoundTrip(reply, gs.board, seen)
+            gs.undo_move()
+    assert seen == {"castle", "EnPassant", "pawn_promotion"}
+
+
+def test_moves_are_slotted_and_silent(capsys):
+    gs = Perft.gameStateFromFen("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1", "list")
+    move = gs.parse_move("e1g1")
+    assert move.castle
+    with pytest.raises(AttributeError):
+        move.note = "no __dict__"
+    gs.make_move(move)
+    gs.undo_move()
+    ChessEngine.Move((6, 4), (4, 4), gs.board)
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,44 @@
+import random
+
+import pytest
+
+from Chess import Perft, SearchBenchmark, SmartMoveFinder
+from Chess.MoveOrdering import MAX_PLY, MoveOrderer, StagedMoves, merge_reports
+
+
+def test_staged_moves_yield_every_legal_move_once():
+    rng = random.Random(2)
+    for backend in Perft.BACKENDS:
+        for game in range(20):
+            gs = Perft.gameStateFromFen(Perft.POSITIONS[game % len(Perft.POSITIONS)]["fen"], backend)
+            orderer = MoveOrderer()
+            for _ in range(60):
+                valid_moves = gs.get_valid_moves()
+                if not valid_moves:
+                    break
+                orderer.killers[0] = [rng.choice(valid_moves).move_id, rng.randrange(4096)]
+                staged = [move.packed for move in StagedMoves(gs, orderer, 0, rng.choice(valid_moves).move_id)]
+                assert sorted(staged) == sorted(move.packed for move in valid_moves)
+                assert gs.count_legal_moves() == len(valid_moves)
+                gs.make_move(rng.choice(valid_moves))
+
+
+def test_benchmark_reports_move_ordering():
+    result = SearchBenchmark.searchPosition(Perft.START_FEN, 3, (), "bitboard")
+    ordering = result["ordering"]
+    assert ordering["cutoffs"] > 0 and 0 < ordering["firstMoveCutoffRate"] <= 1
+    merged = merge_reports([ordering, ordering])
+    assert merged["cutoffs"] == 2 * ordering["cutoffs"]
+    assert merged["firstMoveCutoffRate"] == ordering["firstMoveCutoffRate"]
+    assert merged["generatedMovesPerNode"] == pytest.approx(ordering["generatedMovesPerNode"])
+    assert ordering["ungeneratedMovesPerNode"] > 0
+    assert MoveOrderer().report()["ungeneratedMovesPerNode"] is None  # off outside benchmarks
+
+
+def test_killers_cover_every_search_ply():
+    assert SmartMoveFinder.MAX_PLY == MAX_PLY
+    gs = Perft.gameStateFromFen(Perft.START_FEN, "list")
+    move = gs.get_valid_moves()[0]
+    orderer = MoveOrderer()
+    orderer.recordCutoff(move, MAX_PLY - 1, 1, 0)
+    assert orderer.killers[MAX_PLY - 1][0] == move.move_id
@@ -0,0 +1,17 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from Chess import OpeningBook
+
+
+def test_concurrent_builds_leave_one_whole_book(tmp_path):
+    path = str(tmp_path / "book.bin")
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        counts = list(pool.map(OpeningBook.build_book, [[OpeningBook.DEFAULT_SOURCE]] * 4, [path] * 4))
+    assert len(set(counts)) == 1 and counts[0] > 0
+    assert os.listdir(tmp_path) == ["book.bin"]
+    book = OpeningBook.OpeningBook(path)
+    try:
+        assert len(book) == counts[0]
+    finally:
+        book.close()
@@ -0,0 +1,12 @@
+from Chess import Perft
+
+
+def test_pawn_pinned_from_behind_can_push():
+    # The black queen pins the d5 pawn against the king on d7 from behind; d5d6 stays on the pin line
+    for backend in Perft.BACKENDS:
+        gs = Perft.gameStateFromFen("1k6/3K4/2p3p1/1p1P3p/2rq4/8/8/8 w - -", backend)
+        assert "d5d6" in {move.get_chess_notation() for move in gs.get_valid_moves()}
+
+
+def test_backends_agree_on_random_games():
+    assert Perft.crossCheck(games=60, seed=1) == []
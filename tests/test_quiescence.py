@@ -0,0 +1,55 @@
+from Chess import Perft, SmartMoveFinder
+
+WINDOW = (-SmartMoveFinder.CHECKMATE, SmartMoveFinder.CHECKMATE)
+
+
+def quiesce(fen, alpha=WINDOW[0], beta=WINDOW[1]):
+    """
+    (score, nodes) of a quiescence search of fen from the side to move's point of view.
+    """
+    gs = Perft.gameStateFromFen(fen, "bitboard")
+    SmartMoveFinder.searchNodes = 0
+    turnMultiplier = 1 if gs.WhiteToMove else -1
+    score = SmartMoveFinder.quiescenceSearch(gs, alpha, beta, turnMultiplier, 0, 0)
+    assert gs.get_fen() == Perft.gameStateFromFen(fen, "bitboard").get_fen()
+    return score, SmartMoveFinder.searchNodes
+
+
+def staticScore(fen):
+    gs = Perft.gameStateFromFen(fen, "bitboard")
+    return (1 if gs.WhiteToMove else -1) * SmartMoveFinder.evaluatePosition(gs)
+
+
+def test_hanging_queen_is_taken():
+    fen = "4k3/8/8/3q4/8/8/8/3QK3 w - - 0 1"
+    score, nodes = quiesce(fen)
+    assert score > staticScore(fen) + 8
+
+
+def test_stands_pat_rather_than_lose_the_queen():
+    # Qxd5 exd5 is the only capture
+    fen = "4k3/8/4p3/3p4/8/8/8/3QK3 w - - 0 1"
+    score, nodes = quiesce(fen)
+    assert score == staticScore(fen)
+    assert nodes > 1
+
+
+def test_delta_pruning_skips_hopeless_captures():
+    # Taking the pawn cannot come within DELTA_MARGIN of alpha, so no capture is searched
+    fen = "4k3/8/8/3p4/8/8/8/3QK3 w - - 0 1"
+    alpha = staticScore(fen) + SmartMoveFinder.pieceScores["p"] + SmartMoveFinder.DELTA_MARGIN
+    score, nodes = quiesce(fen, alpha, alpha + 1)
+    assert nodes == 1 and score <= alpha
+    score, nodes = quiesce(fen)
+    assert nodes > 1
+
+
+def test_stalemate_is_not_scored_as_the_static_evaluation():
+    fen = "k7/8/1Q6/8/8/8/8/7K b - - 0 1"
+    assert quiesce(fen)[0] == SmartMoveFinder.STALEMATE
+    assert staticScore(fen) < -5
+
+
+def test_mate_in_quiescence_counts_the_ply():
+    gs = Perft.gameStateFromFen("k7/1Q6/1K6/8/8/8/8/8 b - - 0 1", "bitboard")
+    assert SmartMoveFinder.quiescenceSearch(gs, *WINDOW, -1, 0, 3) == -SmartMoveFinder.CHECKMATE + 3
@@ -0,0 +1,13 @@
+from Chess import Perft, RootAnalysis
+
+
+def test_moves_past_multipv_are_marked_as_bounds():
+    gs = Perft.gameStateFromFen("r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4", "bitboard")
+    analysis = RootAnalysis.analyzeRootMoves(gs, depth=2, processes=2)
+    assert sorted(move.packed for move, score, exact, pv in analysis) == \
+        sorted(move.packed for move in gs.get_valid_moves())
+    best, bestScore, bestExact, bestPV = analysis[0]
+    assert best.get_chess_notation() == "h5f7" and bestExact
+    # Moves searched once the mate was in fail low against it and only have an upper bound
+    bounds = [score for move, score, exact, pv in analysis if not exact]
+    assert bounds and max(bounds) <= bestScore
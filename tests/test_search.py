@@ -0,0 +1,117 @@
+import pytest
+
+from Chess import ChessEngine, Perft, SearchBenchmark, SmartMoveFinder
+
+# (FEN, best move) pairs the search solves at depth 5 (WAC.003 and a knight fork)
+TACTICS = [("5rk1/1ppb3p/p1pb4/6q1/3P1p1r/2P1R2P/PP1BQ1P1/5RKN w - -", "e3g3"),
+           ("r3k2r/ppp2ppp/2n5/3q4/8/2N5/PPP2PPP/R1BQK2R w KQkq - 0 1", "c3d5")]
+
+
+def searchScores(fen, depth):
+    gs = ChessEngine.GameState()
+    gs.load_fen(fen)
+    SmartMoveFinder.transpositionTable.clear()
+    scores = []
+    SmartMoveFinder.findBestMoveIterative(gs, gs.get_valid_moves(), depth,
+                                          onIteration=lambda d, score, nodes, elapsed, move: scores.append(score))
+    return scores
+
+
+def test_mate_scores_count_plies_from_the_root():
+    # White mates in two moves; black to move is mated two moves after its own
+    assert searchScores("k7/8/2K5/8/8/8/8/7Q w - - 0 1", 6)[-1] == SmartMoveFinder.CHECKMATE - 3
+    assert searchScores("k7/8/2K5/8/8/8/8/7Q b - - 0 1", 6)[-1] == -SmartMoveFinder.CHECKMATE + 4
+
+
+def test_table_scores_are_node_relative():
+    for score in (SmartMoveFinder.CHECKMATE - 7, SmartMoveFinder.TABLEBASE_WIN - 30, 3.5, 0):
+        for sign in (1, -1):
+            stored = SmartMoveFinder.scoreToTable(sign * score, 5)
+            assert SmartMoveFinder.scoreFromTable(stored, 5) == sign * score
+            # Reached two plies nearer the root, the same mate comes two plies sooner
+            if abs(score) >= SmartMoveFinder.MATE_THRESHOLD:
+                assert SmartMoveFinder.scoreFromTable(stored, 3) == sign * (score + 2)
+
+
+def searchWith(monkeypatch, fen, depth, disabled=()):
+    """
+    Searches fen with the SearchBenchmark features in disabled switched off; returns (move, scores, searchStats).
+    """
+    for feature in SearchBenchmark.FEATURES:
+        monkeypatch.setattr(SmartMoveFinder, feature, feature not in disabled)
+    gs = Perft.gameStateFromFen(fen, "bitboard")
+    SmartMoveFinder.transpositionTable.clear()
+    scores = []
+    move = SmartMoveFinder.findBestMoveIterative(gs, gs.get_valid_moves(), depth,
+                                                 onIteration=lambda d, score, nodes, elapsed, move: scores.append(score))
+    return move.get_chess_notation(), scores, dict(SmartMoveFinder.searchStats)
+
+
+@pytest.mark.parametrize("disabled", [()] + [(feature,) for feature in ("USE_NULL_MOVE", "USE_LMR", "USE_FUTILITY")])
+@pytest.mark.parametrize("fen, bestMove", TACTICS)
+def test_tactics_are_found_with_selective_search(monkeypatch, fen, bestMove, disabled):
+    move, scores, stats = searchWith(monkeypatch, fen, 5, disabled)
+    assert move == bestMove
+    if not disabled:
+        # The solving search really did prune and reduce
+        assert stats["nullMoveCutoffs"] > 0 and stats["lmrReductions"] > 0 and stats["futilityPrunes"] > 0
+
+
+def test_no_null_move_with_only_pawns(monkeypatch):
+    move, scores, stats = searchWith(monkeypatch, "8/5k2/8/3p4/3P4/8/5K2/8 w - - 0 1", 5)
+    assert stats["nullMoveSearches"] == 0
+
+
+def test_null_move_cutoffs_are_verified_with_little_material(monkeypatch):
+    move, scores, stats = searchWith(monkeypatch, "8/7p/5k2/5p2/p1p2P2/Pr1pPK2/1P1R3P/8 b - -", 5)
+    assert stats["nullMoveVerifications"] > 0
+    assert stats["nullMoveVerifications"] == stats["nullMoveCutoffs"] + stats["nullMoveVerificationFailures"]
+
+
+PLAIN = ("USE_NULL_MOVE", "USE_LMR", "USE_FUTILITY")  # switched off so the search returns the exact minimax score
+
+
+@pytest.mark.parametrize("fen", [fen for fen, bestMove in TACTICS] + [position["fen"] for position in Perft.POSITIONS])
+def test_pvs_and_aspiration_keep_the_alpha_beta_score(monkeypatch, fen):
+    move, plainScores, stats = searchWith(monkeypatch, fen, 4, PLAIN + ("USE_PVS", "USE_ASPIRATION"))
+    # A window far narrower than any score change forces fail-high and fail-low re-searches at the root
+    monkeypatch.setattr(SmartMoveFinder, "ASPIRATION_WINDOW", SmartMoveFinder.SCORE_EPSILON)
+    move, scores, stats = searchWith(monkeypatch, fen, 4, PLAIN)
+    assert scores[-1] == plainScores[-1]
+    assert stats["pvsResearches"] > 0
+
+
+def test_aspiration_widens_on_both_sides(monkeypatch):
+    monkeypatch.setattr(SmartMoveFinder, "ASPIRATION_WINDOW", SmartMoveFinder.SCORE_EPSILON)
+    windows = []
+    search = SmartMoveFinder.findMoveNegaMaxAlphaBeta
+
+    def rootSearch(gs, valid_moves, depth, alpha, beta, *args, **kwargs):
+        score = search(gs, valid_moves, depth, alpha, beta, *args, **kwargs)
+        if valid_moves is not None:
+            windows.append((alpha, beta, score))
+        return score
+
+    monkeypatch.setattr(SmartMoveFinder, "findMoveNegaMaxAlphaBeta", rootSearch)
+    searchWith(monkeypatch, Perft.POSITIONS[1]["fen"], 4)
+    assert any(score <= alpha for alpha, beta, score in windows)
+    assert any(score >= beta for alpha, beta, score in windows)
+    assert SmartMoveFinder.searchStats["aspirationResearches"] > 0
+
+
+@pytest.mark.parametrize("limit", ["nodes", "stop"])
+def test_interrupted_search_leaves_the_root_position(limit):
+    fen = TACTICS[0][0]
+    gs = Perft.gameStateFromFen(fen, "bitboard")
+    rootHash = gs.hash
+    SmartMoveFinder.transpositionTable.clear()
+    if limit == "nodes":
+        move = SmartMoveFinder.findBestMoveIterative(gs, gs.get_valid_moves(), 8, nodeLimit=3000)
+    else:
+        calls = []
+        move = SmartMoveFinder.findBestMoveIterative(gs, gs.get_valid_moves(), 8,
+                                                     shouldStop=lambda: calls.append(1) or len(calls) > 20)
+    assert SmartMoveFinder.searchNodes < 10000  # it really was cut short
+    assert move in gs.get_valid_moves()
+    assert gs.hash == rootHash and gs.get_fen() == fen + " 0 1"
+    assert gs.moveLog == [] and gs.undoCount == 0
@@ -0,0 +1,25 @@
+import pytest
+
+from Chess import ChessEngine, SelfPlay, SmartMoveFinder
+
+
+@pytest.mark.parametrize("text", ["SEARCH_THREADS=2", "DEPTH=2", "SEARCH_NODE_LIMIT=100"])
+def test_settings_a_match_cannot_apply_are_rejected(text):
+    with pytest.raises(ValueError):
+        SelfPlay.parseConfig(text)
+
+
+def test_tablebase_setting_applies_to_the_search(monkeypatch):
+    player = SelfPlay.Player(SelfPlay.parseConfig(f"depth=1,USE_TABLEBASES={not SmartMoveFinder.USE_TABLEBASES}"))
+    seen = []
+
+    def search(gs, valid_moves, *limits):
+        seen.append(SmartMoveFinder.tablebases)
+        return valid_moves[0]
+
+    monkeypatch.setattr(SmartMoveFinder, "findBestMoveIterative", search)
+    gs = ChessEngine.GameState()
+    player.move(gs, gs.get_valid_moves())
+    player.close()
+    assert (seen[0] is not None) != SmartMoveFinder.USE_TABLEBASES
+    assert SmartMoveFinder.tablebases is not seen[0]
@@ -0,0 +1,74 @@
+import pytest
+
+from Chess import SmartMoveFinder
+from Chess import TranspositionTable as tt
+
+# A zero-megabyte table has a single bucket, so every key competes for the same two slots
+A, B, C, D = 0x1234 << 20, 0x5678 << 20, 0x9ABC << 20, 0xDEF0 << 20
+
+
+def test_store_and_probe_round_trip():
+    table = tt.TranspositionTable(1)
+    entries = {1: (0, 0.0, tt.EXACT, -1), 2: (12, -3.57, tt.LOWER, 4095), 3: (255, 41.25, tt.UPPER, 0)}
+    for key, (depth, score, bound, move_id) in entries.items():
+        table.store(key, depth, score, bound, move_id)
+    for key, entry in entries.items():
+        assert table.probe(key) == entry
+    assert table.probe(4) is None
+
+
+def test_mate_scores_survive_the_table():
+    table = tt.TranspositionTable(0)
+    for score in (SmartMoveFinder.CHECKMATE - 9, -SmartMoveFinder.CHECKMATE + 4, SmartMoveFinder.TABLEBASE_WIN - 40):
+        table.store(A, 3, SmartMoveFinder.scoreToTable(score, 6), tt.EXACT)
+        stored = table.probe(A)[1]
+        assert SmartMoveFinder.scoreFromTable(stored, 6) == score
+        assert SmartMoveFinder.scoreFromTable(stored, 2) == score + (4 if score > 0 else -4)
+
+
+def test_key_is_verified():
+    table = tt.TranspositionTable(0)
+    table.store(A, 4, 1.5, tt.EXACT, 10)
+    assert table.probe(B) is None  # same bucket, different key
+    table.table[0] ^= 1  # a torn entry no longer matches its key
+    assert table.probe(A) is None
+
+
+def test_hash_move_is_kept_when_a_store_has_none():
+    table = tt.TranspositionTable(0)
+    table.store(A, 2, 0.5, tt.EXACT, 77)
+    table.store(A, 3, 0.25, tt.UPPER)
+    assert table.probe(A) == (3, 0.25, tt.UPPER, 77)
+
+
+def test_two_tier_replacement():
+    table = tt.TranspositionTable(0, tt.TWO_TIER)
+    table.store(A, 5, 0, tt.EXACT)
+    table.store(B, 2, 0, tt.EXACT)  # too shallow for the depth slot, goes to the always-replace slot
+    table.store(C, 1, 0, tt.EXACT)
+    assert table.probe(A) is not None and table.probe(B) is None and table.probe(C) is not None
+    table.store(D, 6, 0, tt.EXACT)
+    assert table.probe(A) is None and table.probe(D) is not None and table.probe(C) is not None
+
+
+def test_depth_preferred_replacement():
+    table = tt.TranspositionTable(0, tt.DEPTH_PREFERRED)
+    table.store(A, 5, 0, tt.EXACT)
+    table.store(B, 4, 0, tt.EXACT)
+    assert table.probe(A) is not None and table.probe(B) is None
+    table.store(B, 5, 0, tt.EXACT)
+    assert table.probe(A) is None and table.probe(B) is not None
+    table.store(B, 1, 0, tt.EXACT)  # the same position always updates its own entry
+    assert table.probe(B)[0] == 1
+
+
+def test_always_replace():
+    table = tt.TranspositionTable(0, tt.ALWAYS_REPLACE)
+    table.store(A, 9, 0, tt.EXACT)
+    table.store(B, 1, 0, tt.EXACT)
+    assert table.probe(A) is None and table.probe(B) == (1, 0, tt.EXACT, -1)
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        tt.TranspositionTable(0, "lru")
@@ -0,0 +1,24 @@
+import io
+
+from Chess import SmartMoveFinder, UCI
+
+
+def test_scores():
+    assert UCI.uci_score(1.25) == "cp 125"
+    assert UCI.uci_score(SmartMoveFinder.CHECKMATE - 1) == "mate 1"
+    assert UCI.uci_score(SmartMoveFinder.CHECKMATE - 3) == "mate 2"
+    assert UCI.uci_score(-SmartMoveFinder.CHECKMATE + 4) == "mate -2"
+    assert UCI.uci_score(SmartMoveFinder.TABLEBASE_WIN - 21) == "mate 11"
+    assert UCI.uci_score(-SmartMoveFinder.TABLEBASE_WIN + 20) == "mate -10"
+
+
+def test_mate_is_reported_in_moves():
+    output = io.StringIO()
+    engine = UCI.UCIEngine(output)
+    engine.handle("position fen k7/8/2K5/8/8/8/8/7Q w - - 0 1")
+    engine.handle("go depth 4")
+    engine.thread.join()
+    lines = output.getvalue().splitlines()
+    assert " score mate 2 " in [line for line in lines if line.startswith("info depth")][-1]
+    assert lines[-2].startswith("info string cutoffs ")
+    assert lines[-1].startswith("bestmove ")